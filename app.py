@@ -1,18 +1,47 @@
 import re
-import zipfile
-from pathlib import Path
 from io import BytesIO
+from pathlib import Path
 
 import streamlit as st
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
 
-from processor import process_dataframe
+from artifacts import write_zip
+from cube import HeartCube
+from donor_index import DonorIndex
+from exports import PARQUET_AVAILABLE, bulk_export_zip
+from ingest import assign_rounds, read_upload
+from jobs import GenerationJob, JobLease, defer_cleanup
+from overlap import DonorBJMatrix
+from shared_cache import content_digest, get_shared_cache
+from preview import PREVIEW_PAGE_SIZES, filter_rows, number_column_config, page_count, page_slice
+from processor import aggregate_donors, clean_and_prepare, donor_leaderboard, process_prepared, resolve_columns
+from rollup import (
+    available_dates,
+    bj_totals,
+    daily_totals,
+    load_rollups,
+    process_rollup,
+    rollup_signature,
+    save_rollups,
+    source_rollups,
+)
+from rates import DEFAULT_RATES, is_default, normalize_rates, settlement_table
+from workbooks import (
+    TOTAL_SHARD_BJS,
+    TOTAL_SHARD_ROWS,
+    bj_filenames,
+    generate_artifacts,
+    make_overlap_excel,
+    make_period_excel,
+    make_standard_settlement_excel,
+)
 
 
 st.set_page_config(page_title="BJ 하트 집계", layout="centered")
 
+# 표 숫자 컬럼: 숫자 그대로 전송, 천 단위 콤마는 화면에서만
+NUMBER_FORMAT = number_column_config()
+
 
 # ==================================================
 # 🔐 비밀번호 게이트
@@ -41,39 +70,6 @@ if not check_password():
     st.stop()
 
 
-# ==================================================
-# 📦 엑셀 공통 유틸 (콤마/테두리/열너비)
-# ==================================================
-thin = Side(style="thin")
-all_border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-def apply_border(ws):
-    # "값이 있는 셀" 전부 테두리
-    for r in range(1, ws.max_row + 1):
-        for c in range(1, ws.max_column + 1):
-            cell = ws.cell(row=r, column=c)
-            if cell.value not in (None, ""):
-                cell.border = all_border
-
-def auto_width(ws, min_w=18, max_w=45, pad=4):
-    # 기본 넓이 유지 + 데이터 길이 따라 자동 확장
-    for col in ws.columns:
-        max_len = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            if cell.value not in (None, ""):
-                max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max(max_len + pad, min_w), max_w)
-
-def format_header_row(ws, header_row=1):
-    # 헤더 정렬(선택)
-    for c in range(1, ws.max_column + 1):
-        cell = ws.cell(row=header_row, column=c)
-        if cell.value not in (None, ""):
-            cell.alignment = Alignment(horizontal="center")
-
-
-# ==================================================
 # 📌 화면 시작
 # ==================================================
 st.title("BJ 하트 집계 (BJ 전달용)")
@@ -93,111 +89,62 @@ if not uploaded_files:
 # ==================================================
 # 📥 파일 읽기
 # ==================================================
-def parse_donation_times(series):
-    text = series.astype(str).str.strip()
-    text = text.str.replace("오전", "AM", regex=False).str.replace("오후", "PM", regex=False)
-    parsed = pd.to_datetime(text, errors="coerce", format="mixed")
-
-    missing = parsed.isna()
-    if missing.any():
-        numeric = pd.to_numeric(series[missing], errors="coerce")
-        excel_dates = pd.to_datetime(numeric, errors="coerce", unit="D", origin="1899-12-30")
-        parsed.loc[missing] = excel_dates
-
-    return parsed
-
-
-def donation_business_date(dt):
-    if pd.isna(dt):
-        return None
-    return (
-        dt - pd.Timedelta(days=1)
-        if (dt.hour * 3600 + dt.minute * 60 + dt.second) / 86400 < 0.625
-        else dt
-    ).date()
-
-
-def business_date_from_filename(filename):
-    stem = Path(filename).stem
-
-    md = re.search(r"(?<!\d)(\d{1,2})[.\-_월 ]+(\d{1,2})(?:일)?(?!\d)", stem)
-    if md:
-        month, day = map(int, md.groups())
-        return pd.Timestamp(year=pd.Timestamp.today().year, month=month, day=day).date()
+# 공용 캐시: 다른 운영자가 같은 파일을 올렸으면 파싱/집계/파일생성 결과를 그대로 재사용
+shared_cache = get_shared_cache()
+cache_authorized = st.session_state.get("password_correct") is True
 
-    ymd = re.search(r"(20\d{2})(\d{2})(\d{2})(\d{2})?", stem)
-    if ymd:
-        year, month, day, hour = ymd.groups()
-        dt = pd.Timestamp(year=int(year), month=int(month), day=int(day), hour=int(hour or 0))
-        return donation_business_date(dt)
-
-    return None
-
-
-def file_business_date(df, filename):
-    col_time = next((c for c in df.columns if "후원" in c and "시간" in c), None)
-    if not col_time:
-        return business_date_from_filename(filename)
-
-    times = parse_donation_times(df[col_time]).dropna()
-    if times.empty:
-        return business_date_from_filename(filename)
-
-    business_dates = times.apply(donation_business_date)
-    return business_dates.min()
-
-
-def build_date_to_round(business_dates):
-    dates = sorted({d for d in business_dates if d is not None})
-    if len(dates) <= MAX_STANDARD_ROUNDS:
-        return {
-            d: idx
-            for idx, d in enumerate(dates, start=1)
-        }
-
-    date_to_round = {}
-    for track in (dates[0::2], dates[1::2]):
-        for idx, d in enumerate(track[:MAX_STANDARD_ROUNDS], start=1):
-            date_to_round[d] = idx
-    return date_to_round
-
-
-dfs = []
-MAX_STANDARD_ROUNDS = 15
 file_entries = []
+content_signature = []
 for idx, f in enumerate(uploaded_files, start=1):
     try:
-        if f.name.lower().endswith(".csv"):
-            df = pd.read_csv(f)
-        else:
-            df = pd.read_excel(f)
-        file_entries.append((idx, df, file_business_date(df, f.name)))
+        digest = content_digest(f.getbuffer())
+        df, business_date = shared_cache.get_or_create(
+            ("파일", digest, f.name),
+            lambda f=f: read_upload(f),
+            authorized=cache_authorized,
+        )
+        file_entries.append((idx, df, business_date))
+        content_signature.append((digest, f.name))
     except Exception as e:
         st.error(f"{f.name} 읽기 실패: {e}")
+content_signature = tuple(content_signature)
 
-if len(file_entries) > 1:
-    date_to_round = build_date_to_round([d for _, _, d in file_entries])
-
-    assigned_rounds = []
-    for idx, df, business_date in file_entries:
-        if business_date in date_to_round:
-            round_no = date_to_round[business_date]
-        else:
-            round_no = min(((idx - 1) // 2) + 1, MAX_STANDARD_ROUNDS)
-        df["업로드회차"] = f"{round_no}회차"
-        assigned_rounds.append(round_no)
-        dfs.append(df)
-else:
-    dfs = [df for _, df, _ in file_entries]
-
-standard_round_count = min(max(assigned_rounds) if len(file_entries) > 1 and assigned_rounds else len(uploaded_files), MAX_STANDARD_ROUNDS)
-round_labels = [f"{idx}회차" for idx in range(1, standard_round_count + 1)]
+dfs, round_labels = assign_rounds(file_entries, len(uploaded_files))
 
 if not dfs:
     st.error("읽을 수 있는 파일이 없습니다.")
     st.stop()
 
-merged = pd.concat(dfs, ignore_index=True)
+# 상위 순위 미리보기 크기
+LEADERBOARD_SIZE = 10
+
+
+def prepare_uploads():
+    merged = pd.concat(dfs, ignore_index=True)
+    canonical = clean_and_prepare(merged)
+    # 원본 합본은 표준화 후 버림 (공유 캐시에 원본 + 표준 로그 두 벌을 두지 않음)
+    # 총합산 필수 컬럼 확인에는 컬럼 이름만 있으면 되므로 헤더(0행)만 보관
+    header = pd.DataFrame(columns=merged.columns)
+    del merged
+    # 후원자 합산은 한 번만 — BJ별 후원자 표와 상위 순위 미리보기가 같은 표를 씀
+    donors = aggregate_donors(canonical) if canonical is not None and not canonical.empty else None
+    result = process_prepared(canonical, donors) if donors is not None else None
+    # (날짜 × 정산일자 × 회차 × BJ × 구분) 집계 — 요약표 / 엑셀 합계가 모두 여기서 잘라 씀
+    cube = HeartCube(canonical) if canonical is not None else None
+    # 후원자 검색 색인 (아이디/닉네임 → BJ·회차별 합계, 로그 행 위치)
+    donor_index = DonorIndex(canonical) if canonical is not None and not canonical.empty else None
+    # 후원자 × BJ 하트 행렬 (교차 후원 / BJ 간 겹침 — BJ별 후원자 표를 쌍마다 병합하지 않음)
+    donor_matrix = DonorBJMatrix(canonical) if canonical is not None and not canonical.empty else None
+    # 상위 순위 미리보기도 업로드당 한 번만 (rerun 마다 다시 집계하지 않음, 합산된 표에서 nlargest 만)
+    board = donor_leaderboard(donors, LEADERBOARD_SIZE) if donors is not None else None
+    return header, canonical, result, cube, donor_index, donor_matrix, board
+
+
+header, canonical, result, cube, donor_index, donor_matrix, board = shared_cache.get_or_create(
+    ("집계", content_signature),
+    prepare_uploads,
+    authorized=cache_authorized,
+)
 
 
 # ==================================================
@@ -212,7 +159,7 @@ def extract_prefix_from_filename(files):
     return None
 
 def extract_earliest_date_prefix(df):
-    col_time = next((c for c in df.columns if "후원" in c and "시간" in c), None)
+    col_time = resolve_columns(df.columns).get("후원시간")
     if not col_time:
         return None
     tmp = df[[col_time]].copy()
@@ -225,74 +172,28 @@ def extract_earliest_date_prefix(df):
 if len(uploaded_files) == 1:
     prefix = extract_prefix_from_filename(uploaded_files)
     if not prefix:
-        prefix = extract_earliest_date_prefix(merged)
+        prefix = extract_earliest_date_prefix(dfs[0])
 else:
     prefix = None  # 여러개면 prefix 안 붙임
 
 
-# ==================================================
-# 🧠 하트 구분 / 아이디-닉네임 분리
-# ==================================================
-def classify_heart_type(user_id: str) -> str:
-    s = str(user_id)
-    if "@ka" in s:
-        return "일반"
-    if "@" in s:
-        return "제휴"
-    return "일반"
-
-def split_id_nickname(text):
-    text = str(text)
-    if "(" in text and ")" in text:
-        id_part, nick_part = text.split("(", 1)
-        nick_part = nick_part.rstrip(")")
-    else:
-        id_part = text
-        nick_part = ""
-    return id_part.strip(), nick_part.strip()
-
-
 # ==================================================
 # 📊 웹 요약표 (참여BJ별 일반/제휴/총합)
 # ==================================================
 try:
-    tmp = merged.copy()
-
-    col_id = next((c for c in tmp.columns if "후원" in c and "아이디" in c), None)
-    col_heart = next((c for c in tmp.columns if "후원" in c and "하트" in c), None)
-    col_bj = next((c for c in tmp.columns if "참여" in c and "BJ" in c), None)
-
-    if not (col_id and col_heart and col_bj):
+    if cube is None:
         st.warning("요약표: 필수 컬럼(후원아이디/후원하트/참여BJ)을 찾지 못했습니다.")
     else:
-        tmp[col_heart] = pd.to_numeric(tmp[col_heart], errors="coerce").fillna(0)
-        tmp.loc[tmp[col_heart] < 0, col_heart] = 0
-
-        tmp["후원아이디"] = tmp[col_id].astype(str).str.replace(r"\(.*\)", "", regex=True).str.strip()
-        tmp["구분"] = tmp["후원아이디"].apply(classify_heart_type)
-
-        pivot = (
-            tmp.groupby([col_bj, "구분"])[col_heart]
-            .sum()
-            .unstack(fill_value=0)
-            .reset_index()
-        )
-
-        if "일반" not in pivot.columns:
-            pivot["일반"] = 0
-        if "제휴" not in pivot.columns:
-            pivot["제휴"] = 0
-
-        pivot["총합"] = pivot["일반"] + pivot["제휴"]
-        pivot = pivot.rename(columns={col_bj: "참여BJ"})
-        pivot = pivot[["참여BJ", "일반", "제휴", "총합"]].sort_values("총합", ascending=False)
-
-        # 화면용 콤마(문자열) — 엑셀은 number_format으로 처리하니까 여기만 문자열로 OK
-        for c in ["일반", "제휴", "총합"]:
-            pivot[c] = pivot[c].apply(lambda x: f"{int(x):,}")
+        # 집계 큐브에서 BJ 단위로 자르기 (원본 행 재집계 없음)
+        pivot = cube.pivot(["참여BJ"]).sort_values("총합", ascending=False)
 
         st.subheader("요약_참여BJ_총계")
-        st.dataframe(pivot.reset_index(drop=True), hide_index=True, use_container_width=True)
+        st.dataframe(
+            pivot.reset_index(drop=True),
+            hide_index=True,
+            use_container_width=True,
+            column_config=NUMBER_FORMAT,
+        )
 
 except Exception as e:
     st.warning(f"요약표 생성 중 오류: {e}")
@@ -301,624 +202,318 @@ except Exception as e:
 # ==================================================
 # 📁 BJ별 파일 생성 (정산용 / BJ용) - 콤마/테두리/열너비 적용
 # ==================================================
-result = process_dataframe(merged)
-
 if not result:
     st.error("집계 결과가 없습니다.")
     st.stop()
 
-def make_excel(df: pd.DataFrame, bj_name: str, detail_df=None) -> BytesIO:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "정산표"
-
-    # 상단 합계
-    total = int(pd.to_numeric(df["후원하트"], errors="coerce").fillna(0).sum())
-    ws["A1"] = ""
-    ws["B1"] = bj_name
-    total_cell = ws["C1"]
-    total_cell.value = total
-    total_cell.number_format = "#,##0"
-
-    # 헤더
-    ws.append(["후원아이디", "닉네임", "후원하트"])
-    format_header_row(ws, header_row=2)
-
-    # 데이터
-    for _, r in df.iterrows():
-        row = ws.max_row + 1
-        ws.cell(row=row, column=1, value=str(r.get("아이디", "")))
-        ws.cell(row=row, column=2, value=str(r.get("닉네임", "")))
-
-        heart = pd.to_numeric(r.get("후원하트", 0), errors="coerce")
-        heart = 0 if pd.isna(heart) else int(heart)
-        heart = max(heart, 0)
-
-        cell = ws.cell(row=row, column=3, value=heart)
-        cell.number_format = "#,##0"
-
-    # 기본 폭(너무 좁아지는 것 방지) + 자동 보정
-    ws.column_dimensions["A"].width = 26
-    ws.column_dimensions["B"].width = 22
-    ws.column_dimensions["C"].width = 16
-    auto_width(ws, min_w=18, max_w=45, pad=4)
-    apply_border(ws)
-
-    # ==================================================
-    # 📄 상세내역 시트 추가
-    # ==================================================
-    if detail_df is not None and not detail_df.empty:
-
-        detail_ws = wb.create_sheet("상세내역")
-
-        detail_ws.append([
-            "날짜",
-            "시간",
-            "아이디",
-            "닉네임",
-            "하트",
-            "구분"
-        ])
-
-        format_header_row(detail_ws, 1)
-
-        detail_df = detail_df.sort_values(
-            by=["날짜", "시간"],
-            ascending=True
-        )
-
-        for _, r in detail_df.iterrows():
-
-            row = detail_ws.max_row + 1
+# 정산일자별 롤업 저장 (같은 업로드 묶음은 rerun 시 다시 저장하지 않음)
+if st.session_state.get("rollup_saved_for") != content_signature:
+    try:
+        # 파일별로 나눠 저장, 이 묶음에 있는 정산일자는 이전에 올린 파일 몫을 교체
+        sources = [(digest, len(df)) for (digest, _), df in zip(content_signature, dfs)]
+        save_rollups(source_rollups(canonical, sources))
+        st.session_state["rollup_saved_for"] = content_signature
+    except Exception as e:
+        st.warning(f"일자별 롤업 저장 실패: {e}")
 
-            detail_ws.cell(
-                row=row,
-                column=1,
-                value=r.get("날짜")
-            )
+# ==================================================
+# 🏆 상위 순위 미리보기 (부분 선택, 전체 정렬은 엑셀 생성 시에만)
+# ==================================================
+try:
+    st.subheader(f"🏆 상위 {LEADERBOARD_SIZE} 순위")
+    col_left, col_right = st.columns(2)
+    with col_left:
+        st.caption("참여BJ")
+        st.dataframe(board["BJ"], hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+    with col_right:
+        st.caption("후원자 (전체 BJ 합산)")
+        st.dataframe(board["후원자"], hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+
+    board_bj = st.selectbox("BJ별 상위 후원자", list(board["BJ별"].keys()))
+    if board_bj is not None:
+        st.dataframe(board["BJ별"][board_bj], hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
 
-            detail_ws.cell(
-                row=row,
-                column=2,
-                value=r.get("시간")
-            )
+except Exception as e:
+    st.warning(f"순위 생성 중 오류: {e}")
 
-            detail_ws.cell(
-                row=row,
-                column=3,
-                value=r.get("아이디")
-            )
 
-            detail_ws.cell(
-                row=row,
-                column=4,
-                value=r.get("닉네임")
+# ==================================================
+# 🔎 후원자 검색 (업로드 시 만든 색인 사용 — 로그 재검색 없음)
+# ==================================================
+with st.expander("🔎 후원자 검색 (아이디 / 닉네임)"):
+    donor_query = st.text_input("아이디 또는 닉네임 앞부분", key="donor_query")
+    if donor_query:
+        found = donor_index.search(donor_query)
+        if found.empty:
+            st.info("일치하는 후원자가 없습니다.")
+        else:
+            st.dataframe(found, hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+            donor_id = st.selectbox(
+                "상세 조회",
+                found["아이디"].tolist(),
+                format_func=lambda x: f"{x} ({found.loc[found['아이디'] == x, '닉네임'].iloc[0]})",
             )
-
-            heart_cell = detail_ws.cell(
-                row=row,
-                column=5,
-                value=int(r.get("후원하트", 0))
+            st.caption("BJ별 합계")
+            st.dataframe(donor_index.by_bj(donor_id), hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+            st.caption("BJ × 회차 / 정산일자별")
+            st.dataframe(donor_index.breakdown(donor_id), hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+            st.caption("후원 로그")
+            st.dataframe(
+                canonical.iloc[donor_index.row_positions(donor_id)][["참여BJ", "회차", "날짜", "시간", "닉네임", "후원하트"]],
+                hide_index=True,
+                use_container_width=True,
+                column_config=NUMBER_FORMAT,
             )
 
-            heart_cell.number_format = "#,##0"
 
-            detail_ws.cell(
-                row=row,
-                column=6,
-                value=r.get("구분")
-            )
+# ==================================================
+# 🔗 BJ 교차 후원 (후원자 × BJ 희소 행렬 — 업로드 시 한 번 생성)
+# ==================================================
+with st.expander("🔗 BJ 교차 후원 (BJ 간 공통 후원자)"):
+    col_min_shared, col_min_bjs = st.columns(2)
+    with col_min_shared:
+        min_shared = st.number_input("최소 공통 후원자 수", min_value=1, value=1, step=1, key="overlap_min_shared")
+    with col_min_bjs:
+        min_bjs = st.number_input("여러 BJ 후원자 기준 (BJ 수)", min_value=2, value=2, step=1, key="overlap_min_bjs")
+    multi_donors = donor_matrix.multi_bj_donors(min_bjs)
+    st.caption(
+        f"후원자 {donor_matrix.shape[0]:,}명 · BJ {donor_matrix.shape[1]:,}명 · "
+        f"{min_bjs}명 이상 BJ 후원자 {len(multi_donors):,}명"
+    )
+    st.caption("공통 후원자 많은 BJ 쌍 (상위 50)")
+    st.dataframe(
+        donor_matrix.overlap_pairs(min_shared).head(50),
+        hide_index=True,
+        use_container_width=True,
+        column_config={**NUMBER_FORMAT, "겹침비율": st.column_config.NumberColumn(format="percent")},
+    )
+    st.caption("여러 BJ 후원자 (상위 50)")
+    st.dataframe(multi_donors.head(50), hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+    overlap_name = f"{prefix}_BJ교차후원.xlsx" if prefix else "BJ교차후원.xlsx"
+    st.download_button(
+        label=f"{overlap_name} 다운로드",
+        # 클릭했을 때만 생성
+        data=lambda donor_matrix=donor_matrix, min_shared=min_shared, min_bjs=min_bjs: (
+            make_overlap_excel(donor_matrix, min_shared, min_bjs)
+        ),
+        file_name=overlap_name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-        detail_ws.column_dimensions["A"].width = 20
-        detail_ws.column_dimensions["B"].width = 18
-        detail_ws.column_dimensions["C"].width = 32
-        detail_ws.column_dimensions["D"].width = 26
-        detail_ws.column_dimensions["E"].width = 14
-        detail_ws.column_dimensions["F"].width = 12
 
-        auto_width(detail_ws, min_w=18, max_w=45, pad=4)
+# ==================================================
+# 📄 BJ별 로그 / 후원자 미리보기 (필터 + 페이지 — 보이는 페이지만 전송)
+# ==================================================
+@st.fragment
+def show_detail_preview():
+    # 페이지 넘김 / 필터 변경은 이 부분만 다시 그림 (전체 화면 rerun 없음)
+    col_bj, col_view = st.columns([2, 1])
+    with col_bj:
+        preview_bj = st.selectbox("BJ", list(result.keys()), key="preview_bj")
+    with col_view:
+        preview_view = st.radio("보기", ["전체로그", "후원자"], horizontal=True, key="preview_view")
+    if preview_bj is None:
+        return
+
+    views = result[preview_bj]
+    # 후원자: BJ용(하트 많은 순) 정렬 — 엑셀 생성 때와 같은 결과를 공유
+    rows = views["전체로그"] if preview_view == "전체로그" else views["BJ용"]
+
+    col_query, col_type, col_size = st.columns([2, 1, 1])
+    with col_query:
+        preview_query = st.text_input("아이디 / 닉네임 포함", key="preview_query")
+    with col_type:
+        preview_type = st.selectbox("구분", ["전체", "일반", "제휴"], key="preview_type")
+    with col_size:
+        page_size = st.selectbox("페이지당 행", PREVIEW_PAGE_SIZES, key="preview_page_size")
+
+    filtered = filter_rows(rows, preview_query, None if preview_type == "전체" else preview_type)
+    pages = page_count(len(filtered), page_size)
+    # 필터가 바뀌면 1페이지부터
+    page = st.number_input(
+        f"페이지 (전체 {pages:,}쪽 · {len(filtered):,}행)",
+        min_value=1,
+        max_value=pages,
+        value=1,
+        step=1,
+        key=f"preview_page:{preview_bj}:{preview_view}:{preview_type}:{page_size}:{preview_query}",
+    )
+    page_rows = page_slice(filtered, page, page_size)
+    st.dataframe(
+        page_rows,
+        hide_index=True,
+        use_container_width=True,
+        column_config=NUMBER_FORMAT,
+    )
 
-        apply_border(detail_ws)
 
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-    return bio
+with st.expander("📄 BJ별 로그 / 후원자 미리보기"):
+    show_detail_preview()
 
 
 # ==================================================
-# 📦 총합산 파일 (여러 파일 업로드 시) - 3시트 구조
-# 1) 일자별집계  2) 총합  3) BJ별 상세(각 BJ 1시트)
+# 📆 기간 정산 (저장된 일자별 롤업 병합 — 원본 재처리 없음)
+# 롤업 파일 서명(이름/수정 시각/크기)이 같으면 공용 캐시 재사용, 엑셀은 다운로드 클릭 시에만
 # ==================================================
-def make_total_excel(df: pd.DataFrame) -> BytesIO | None:
-    wb = Workbook()
-    wb.remove(wb.active)
-
-    tmp = df.copy()
+def load_period(start, end):
+    period_rollup = load_rollups(start, end)
+    return period_rollup, (bj_totals(period_rollup) if not period_rollup.empty else None)
 
-    col_time = next((c for c in tmp.columns if "후원" in c and "시간" in c), None)
-    col_idnick = next((c for c in tmp.columns if "후원" in c and "아이디" in c), None)
-    col_heart = next((c for c in tmp.columns if "후원" in c and "하트" in c), None)
-    col_bj = next((c for c in tmp.columns if "참여" in c and "BJ" in c), None)
 
-    if not all([col_time, col_idnick, col_heart, col_bj]):
-        return None
-
-    tmp[col_time] = (
-        tmp[col_time]
-        .astype(str)
-        .str.replace(r"[./]", "-", regex=True)
-        .str.replace("T", " ")
-        .str.strip()
+def period_excel(period_key, period_rollup, period_totals) -> BytesIO:
+    period_views = shared_cache.get_or_create(
+        ("기간후원자", period_key),
+        lambda: process_rollup(period_rollup),
+        authorized=cache_authorized,
     )
+    return make_period_excel(daily_totals(period_rollup), period_totals, period_views)
+
+
+stored_dates = available_dates()
+if stored_dates:
+    with st.expander("📆 기간 정산 (월별/사용자 지정 기간)"):
+        last_date = stored_dates[-1]
+        default_start = max(stored_dates[0], last_date.replace(day=1))
+        period = st.date_input(
+            "정산일자 범위",
+            value=(default_start, last_date),
+            min_value=stored_dates[0],
+            max_value=last_date,
+        )
+        if isinstance(period, (tuple, list)) and len(period) == 2:
+            period_start, period_end = period
+            period_key = rollup_signature(period_start, period_end)
+            period_rollup, period_totals = shared_cache.get_or_create(
+                ("기간", period_key),
+                lambda: load_period(period_start, period_end),
+                authorized=cache_authorized,
+            )
+            if period_rollup.empty:
+                st.info("선택한 기간에 저장된 롤업이 없습니다.")
+            else:
+                st.caption(
+                    f"{period_start} ~ {period_end} · 저장된 정산일자 "
+                    f"{period_rollup['정산일자'].nunique()}일"
+                )
+                st.dataframe(period_totals, hide_index=True, use_container_width=True, column_config=NUMBER_FORMAT)
+                st.download_button(
+                    label="기간정산.xlsx 다운로드",
+                    # 클릭했을 때만 생성
+                    data=lambda key=period_key, rollup=period_rollup, totals=period_totals: (
+                        period_excel(key, rollup, totals)
+                    ),
+                    file_name=f"{period_start:%m.%d}-{period_end:%m.%d}_기간정산.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
 
-    tmp[col_time] = pd.to_datetime(
-        tmp[col_time],
-        errors="coerce",
-        format="mixed"
+# ==================================================
+# 🧾 회계 시스템용 평면 파일 (CSV / Parquet) — 엑셀 생성 없이 바로 내보내기
+# ==================================================
+with st.expander("🧾 회계 시스템용 내보내기 (CSV / Parquet)"):
+    export_formats = ["csv", "parquet"] if PARQUET_AVAILABLE else ["csv"]
+    export_format = st.radio(
+        "형식",
+        export_formats,
+        format_func=lambda x: {"csv": "CSV (UTF-8 BOM)", "parquet": "Parquet"}[x],
+        horizontal=True,
     )
-
-    tmp["날짜"] = tmp[col_time].dt.date
-    tmp["시간"] = tmp[col_time].dt.time
-
-    tmp[col_heart] = pd.to_numeric(tmp[col_heart], errors="coerce").fillna(0)
-    tmp.loc[tmp[col_heart] < 0, col_heart] = 0
-    tmp["날짜"] = tmp[col_time].dt.date
-    tmp["시간"] = tmp[col_time].dt.time
-    tmp[col_heart] = pd.to_numeric(tmp[col_heart], errors="coerce").fillna(0)
-    tmp.loc[tmp[col_heart] < 0, col_heart] = 0
-
-    tmp[["아이디", "닉네임"]] = tmp[col_idnick].apply(lambda x: pd.Series(split_id_nickname(x)))
-    tmp["구분"] = tmp["아이디"].apply(classify_heart_type)
-
-    # 1) 일자별집계
-    ws1 = wb.create_sheet("일자별집계")
-    ws1.append(["날짜", "BJ", "일반", "제휴", "총합"])
-    format_header_row(ws1, 1)
-
-    s1 = (
-        tmp.groupby(["날짜", col_bj, "구분"])[col_heart]
-        .sum()
-        .unstack(fill_value=0)
-        .reset_index()
+    export_layout = st.radio(
+        "구성",
+        ["per_bj", "dataset"],
+        format_func=lambda x: {"per_bj": "BJ별 파일", "dataset": "단일 데이터셋"}[x],
+        horizontal=True,
     )
-    if "일반" not in s1.columns: s1["일반"] = 0
-    if "제휴" not in s1.columns: s1["제휴"] = 0
-    s1["총합"] = s1["일반"] + s1["제휴"]
-
-    for _, r in s1.iterrows():
-        row = ws1.max_row + 1
-        ws1.cell(row=row, column=1, value=r["날짜"])
-        ws1.cell(row=row, column=2, value=r[col_bj])
-
-        c1 = ws1.cell(row=row, column=3, value=int(r["일반"]))
-        c2 = ws1.cell(row=row, column=4, value=int(r["제휴"]))
-        c3 = ws1.cell(row=row, column=5, value=int(r["총합"]))
-        for c in (c1, c2, c3):
-            c.number_format = "#,##0"
-
-    ws1.column_dimensions["A"].width = 20
-    ws1.column_dimensions["B"].width = 28
-    ws1.column_dimensions["C"].width = 16
-    ws1.column_dimensions["D"].width = 16
-    ws1.column_dimensions["E"].width = 16
-    auto_width(ws1, min_w=18, max_w=45, pad=4)
-    apply_border(ws1)
-
-    # 2) 총합
-    ws2 = wb.create_sheet("총합")
-    ws2.append(["BJ", "일반", "제휴", "총합"])
-    format_header_row(ws2, 1)
-
-    s2 = (
-        tmp.groupby([col_bj, "구분"])[col_heart]
-        .sum()
-        .unstack(fill_value=0)
-        .reset_index()
+    export_name = f"{prefix}_회계내보내기_{export_format}.zip" if prefix else f"회계내보내기_{export_format}.zip"
+    st.download_button(
+        label=f"{export_name} 다운로드",
+        # 클릭했을 때만 생성
+        data=lambda result=result, canonical=canonical, fmt=export_format, layout=export_layout: (
+            bulk_export_zip(result, canonical, fmt, layout)
+        ),
+        file_name=export_name,
+        mime="application/zip"
     )
-    if "일반" not in s2.columns: s2["일반"] = 0
-    if "제휴" not in s2.columns: s2["제휴"] = 0
-    s2["총합"] = s2["일반"] + s2["제휴"]
-
-    for _, r in s2.iterrows():
-        row = ws2.max_row + 1
-        ws2.cell(row=row, column=1, value=r[col_bj])
-
-        c1 = ws2.cell(row=row, column=2, value=int(r["일반"]))
-        c2 = ws2.cell(row=row, column=3, value=int(r["제휴"]))
-        c3 = ws2.cell(row=row, column=4, value=int(r["총합"]))
-        for c in (c1, c2, c3):
-            c.number_format = "#,##0"
-
-    ws2.column_dimensions["A"].width = 28
-    ws2.column_dimensions["B"].width = 16
-    ws2.column_dimensions["C"].width = 16
-    ws2.column_dimensions["D"].width = 16
-    auto_width(ws2, min_w=18, max_w=45, pad=4)
-    apply_border(ws2)
-
-    # 3) BJ별 상세 (각 BJ 1시트)
-    for bj in tmp[col_bj].dropna().unique():
-        ws = wb.create_sheet(str(bj))
-        sub = tmp[tmp[col_bj] == bj].copy()
-
-        normal_sum = int(sub[sub["구분"] == "일반"][col_heart].sum())
-        partner_sum = int(sub[sub["구분"] == "제휴"][col_heart].sum())
-        total_sum = normal_sum + partner_sum
-
-        # 상단 한 줄 표시(일렬)
-        ws["A1"] = "총하트"
-        ws["B1"] = total_sum
-        ws["C1"] = "일반하트"
-        ws["D1"] = normal_sum
-        ws["E1"] = "제휴하트"
-        ws["F1"] = partner_sum
-        ws["B1"].number_format = "#,##0"
-        ws["D1"].number_format = "#,##0"
-        ws["F1"].number_format = "#,##0"
-
-        ws.append([])
-        ws.append(["날짜", "시간", "아이디", "닉네임", "하트", "구분"])
-        format_header_row(ws, header_row=3)
-
-        # 정렬(원하면 여기서 날짜/시간 정렬)
-        sub = sub.sort_values(by=[col_time], ascending=True)
-
-        for _, r in sub.iterrows():
-            row = ws.max_row + 1
-            ws.cell(row=row, column=1, value=r["날짜"])
-            ws.cell(row=row, column=2, value=r["시간"])
-            ws.cell(row=row, column=3, value=r["아이디"])
-            ws.cell(row=row, column=4, value=r["닉네임"])
-
-            h = int(r[col_heart])
-            hc = ws.cell(row=row, column=5, value=h)
-            hc.number_format = "#,##0"
-
-            ws.cell(row=row, column=6, value=r["구분"])
-
-        ws.column_dimensions["A"].width = 20
-        ws.column_dimensions["B"].width = 18
-        ws.column_dimensions["C"].width = 32
-        ws.column_dimensions["D"].width = 26
-        ws.column_dimensions["E"].width = 14
-        ws.column_dimensions["F"].width = 12
-        auto_width(ws, min_w=18, max_w=45, pad=4)
-        apply_border(ws)
-
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-    return bio
-
-
-def _as_time_fraction(value) -> float:
-    if pd.isna(value):
-        return 1
-    if hasattr(value, "hour"):
-        return (value.hour * 3600 + value.minute * 60 + value.second) / 86400
-    try:
-        parsed = pd.to_datetime(str(value), errors="coerce")
-    except Exception:
-        return 1
-    if pd.isna(parsed):
-        return 1
-    return (parsed.hour * 3600 + parsed.minute * 60 + parsed.second) / 86400
 
 
-def _business_date(date_value, time_value):
-    parsed = pd.to_datetime(date_value, errors="coerce")
-    if pd.isna(parsed):
-        return None
-    business_dt = parsed
-    if _as_time_fraction(time_value) < 0.625:
-        business_dt = business_dt - pd.Timedelta(days=1)
-    return business_dt.date()
-
-
-def _save_workbook_with_cached_values(wb: Workbook, cached_values: dict[str, int | float]) -> BytesIO:
-    base = BytesIO()
-    wb.save(base)
-    base.seek(0)
-
-    patched = BytesIO()
-    with zipfile.ZipFile(base, "r") as zin, zipfile.ZipFile(patched, "w", zipfile.ZIP_DEFLATED) as zout:
-        for item in zin.infolist():
-            data = zin.read(item.filename)
-            if item.filename == "xl/worksheets/sheet1.xml":
-                xml = data.decode("utf-8")
-                for cell_ref, value in cached_values.items():
-                    if value is None:
-                        continue
-                    value_text = str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
-                    pattern = rf'(<c\b[^>]*\br="{re.escape(cell_ref)}"[^>]*>)(.*?)(</c>)'
-
-                    def repl(match):
-                        inner = match.group(2)
-                        if "<f" not in inner:
-                            return match.group(0)
-                        inner = re.sub(r"<v\b[^>]*/>", "", inner, flags=re.DOTALL)
-                        inner = re.sub(r"<v\b[^>]*>.*?</v>", "", inner, flags=re.DOTALL)
-                        inner = re.sub(r"(</f>)", rf"\1<v>{value_text}</v>", inner, count=1)
-                        return match.group(1) + inner + match.group(3)
-
-                    xml = re.sub(pattern, repl, xml, count=1, flags=re.DOTALL)
-                data = xml.encode("utf-8")
-            zout.writestr(item, data)
-
-    patched.seek(0)
-    return patched
-
-
-def make_standard_settlement_excel(
-    detail_df: pd.DataFrame,
-    bj_name: str,
-    all_round_labels: list[str] | None = None
-) -> BytesIO:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "정산시트"
-    log_ws = wb.create_sheet("후원내역")
-
-    try:
-        wb.calculation.fullCalcOnLoad = True
-        wb.calculation.forceFullCalc = True
-    except Exception:
-        pass
-
-    header_fill = PatternFill("solid", fgColor="666666")
-    yellow_fill = PatternFill("solid", fgColor="FFF2CC")
-    input_fill = PatternFill("solid", fgColor="D9EAD3")
-    title_fill = PatternFill("solid", fgColor="D9EAF7")
-    header_font = Font(name="맑은 고딕", bold=True, color="FFFFFF")
-    bold_font = Font(name="맑은 고딕", bold=True)
-    normal_font = Font(name="맑은 고딕", size=11)
-
-    def style_header(cell):
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    def style_input(cell):
-        cell.fill = input_fill
-        cell.font = bold_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    ws.merge_cells("A1:G2")
-    ws["A1"] = f"{bj_name} 정산표"
-    ws["A1"].font = Font(name="맑은 고딕", size=14, bold=True)
-    ws["A1"].fill = title_fill
-    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
-
-    ws["I3"] = "정산비율"
-    ws["J3"] = 0.45
-    ws["I4"] = "하트단가"
-    ws["J4"] = "=$J$3*100"
-    ws["I5"] = "협력지원율"
-    ws["J5"] = 0.05
-    for cell in ("I3", "I4", "I5"):
-        style_input(ws[cell])
-    for cell in ("J3", "J4", "J5"):
-        style_input(ws[cell])
-    ws["J3"].number_format = "0%"
-    ws["J4"].number_format = "#,##0"
-    ws["J5"].number_format = "0%"
-
-    sorted_detail = detail_df.copy() if detail_df is not None else pd.DataFrame()
-    if not sorted_detail.empty:
-        sorted_detail = sorted_detail.sort_values(by=["날짜", "시간"], ascending=True)
-    if "회차" in sorted_detail.columns and sorted_detail["회차"].notna().any():
-        sorted_detail["회차"] = sorted_detail["회차"].fillna("").astype(str)
-        round_names = all_round_labels or sorted(
-            [x for x in sorted_detail["회차"].dropna().unique() if x],
-            key=lambda x: int(re.search(r"\d+", str(x)).group()) if re.search(r"\d+", str(x)) else 9999
+# ==================================================
+# 💰 정산 요율 (BJ별) — 큐브의 BJ × 일반/제휴 합계로 즉시 재계산 (로그 재처리 없음)
+# 표준정산시트는 기본 요율로 한 번 생성, 요율을 바꾼 BJ 파일만 다운로드 시 다시 생성
+# ==================================================
+with st.expander("💰 정산 요율 (BJ별 정산비율 / 협력지원율)"):
+    col_settle_rate, col_support_rate = st.columns(2)
+    with col_settle_rate:
+        base_settle_rate = st.number_input(
+            "기본 정산비율 (%)", min_value=0.0, max_value=100.0,
+            value=DEFAULT_RATES["정산비율"] * 100, step=0.5, key="base_settle_rate",
         )
-    else:
-        sorted_detail["정산일자"] = sorted_detail.apply(
-            lambda r: _business_date(r.get("날짜"), r.get("시간")),
-            axis=1
-        ) if not sorted_detail.empty else []
-        round_dates = [
-            d for d in sorted(sorted_detail["정산일자"].dropna().unique())
-        ] if not sorted_detail.empty else []
-        round_map = {d: f"{idx}회차" for idx, d in enumerate(round_dates, start=1)}
-        if not sorted_detail.empty:
-            sorted_detail["회차"] = sorted_detail["정산일자"].map(round_map).fillna("")
-        round_names = [round_map[d] for d in round_dates]
-
-    heart_by_round = {}
-    normal_total = 0
-    partner_total = 0
-    if not sorted_detail.empty:
-        heart_by_round = (
-            sorted_detail.groupby("회차")["후원하트"]
-            .sum()
-            .to_dict()
+    with col_support_rate:
+        base_support_rate = st.number_input(
+            "기본 협력지원율 (%)", min_value=0.0, max_value=100.0,
+            value=DEFAULT_RATES["협력지원율"] * 100, step=0.5, key="base_support_rate",
         )
-        normal_total = int(sorted_detail.loc[sorted_detail["구분"] == "일반", "후원하트"].sum())
-        partner_total = int(sorted_detail.loc[sorted_detail["구분"] == "제휴", "후원하트"].sum())
-
-    cached_values = {"J4": 45}
-
-    headers = [" ", "수량", "정산금", "상/벌금", "헤메", "총 정산금", "비고"]
-    for col, value in enumerate(headers, start=1):
-        cell = ws.cell(row=3, column=col, value=value)
-        style_header(cell)
-    ws["C3"] = '=TEXT($J$3,"0%")&" 정산금"'
-
-    first_round_row = 4
-    round_count = max(len(round_names), 1)
-    for offset in range(round_count):
-        row = first_round_row + offset
-        round_name = round_names[offset] if round_names else "1회차"
-        round_heart = int(heart_by_round.get(round_name, 0))
-        round_amount = int(round_heart * 45)
-        ws.cell(row=row, column=1, value=round_name)
-        ws.cell(row=row, column=2, value=f'=SUMIF(\'후원내역\'!A:A,\'정산시트\'!A{row},\'후원내역\'!F:F)')
-        ws.cell(row=row, column=3, value=f"=B{row}*$J$3*100")
-        ws.cell(row=row, column=6, value=f"=C{row}+D{row}+E{row}")
-        cached_values[f"B{row}"] = round_heart
-        cached_values[f"C{row}"] = round_amount
-        cached_values[f"F{row}"] = round_amount
-        ws.cell(row=row, column=7, value="")
-        for col in range(1, 8):
-            cell = ws.cell(row=row, column=col)
-            cell.font = normal_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        for col in (2, 3, 4, 5, 6):
-            ws.cell(row=row, column=col).number_format = "#,##0"
-
-    total_row = first_round_row + round_count
-    ws.cell(row=total_row, column=1, value="합계")
-    ws.cell(row=total_row, column=2, value=f"=SUM(B{first_round_row}:B{total_row - 1})")
-    ws.cell(row=total_row, column=3, value=f"=SUM(C{first_round_row}:C{total_row - 1})")
-    ws.cell(row=total_row, column=4, value=f"=SUM(D{first_round_row}:D{total_row - 1})")
-    ws.cell(row=total_row, column=5, value=f"=SUM(E{first_round_row}:E{total_row - 1})")
-    ws.cell(row=total_row, column=6, value=f"=SUM(F{first_round_row}:F{total_row - 1})")
-    total_heart = int(sum(heart_by_round.get(round_name, 0) for round_name in round_names))
-    total_amount = int(total_heart * 45)
-    cached_values[f"B{total_row}"] = total_heart
-    cached_values[f"C{total_row}"] = total_amount
-    cached_values[f"D{total_row}"] = 0
-    cached_values[f"E{total_row}"] = 0
-    cached_values[f"F{total_row}"] = total_amount
-    for col in range(1, 8):
-        cell = ws.cell(row=total_row, column=col)
-        cell.font = bold_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    for col in (2, 3, 4, 5, 6):
-        ws.cell(row=total_row, column=col).number_format = "#,##0"
-
-    summary_header_row = total_row + 3
-    summary_headers = ["일자", "구분", "하트 개수", "공급가액", "세액", "합계", "비고"]
-    for col, value in enumerate(summary_headers, start=1):
-        cell = ws.cell(row=summary_header_row, column=col, value=value)
-        style_header(cell)
-
-    rows = [
-        ("일반하트", '=SUMIF(\'후원내역\'!G:G,"일반",\'후원내역\'!F:F)', "=C{row}*$J$3*100", "", ""),
-        ("협력지원금", "=C{normal_row}", "=C{row}*IF($J$5>1,$J$5/100,$J$5)*100", "", "J5 협력지원율 기준"),
-        ("제휴하트", '=SUMIF(\'후원내역\'!G:G,"제휴",\'후원내역\'!F:F)', "=C{row}*$J$3*100", "", ""),
-        ("헤메", "", "", "=D{row}*0.1", ""),
-        ("상/벌금", "", "", "=D{row}*0.1", "상벌금 합계"),
-    ]
-    normal_heart_row = summary_header_row + 1
-
-    for idx, (label, heart_formula, supply_formula, tax_formula, note) in enumerate(rows, start=1):
-        row = summary_header_row + idx
-        ws.cell(row=row, column=2, value=label)
-        ws.cell(row=row, column=2).fill = yellow_fill
-        ws.cell(row=row, column=2).alignment = Alignment(horizontal="center", vertical="center")
-        if heart_formula:
-            ws.cell(row=row, column=3, value=heart_formula.format(normal_row=normal_heart_row, row=row))
-        if supply_formula:
-            ws.cell(row=row, column=4, value=supply_formula.format(normal_row=normal_heart_row, row=row))
-        if tax_formula:
-            ws.cell(row=row, column=5, value=tax_formula.format(row=row))
-        else:
-            ws.cell(row=row, column=5, value=f"=D{row}*0.1")
-        ws.cell(row=row, column=6, value=f"=D{row}+E{row}")
-        ws.cell(row=row, column=7, value=note)
-        for col in range(3, 7):
-            ws.cell(row=row, column=col).number_format = "#,##0"
-        if label == "협력지원금":
-            ws.cell(row=row, column=3).number_format = "#,##0"
-        if label == "일반하트":
-            amount = int(normal_total * 45)
-            tax = int(amount * 0.1)
-            cached_values[f"C{row}"] = normal_total
-            cached_values[f"D{row}"] = amount
-            cached_values[f"E{row}"] = tax
-            cached_values[f"F{row}"] = amount + tax
-        elif label == "협력지원금":
-            amount = int(normal_total * 5)
-            tax = int(amount * 0.1)
-            cached_values[f"C{row}"] = normal_total
-            cached_values[f"D{row}"] = amount
-            cached_values[f"E{row}"] = tax
-            cached_values[f"F{row}"] = amount + tax
-        elif label == "제휴하트":
-            amount = int(partner_total * 45)
-            tax = int(amount * 0.1)
-            cached_values[f"C{row}"] = partner_total
-            cached_values[f"D{row}"] = amount
-            cached_values[f"E{row}"] = tax
-            cached_values[f"F{row}"] = amount + tax
-        else:
-            cached_values[f"E{row}"] = 0
-            cached_values[f"F{row}"] = 0
-
-    final_row = summary_header_row + len(rows) + 1
-    ws.cell(row=final_row, column=1, value="합계")
-    ws.cell(row=final_row, column=3, value=f"=C{summary_header_row + 1}+C{summary_header_row + 3}")
-    ws.cell(row=final_row, column=4, value=f"=SUM(D{summary_header_row + 1}:D{final_row - 1})")
-    ws.cell(row=final_row, column=5, value=f"=SUM(E{summary_header_row + 1}:E{final_row - 1})")
-    ws.cell(row=final_row, column=6, value=f"=SUM(F{summary_header_row + 1}:F{final_row - 1})")
-    support_amount = int(normal_total * 5)
-    final_heart = normal_total + partner_total
-    final_supply = int((normal_total * 45) + support_amount + (partner_total * 45))
-    final_tax = int(final_supply * 0.1)
-    cached_values[f"C{final_row}"] = final_heart
-    cached_values[f"D{final_row}"] = final_supply
-    cached_values[f"E{final_row}"] = final_tax
-    cached_values[f"F{final_row}"] = final_supply + final_tax
-    for col in range(1, 8):
-        cell = ws.cell(row=final_row, column=col)
-        cell.font = bold_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    for col in range(3, 7):
-        ws.cell(row=final_row, column=col).number_format = "#,##0"
-
-    for col, width in {
-        "A": 15, "B": 14, "C": 16, "D": 16, "E": 14, "F": 16, "G": 30,
-        "I": 14, "J": 12,
-    }.items():
-        ws.column_dimensions[col].width = width
-    for row in range(1, final_row + 1):
-        ws.row_dimensions[row].height = 22
-    apply_border(ws)
-
-    log_ws.append(["회차", "날짜", "시간", "아이디", "닉네임", "하트", "구분"])
-    for col in range(1, 8):
-        style_header(log_ws.cell(row=1, column=col))
-
-    for _, r in sorted_detail.iterrows():
-        row = log_ws.max_row + 1
-        log_ws.cell(row=row, column=1, value=r.get("회차", ""))
-        log_ws.cell(row=row, column=2, value=r.get("날짜"))
-        log_ws.cell(row=row, column=3, value=r.get("시간"))
-        log_ws.cell(row=row, column=4, value=r.get("아이디"))
-        log_ws.cell(row=row, column=5, value=r.get("닉네임"))
-        heart = pd.to_numeric(r.get("후원하트", 0), errors="coerce")
-        heart = 0 if pd.isna(heart) else int(max(heart, 0))
-        log_ws.cell(row=row, column=6, value=heart)
-        log_ws.cell(row=row, column=7, value=r.get("구분"))
-        log_ws.cell(row=row, column=6).number_format = "#,##0"
-
-    log_ws["B1"] = "날짜"
-    log_ws.freeze_panes = "A2"
-    for col, width in {
-        "A": 12, "B": 14, "C": 12, "D": 28, "E": 24, "F": 14, "G": 12,
-    }.items():
-        log_ws.column_dimensions[col].width = width
-    apply_border(log_ws)
-
-    return _save_workbook_with_cached_values(wb, cached_values)
-
-
-def safe_filename(name: str) -> str:
-    return re.sub(r'[\\/:*?"<>|]+', "_", str(name)).strip() or "download"
-
-
-def make_downloads_zip(files: list[tuple[str, BytesIO]]) -> BytesIO:
-    bio = BytesIO()
-    with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for filename, file_data in files:
-            file_data.seek(0)
-            zf.writestr(filename, file_data.read())
-            file_data.seek(0)
-    bio.seek(0)
-    return bio
+    st.caption("BJ별로 다르게 적용하려면 아래 표에서 수정하세요. 하트단가 = 정산비율 × 100")
+    rate_percent = st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=0.1, format="%.1f")
+    edited_rates = st.data_editor(
+        pd.DataFrame({
+            "참여BJ": list(result.keys()),
+            "정산비율(%)": base_settle_rate,
+            "협력지원율(%)": base_support_rate,
+        }),
+        hide_index=True,
+        use_container_width=True,
+        disabled=["참여BJ"],
+        column_config={"정산비율(%)": rate_percent, "협력지원율(%)": rate_percent},
+        key="bj_rates",
+    )
+    # 비워 둔 칸은 기본 요율, 범위 밖 값은 0~100% 로 잘라서 사용
+    settle_rates = pd.to_numeric(edited_rates["정산비율(%)"], errors="coerce").fillna(base_settle_rate).clip(0, 100)
+    support_rates = pd.to_numeric(edited_rates["협력지원율(%)"], errors="coerce").fillna(base_support_rate).clip(0, 100)
+    rates_by_bj = {
+        bj: normalize_rates({"정산비율": settle / 100, "협력지원율": support / 100})
+        for bj, settle, support in zip(edited_rates["참여BJ"], settle_rates, support_rates)
+    }
+    settlement = settlement_table(cube, rates_by_bj)
+    st.dataframe(
+        settlement,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            **NUMBER_FORMAT,
+            "정산비율": st.column_config.NumberColumn(format="percent"),
+            "협력지원율": st.column_config.NumberColumn(format="percent"),
+        },
+    )
+    st.caption(f"전체 합계 {int(settlement['합계'].sum()):,}원 (공급가액 + 세액)")
+
+# 기본 요율과 다른 BJ — 이 BJ 들의 표준정산시트만 다시 생성
+rate_changed = {bj: rates for bj, rates in rates_by_bj.items() if not is_default(rates)}
+
+
+def rate_adjusted_standard(bj, rates: dict) -> bytes:
+    # 요율을 바꾼 BJ 1명의 표준정산시트 (같은 파일 + 같은 요율이면 공용 캐시에서 재사용)
+    multi_upload = len(uploaded_files) > 1
+    return shared_cache.get_or_create(
+        ("요율", content_signature, bj, tuple(rates.items()), bounded_formula_ranges),
+        lambda: make_standard_settlement_excel(
+            result[bj]["전체로그"],
+            bj,
+            round_labels if multi_upload else None,
+            bounded_ranges=bounded_formula_ranges,
+            cube=cube,
+            rates=rates,
+        ).getvalue(),
+        authorized=cache_authorized,
+        sizeof=len,
+    )
+
+
+def rate_adjusted_zip(members, changed: dict) -> BytesIO:
+    # 표준정산시트 전체 ZIP — 요율을 바꾼 BJ 파일만 새로 만든 것으로 교체
+    replacements = {bj_filenames(bj, prefix)[2]: rate_adjusted_standard(bj, rates) for bj, rates in changed.items()}
+    buffer = BytesIO()
+    write_zip(buffer, members, replacements)
+    buffer.seek(0)
+    return buffer
 
 
 # ==================================================
@@ -926,124 +521,178 @@ def make_downloads_zip(files: list[tuple[str, BytesIO]]) -> BytesIO:
 # ==================================================
 st.success("집계 완료")
 
-settlement_files = []
-bj_files = []
-standard_settlement_files = []
+bounded_formula_ranges = st.checkbox(
+    "표준정산시트 수식을 후원내역 데이터 범위로 한정 (대용량 파일 빠른 열기/편집)",
+    value=True,
+    help="끄면 기존처럼 A:A 전체열 수식 + 열 때 전체 재계산으로 생성합니다."
+)
 
-# 여러 파일 업로드일 때만 총합산 제공(요구사항)
+# 총합산 분할 (여러 파일 업로드 시) — BJ 가 많으면 기본으로 100명씩 나눔
+total_shard_bjs, total_shard_rows = TOTAL_SHARD_BJS, TOTAL_SHARD_ROWS
 if len(uploaded_files) > 1:
-    total_file = make_total_excel(merged)
-    if total_file is None:
-        st.warning("총합산 생성 실패: 필수 컬럼(후원시간/후원아이디/후원하트/참여BJ)을 찾지 못했습니다.")
-    else:
-        st.download_button(
-            label="총합산.xlsx 다운로드",
-            data=total_file,
-            file_name="총합산.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    col_shard_bjs, col_shard_rows = st.columns(2)
+    with col_shard_bjs:
+        total_shard_bjs = st.number_input(
+            "총합산 파일당 최대 BJ 수 (0 = 나누지 않음)",
+            min_value=0,
+            value=TOTAL_SHARD_BJS or (100 if len(result) > 100 else 0),
+            step=10,
+        )
+    with col_shard_rows:
+        total_shard_rows = st.number_input(
+            "총합산 파일당 최대 로그 행 수 (0 = 제한 없음)",
+            min_value=0,
+            value=TOTAL_SHARD_ROWS,
+            step=100_000,
         )
 
-for bj, views in result.items():
-    safe_bj = safe_filename(bj)
 
-    filename1 = (
-        f"{prefix}_{safe_bj}_정산용.xlsx"
-        if prefix else
-        f"{safe_bj}_정산용.xlsx"
-    )
-
-    filename2 = (
-        f"{prefix}_{safe_bj}_BJ용.xlsx"
-        if prefix else
-        f"{safe_bj}_BJ용.xlsx"
-    )
+def release_job(job):
+    # 잡고 있는 세션이 없는 작업: 공용 캐시에서 빼고, 실행 중이면 멈춘 뒤 임시파일 정리
+    shared_cache.discard(job.key, authorized=True, expected=job)
+    job.cancel()
+    job.wait()
+    if job.result is not None:
+        job.result["store"].cleanup()
+
+
+def evict_job(job):
+    # 공용 캐시에서 밀려남: 다른 세션이 쓰는 중이면 마지막 세션이 놓을 때 정리
+    if job.retire_if_idle():
+        defer_cleanup(release_job, job)
+
+
+def job_size(job) -> int:
+    # 메모리 + 임시폴더로 내린 파일 (임시파일도 작업이 캐시에 남아 있는 동안 유지되므로 함께 셈)
+    if job.result is None:
+        return 0
+    store = job.result["store"]
+    return store.in_memory + store.on_disk
+
+
+# 업로드 내용 + 옵션별로 생성 작업 1개 (세션 간 공유)
+# rerun 되거나 다른 운영자가 같은 파일을 올려도 같은 작업이면 다시 시작하지 않음
+# 세션마다 JobLease 로 잡고, 마지막 세션이 놓을 때만 멈추고 정리
+job_key = ("생성", content_signature, prefix, bounded_formula_ranges, total_shard_bjs, total_shard_rows)
+lease = st.session_state.get("generation_lease")
+if lease is not None and lease.job.key != job_key:
+    # 새 업로드 / 옵션 변경: 이전 작업을 놓음
+    st.session_state.pop("generation_lease").release()
+    lease = None
+
+if st.session_state.get("generation_cancelled") == job_key:
+    # 이 세션만 빠진 상태 (같은 작업을 보는 다른 세션은 계속 진행)
+    st.info("파일 생성이 취소되었습니다.")
+    if st.button("다시 생성"):
+        st.session_state.pop("generation_cancelled", None)
+        st.rerun()
+    st.stop()
 
-    filename3 = (
-        f"{prefix}_{safe_bj}_표준정산시트.xlsx"
-        if prefix else
-        f"{safe_bj}_표준정산시트.xlsx"
+while lease is None:
+    job = shared_cache.get_or_create(
+        job_key,
+        lambda: GenerationJob(
+            job_key,
+            generate_artifacts,
+            header,
+            result,
+            len(uploaded_files) > 1,
+            round_labels,
+            bounded_formula_ranges,
+            prefix,
+            cube,
+            total_shard_bjs,
+            total_shard_rows,
+        ).start(),
+        authorized=cache_authorized,
+        sizeof=job_size,
+        on_evict=evict_job,
     )
+    lease = JobLease(job, release_job)
+    if not lease.attached:
+        # 마지막 세션이 막 놓아 정리 중인 작업 → 캐시에서 빼고 새로 시작
+        shared_cache.discard(job_key, authorized=cache_authorized, expected=job)
+        lease = None
+st.session_state["generation_lease"] = lease
+job = lease.job
+
+
+@st.fragment(run_every=1.0 if job.running else None)
+def show_generation_progress():
+    job = st.session_state["generation_lease"].job
+    if not job.running:
+        # 완료되면 전체 화면을 한 번 다시 그려 다운로드 버튼 표시
+        st.rerun()
+    st.progress(job.progress, text=f"{job.stage} · BJ {job.done}/{job.total}")
+    if st.button("생성 취소"):
+        # 이 세션만 놓음 — 작업은 잡고 있는 세션이 하나도 없을 때만 실제로 멈춤
+        st.session_state.pop("generation_lease").release()
+        st.session_state["generation_cancelled"] = job.key
+        st.rerun()
+
+
+if job.running:
+    show_generation_progress()
+    st.stop()
 
-    settlement_files.append((
-        filename1,
-        make_excel(
-            views["정산용"],
-            bj,
-            views.get("전체로그")
-        )
-    ))
+# 크기는 넣을 때 한 번만 재므로, 끝난 작업은 결과 크기로 다시 잼 (작업 항목 하나만)
+shared_cache.resize(job_key, authorized=cache_authorized)
 
-    standard_settlement_files.append((
-        filename3,
-        make_standard_settlement_excel(
-            views.get("전체로그"),
-            bj,
-            round_labels if len(uploaded_files) > 1 else None
-        )
-    ))
+if job.error is not None:
+    st.error(f"파일 생성 중 오류: {job.error}")
+    st.stop()
 
-    bj_files.append((
-        filename2,
-        make_excel(
-            views["BJ용"],
-            bj,
-            views.get("전체로그")
-        )
-    ))
+generated = job.result
+for message in generated["warnings"]:
+    st.warning(message)
 
-if settlement_files:
-    zip_name = f"{prefix}_정산용_전체다운로드.zip" if prefix else "정산용_전체다운로드.zip"
+if generated.get("총합산_zip") is not None:
+    # 분할된 총합산: 요약 파일 링크가 동작하도록 한 폴더에 풀리는 ZIP
     st.download_button(
-        label="정산용 전체 ZIP 다운로드",
-        data=make_downloads_zip(settlement_files),
-        file_name=zip_name,
+        label=f"총합산 전체 ZIP 다운로드 (요약 + 분할 {len(generated['총합산_분할'])}개)",
+        data=generated["총합산_zip"].download_data(),
+        file_name=generated["총합산_zip"].name,
         mime="application/zip"
     )
-
-if bj_files:
-    zip_name = f"{prefix}_BJ용_전체다운로드.zip" if prefix else "BJ용_전체다운로드.zip"
+elif generated["총합산"] is not None:
     st.download_button(
-        label="BJ용 전체 ZIP 다운로드",
-        data=make_downloads_zip(bj_files),
-        file_name=zip_name,
-        mime="application/zip"
+        label="총합산.xlsx 다운로드",
+        data=generated["총합산"].download_data(),
+        file_name="총합산.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
-if standard_settlement_files:
-    zip_name = f"{prefix}_표준정산시트_전체다운로드.zip" if prefix else "표준정산시트_전체다운로드.zip"
-    st.download_button(
-        label="표준정산시트 전체 ZIP 다운로드",
-        data=make_downloads_zip(standard_settlement_files),
-        file_name=zip_name,
-        mime="application/zip"
-    )
+for kind in ("정산용", "BJ용", "표준정산시트"):
+    if f"{kind}_zip" in generated:
+        zip_file = generated[f"{kind}_zip"]
+        zip_label = f"{kind} 전체 ZIP 다운로드"
+        zip_data = zip_file.download_data()
+        if kind == "표준정산시트" and rate_changed:
+            zip_label += f" (요율 변경 {len(rate_changed)}명 반영)"
+            # 클릭했을 때만 묶음
+            zip_data = lambda members=generated[kind], changed=rate_changed: rate_adjusted_zip(members, changed)
+        st.download_button(
+            label=zip_label,
+            data=zip_data,
+            file_name=zip_file.name,
+            mime="application/zip"
+        )
+
+store = generated["store"]
 
 # BJ별 파일 제공 (파일 1개일 때만 prefix 붙임)
 for bj, views in result.items():
 
     st.subheader(bj)
 
-    filename1 = (
-        f"{prefix}_{safe_filename(bj)}_정산용.xlsx"
-        if prefix else
-        f"{safe_filename(bj)}_정산용.xlsx"
-    )
-
-    filename2 = (
-        f"{prefix}_{safe_filename(bj)}_BJ용.xlsx"
-        if prefix else
-        f"{safe_filename(bj)}_BJ용.xlsx"
-    )
-
-    filename3 = (
-        f"{prefix}_{safe_filename(bj)}_표준정산시트.xlsx"
-        if prefix else
-        f"{safe_filename(bj)}_표준정산시트.xlsx"
-    )
+    filename1, filename2, filename3 = bj_filenames(bj, prefix)
 
-    file1 = next(data for name, data in settlement_files if name == filename1)
-    file2 = next(data for name, data in bj_files if name == filename2)
-    file3 = next(data for name, data in standard_settlement_files if name == filename3)
+    file1 = store.get(filename1).download_data()
+    file2 = store.get(filename2).download_data()
+    file3 = store.get(filename3).download_data()
+    if bj in rate_changed:
+        # 요율을 바꾼 BJ: 클릭했을 때 그 요율로 다시 생성
+        file3 = lambda bj=bj, rates=rate_changed[bj]: rate_adjusted_standard(bj, rates)
 
     st.download_button(
         label=f"{filename1} 다운로드",
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import weakref
+import zipfile
+from io import BytesIO
+
+
+# 메모리에 들고 있을 생성 파일 총량 (MB, 환경변수로 변경 가능) — 넘치면 임시폴더로 내림
+MEMORY_BUDGET_MB = float(os.environ.get("BJ_MEMORY_BUDGET_MB", "256"))
+
+
+class Artifact:
+    # 생성된 파일 1개: 메모리(BytesIO) 또는 임시폴더 파일 중 하나에 보관
+
+    def __init__(self, name: str, size: int, buffer: BytesIO | None = None, path: str | None = None):
+        self.name = name
+        self.size = size
+        self.buffer = buffer
+        self.path = path
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def open(self):
+        # 읽을 때마다 독립된 핸들 (여러 세션이 같은 파일을 동시에 압축/다운로드해도 위치가 섞이지 않음)
+        if self.buffer is not None:
+            return BytesIO(self.buffer.getvalue())
+        return open(self.path, "rb")
+
+    def download_data(self):
+        # st.download_button 용: 메모리는 bytes 로, 디스크는 클릭 시점에 파일에서 읽음
+        if self.buffer is not None:
+            return self.buffer.getvalue()
+        return self.read_bytes
+
+    def read_bytes(self) -> bytes:
+        # 읽고 바로 닫음 (열린 핸들을 넘기면 다운로드 쪽에서 닫지 않아 핸들이 쌓임)
+        with self.open() as f:
+            return f.read()
+
+
+def write_zip(target, members: list[Artifact], replacements: dict[str, bytes] | None = None):
+    # members 순서대로 압축, replacements 에 이름이 있으면 그 내용으로 대신 넣음
+    # (요율을 바꾼 BJ 의 표준정산시트처럼 묶음 중 일부만 다시 만든 경우)
+    replacements = replacements or {}
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for member in members:
+            if member.name in replacements:
+                zf.writestr(member.name, replacements[member.name])
+                continue
+            with member.open() as src, zf.open(member.name, "w") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+class ArtifactStore:
+    # 세션 단위 생성 파일 보관소
+    # 메모리 예산 초과분은 임시폴더에 저장, 보관소가 사라지면(세션 종료/새 업로드) 폴더 삭제
+
+    def __init__(self, budget_mb: float = MEMORY_BUDGET_MB):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.in_memory = 0
+        self.artifacts: dict[str, Artifact] = {}
+        self.spill_dir = tempfile.mkdtemp(prefix="bj-settlement-")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir, ignore_errors=True)
+
+    def _spill_path(self, name: str) -> str:
+        return os.path.join(self.spill_dir, f"{len(self.artifacts):05d}_{name}")
+
+    def add(self, name: str, data: BytesIO) -> Artifact:
+        size = data.getbuffer().nbytes
+        if self.in_memory + size <= self.budget:
+            data.seek(0)
+            artifact = Artifact(name, size, buffer=data)
+            self.in_memory += size
+        else:
+            path = self._spill_path(name)
+            with open(path, "wb") as fp:
+                fp.write(data.getbuffer())
+            artifact = Artifact(name, size, path=path)
+        self.artifacts[name] = artifact
+        return artifact
+
+    def add_zip(self, name: str, members: list[Artifact]) -> Artifact:
+        # 압축 대상이 예산에 안 들어가면 ZIP 을 처음부터 디스크에 씀 (멤버도 파일에서 스트리밍)
+        expected = sum(m.size for m in members)
+        if self.in_memory + expected <= self.budget:
+            target = BytesIO()
+        else:
+            target = open(self._spill_path(name), "wb")
+
+        write_zip(target, members)
+
+        if isinstance(target, BytesIO):
+            return self.add(name, target)
+
+        target.close()
+        artifact = Artifact(name, os.path.getsize(target.name), path=target.name)
+        self.artifacts[name] = artifact
+        return artifact
+
+    @property
+    def on_disk(self) -> int:
+        return sum(a.size for a in self.artifacts.values() if a.spilled)
+
+    def get(self, name: str) -> Artifact:
+        return self.artifacts[name]
+
+    def cleanup(self):
+        self.artifacts.clear()
+        self.in_memory = 0
+        self._finalizer()
@@ -0,0 +1,124 @@
+# 배치 실행 (스트림릿 없이)
+#   python batch.py export 10.01.csv 10.02.csv --out 내보내기 --format csv --layout per_bj
+#   python batch.py watch 스풀폴더 --out 정산결과 --workers 2 --interval 30
+#   python batch.py donor 10.*.csv --query user123 [--detail]
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from exports import EXPORT_FORMATS, EXPORT_LAYOUTS, write_bulk
+from ingest import assign_rounds, read_upload
+from processor import clean_and_prepare, process_prepared
+from donor_index import DONOR_SEARCH_LIMIT, DonorIndex
+from spool import SPOOL_POLL_SECONDS, SPOOL_WORKERS, SpoolService
+
+
+def load_exports(paths: list[str]):
+    # 업로드 화면과 같은 순서: 파일 읽기 → 회차 배정 → 합치기 → 표준화 → BJ별 집계
+    file_entries = []
+    for idx, path in enumerate(paths, start=1):
+        with open(path, "rb") as f:
+            df, business_date = read_upload(f, Path(path).name)
+        file_entries.append((idx, df, business_date))
+
+    dfs, round_labels = assign_rounds(file_entries, len(paths))
+    merged = pd.concat(dfs, ignore_index=True)
+    canonical = clean_and_prepare(merged)
+    if canonical is None or canonical.empty:
+        return merged, None, None, round_labels
+    return merged, canonical, process_prepared(canonical), round_labels
+
+
+def cmd_export(args):
+    start = time.perf_counter()
+    _, canonical, result, _ = load_exports(args.files)
+    if not result:
+        print("집계 결과가 없습니다.", file=sys.stderr)
+        return 1
+
+    written = write_bulk(result, canonical, args.out, args.format, args.layout)
+    elapsed = time.perf_counter() - start
+    print(f"BJ {len(result)}명 · 로그 {len(canonical):,}행 → {len(written)}개 ({args.out}) {elapsed:.1f}s")
+    return 0
+
+
+def cmd_donor(args):
+    _, canonical, result, _ = load_exports(args.files)
+    if not result:
+        print("집계 결과가 없습니다.", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    index = DonorIndex(canonical)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = index.search(args.query, limit=args.limit)
+    searched = (time.perf_counter() - start) * 1000
+    print(f"후원자 {len(index):,}명 색인 {built:.2f}s · 검색 {searched:.1f}ms · {len(found)}명 일치")
+    if found.empty:
+        return 0
+    print(found.to_string(index=False))
+
+    if args.detail:
+        for donor_id in found["아이디"]:
+            print(f"\n[{donor_id}] BJ별")
+            print(index.by_bj(donor_id).to_string(index=False))
+            print(f"[{donor_id}] BJ × 회차 / 정산일자별")
+            print(index.breakdown(donor_id).to_string(index=False))
+    return 0
+
+
+def cmd_watch(args):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [스풀] %(message)s")
+    service = SpoolService(args.spool, args.out, workers=args.workers)
+    if args.once:
+        try:
+            service.run_once()
+        finally:
+            service.close()
+        return 0
+
+    try:
+        service.serve_forever(args.interval)
+    except KeyboardInterrupt:
+        service.stop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BJ 하트 집계 배치")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="회계 시스템용 CSV / Parquet 내보내기")
+    p_export.add_argument("files", nargs="+", help="플랫폼 내보내기 CSV / XLSX")
+    p_export.add_argument("--out", default="내보내기", help="출력 폴더")
+    p_export.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    p_export.add_argument("--layout", choices=list(EXPORT_LAYOUTS), default="per_bj")
+    p_export.set_defaults(func=cmd_export)
+
+    p_donor = sub.add_parser("donor", help="후원자 검색 (아이디/닉네임 앞부분)")
+    p_donor.add_argument("files", nargs="+", help="플랫폼 내보내기 CSV / XLSX")
+    p_donor.add_argument("--query", required=True, help="아이디 또는 닉네임 앞부분")
+    p_donor.add_argument("--limit", type=int, default=DONOR_SEARCH_LIMIT, help="최대 결과 수")
+    p_donor.add_argument("--detail", action="store_true", help="BJ별 / 회차별 합계까지 출력")
+    p_donor.set_defaults(func=cmd_donor)
+
+    p_watch = sub.add_parser("watch", help="스풀 폴더 감시 → 정산월별 파일 미리 생성")
+    p_watch.add_argument("spool", help="플랫폼 내보내기가 떨어지는 폴더")
+    p_watch.add_argument("--out", default="정산결과", help="출력 폴더 (정산월별 하위 폴더)")
+    p_watch.add_argument("--workers", type=int, default=SPOOL_WORKERS, help="동시 작업 수")
+    p_watch.add_argument("--interval", type=float, default=SPOOL_POLL_SECONDS, help="감시 주기(초)")
+    p_watch.add_argument("--once", action="store_true", help="한 번만 처리하고 종료")
+    p_watch.set_defaults(func=cmd_watch)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
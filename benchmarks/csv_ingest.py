@@ -0,0 +1,57 @@
+# CSV 읽기 비교: 기존 pd.read_csv(f) vs ingest.read_csv_export
+#   python -m benchmarks.csv_ingest --rows 1000000
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import make_export
+from ingest import CSV_ENGINE, read_csv_export
+
+
+def timed(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--extra-columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_export(args.rows, extra_columns=args.extra_columns)
+    print(f"rows={args.rows:,} columns={len(df.columns)} engine={CSV_ENGINE}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoding in ("utf-8-sig", "cp949"):
+            path = Path(tmp) / f"export_{encoding}.csv"
+            df.to_csv(path, index=False, encoding=encoding)
+            size_mb = path.stat().st_size / 1024 / 1024
+
+            def baseline():
+                with open(path, "rb") as f:
+                    return pd.read_csv(f)
+
+            def sniffed():
+                with open(path, "rb") as f:
+                    return read_csv_export(f)
+
+            try:
+                base = f"{timed(baseline, args.repeat):7.2f}s"
+            except UnicodeDecodeError:
+                base = "  실패 (UnicodeDecodeError)"
+            fast = timed(sniffed, args.repeat)
+            print(f"{encoding:10s} {size_mb:7.1f}MB  기존 {base}  read_csv_export {fast:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
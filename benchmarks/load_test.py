@@ -0,0 +1,177 @@
+# 동시 접속 부하 테스트: 스트림릿 AppTest 로 app.py 를 N 세션 동시에 실행 (오프라인, 한 대)
+#   python -m benchmarks.load_test --sessions 8 --files 2 --rows 20000
+# 세션 1개 흐름: 비밀번호 입력 → 여러 파일 업로드 → 파일 생성 완료 대기 → 화면 다시 그리기 → 다운로드 클릭
+# 다운로드 클릭은 생성된 파일을 서버가 내보낼 때처럼 끝까지 읽는 것으로 대신함
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import make_export
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+PASSWORD = "load-test"
+STEPS = ["로그인", "업로드", "생성", "다시그리기", "다운로드"]
+
+
+def synthetic_uploads(files: int, rows: int, bjs: int, seed: int) -> list[tuple[str, bytes, str]]:
+    # 하루 1파일씩, 파일명 MM.DD.csv (업로드 회차 배정에 쓰임)
+    uploads = []
+    for idx in range(files):
+        day = f"2026-10-{idx + 1:02d}"
+        df = make_export(rows, bjs=bjs, day=day, seed=seed * 1000 + idx)
+        name = f"10.{idx + 1:02d}.csv"
+        uploads.append((name, df.to_csv(index=False).encode("utf-8-sig"), "text/csv"))
+    return uploads
+
+
+class MemorySampler:
+    # 테스트 중 프로세스 RSS 최대값 (/proc/self/status VmRSS)
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def rss_kb() -> int:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.rss_kb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_session(uploads, timeout: float, reruns: int, downloads: int, start_gate: threading.Barrier) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    timings = {step: [] for step in STEPS}
+    errors = []
+
+    def timed(step, fn):
+        start = time.perf_counter()
+        fn()
+        timings[step].append(time.perf_counter() - start)
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    at.secrets["APP_PASSWORD"] = PASSWORD
+    at.run()
+    start_gate.wait()
+
+    def login():
+        at.text_input(key="password").set_value(PASSWORD)
+        at.run()
+
+    def upload():
+        at.file_uploader[0].set_value(uploads)
+        at.run()
+
+    def generate():
+        job = at.session_state["generation_lease"].job
+        job.wait(timeout)
+        at.run()
+
+    timed("로그인", login)
+    timed("업로드", upload)
+    if "generation_lease" not in at.session_state:
+        errors.append("생성 작업이 시작되지 않음")
+    else:
+        timed("생성", generate)
+        for _ in range(reruns):
+            timed("다시그리기", at.run)
+
+        generated = at.session_state["generation_lease"].job.result
+        if generated is None:
+            errors.append(f"생성 실패: {at.session_state['generation_lease'].job.error}")
+        else:
+            artifacts = list(generated["store"].artifacts.values())
+            rng = np.random.default_rng()
+            for artifact in rng.choice(artifacts, size=min(downloads, len(artifacts)), replace=False):
+                def download(artifact=artifact):
+                    with artifact.open() as stream:
+                        while stream.read(1024 * 1024):
+                            pass
+                timed("다운로드", download)
+
+    errors.extend(str(e.value) for e in at.exception)
+    return {"timings": timings, "errors": errors}
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "-"
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return f"p50 {p50:6.2f}s  p90 {p90:6.2f}s  p99 {p99:6.2f}s  max {max(values):6.2f}s  (n={len(values)})"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=4, help="동시 세션 수")
+    parser.add_argument("--files", type=int, default=2, help="세션당 업로드 파일 수")
+    parser.add_argument("--rows", type=int, default=20000, help="파일당 행 수")
+    parser.add_argument("--bjs", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=3, help="생성 후 화면 다시 그리기 횟수")
+    parser.add_argument("--downloads", type=int, default=5, help="세션당 다운로드 클릭 수")
+    parser.add_argument("--same-files", action="store_true", help="모든 세션이 같은 파일 업로드 (공용 캐시 효과 확인)")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    # 부하 테스트가 실제 롤업 폴더를 건드리지 않게
+    rollup_dir = tempfile.mkdtemp(prefix="bj-load-test-rollups-")
+    os.environ["BJ_ROLLUP_DIR"] = rollup_dir
+
+    print(
+        f"세션 {args.sessions}개 · 세션당 {args.files}파일 × {args.rows:,}행 · BJ {args.bjs}명"
+        f"{' · 같은 파일' if args.same_files else ''}"
+    )
+    session_uploads = [
+        synthetic_uploads(args.files, args.rows, args.bjs, seed=0 if args.same_files else session)
+        for session in range(args.sessions)
+    ]
+
+    start_gate = threading.Barrier(args.sessions)
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    wall_start = time.perf_counter()
+    with MemorySampler() as memory, ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futures = [
+            pool.submit(run_session, uploads, args.timeout, args.reruns, args.downloads, start_gate)
+            for uploads in session_uploads
+        ]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - wall_start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    print(f"\n전체 {wall:.1f}s · CPU {cpu:.1f}s (평균 {cpu / wall:.2f}코어) · 최대 메모리 {memory.peak_kb / 1024:.0f}MB")
+    for step in STEPS:
+        values = [t for result in results for t in result["timings"][step]]
+        print(f"{step:6s} {percentiles(values)}")
+
+    errors = [e for result in results for e in result["errors"]]
+    if errors:
+        print(f"\n오류 {len(errors)}건:")
+        for error in errors[:10]:
+            print(f"  - {error}")
+
+
+if __name__ == "__main__":
+    main()
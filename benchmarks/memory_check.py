@@ -0,0 +1,89 @@
+# 메모리 회귀 확인: 업로드 → 표준화 → 집계(BJ별 결과 / 큐브 / 후원자 색인) 최대 RSS
+#   python -m benchmarks.memory_check --rows 1000000 --max-ratio 2.25
+# 1) 표준화: 파일 합치기 → 표준 로그 → 원본 합본 버림 → BJ별 결과 / 상세 로그 (app.py 와 같은 순서)
+#    읽기 직후 RSS 대비 최대 증가분이 표준 로그 1벌 크기의 max-ratio 배를 넘으면 실패(종료 코드 1)
+# 2) 집계 구조(큐브 / 후원자 색인) 증가분은 참고로만 출력
+import argparse
+import gc
+import sys
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.load_test import MemorySampler
+from benchmarks.synthetic import make_export
+from cube import HeartCube
+from donor_index import DonorIndex
+from ingest import assign_rounds, read_upload
+from processor import PARSE_WORKERS, clean_and_prepare, process_prepared
+
+
+def read_exports(rows: int, files: int) -> list:
+    entries = []
+    for idx in range(files):
+        day = f"2026-10-{idx + 1:02d}"
+        data = make_export(rows // files, day=day, seed=idx).to_csv(index=False).encode("utf-8-sig")
+        name = f"10.{idx + 1:02d}.csv"
+        df, business_date = read_upload(BytesIO(data), name)
+        entries.append((idx + 1, df, business_date))
+        del data
+    dfs, _ = assign_rounds(entries, len(entries))
+    return dfs
+
+
+def prepare(dfs: list, workers: int):
+    merged = pd.concat(dfs, ignore_index=True)
+    canonical = clean_and_prepare(merged, workers=workers)
+    del merged
+    result = process_prepared(canonical)
+    # BJ 상세 로그는 꺼낼 때 표준 로그에서 잘라 옴 — 한 번씩 꺼내 봐도 복사본이 쌓이지 않아야 함
+    for views in result.values():
+        views["전체로그"]
+    return canonical, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="전체 행 수 (파일 수로 나눔)")
+    parser.add_argument("--files", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS, help="표준화 프로세스 수 (1 = 이 프로세스에서)")
+    parser.add_argument("--max-ratio", type=float, default=2.25, help="표준화 단계 허용 최대 증가분 (표준 로그 크기 배수)")
+    args = parser.parse_args()
+
+    dfs = read_exports(args.rows, args.files)
+    # 처음 한 번만 드는 고정 비용(모듈 로드 / 메모리 풀 예약)은 작은 표본으로 미리 치름
+    prepare([df.head(1000) for df in dfs], args.workers)
+    gc.collect()
+
+    before_kb = MemorySampler.rss_kb()
+    start = time.perf_counter()
+    with MemorySampler(interval=0.005) as memory:
+        canonical, result = prepare(dfs, args.workers)
+    prepare_peak_kb = memory.peak_kb
+    prepared_kb = MemorySampler.rss_kb()
+    with MemorySampler(interval=0.005) as memory:
+        cube = HeartCube(canonical)
+        donor_index = DonorIndex(canonical)
+    elapsed = time.perf_counter() - start
+
+    canonical_mb = canonical.memory_usage(deep=True).sum() / 1024 / 1024
+    peak_mb = (prepare_peak_kb - before_kb) / 1024
+    prepared_mb = (prepared_kb - before_kb) / 1024
+    aggregate_mb = (memory.peak_kb - prepared_kb) / 1024
+    ratio = peak_mb / canonical_mb
+
+    print(f"rows={len(canonical):,} BJ={len(result)} cube={len(cube):,} donors={len(donor_index):,} ({elapsed:.1f}s)")
+    print(f"표준 로그 1벌     {canonical_mb:8.1f}MB")
+    print(f"표준화 최대 증가  {peak_mb:8.1f}MB  (×{ratio:.2f})")
+    print(f"표준화 후 유지    {prepared_mb:8.1f}MB  (×{prepared_mb / canonical_mb:.2f})")
+    print(f"큐브 / 색인 증가  {aggregate_mb:8.1f}MB  (×{aggregate_mb / canonical_mb:.2f})")
+
+    if ratio > args.max_ratio:
+        print(f"실패: 표준화 최대 증가분이 표준 로그의 {args.max_ratio}배를 넘음")
+        sys.exit(1)
+    print("통과")
+
+
+if __name__ == "__main__":
+    main()
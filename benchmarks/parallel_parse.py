@@ -0,0 +1,43 @@
+# 큰 파일 1개 정리(clean_and_prepare) — 프로세스 수별 시간 비교
+#   python -m benchmarks.parallel_parse --rows 2000000 --workers 1 2 4 8
+import argparse
+import time
+
+import pandas as pd
+
+import processor
+from benchmarks.synthetic import make_export
+from processor import clean_and_prepare
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    df = make_export(args.rows)
+    print(f"rows={args.rows:,}")
+    # 행 수 기준과 상관없이 지정한 프로세스 수로 비교
+    processor.PARSE_PARALLEL_ROWS = 0
+
+    baseline = None
+    for workers in args.workers:
+        if workers > 1:
+            # 프로세스 시작 시간은 빼고 측정 (서버에서는 풀을 재사용)
+            clean_and_prepare(df.head(workers), workers=workers)
+        start = time.perf_counter()
+        prepared = clean_and_prepare(df, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = (elapsed, prepared)
+            speedup = ""
+        else:
+            pd.testing.assert_frame_equal(prepared, baseline[1])
+            speedup = f"  ×{baseline[0] / elapsed:.2f}"
+        print(f"workers={workers:2d}  {elapsed:7.2f}s{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# 단순 표 시트 쓰기 비교: openpyxl 객체 모델 vs plainxlsx 직접 작성 (10만 행 시트)
+#   python -m benchmarks.plain_writer --rows 100000
+import argparse
+import time
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.synthetic import make_export
+from plainxlsx import PlainWorkbook
+from processor import clean_and_prepare, process_prepared
+from sheetparts import DETAIL_COLUMNS, DetailLogPart, append_columns
+from workbooks import apply_border, auto_width, format_header_row
+
+DONOR_SPEC = [("아이디", "text"), ("닉네임", "text"), ("후원하트", "heart")]
+DETAIL_HEADER = ["날짜", "시간", "아이디", "닉네임", "하트", "구분"]
+DETAIL_FORMATS = {1: "yyyy-mm-dd", 2: "h:mm:ss", 5: "#,##0"}
+
+
+def openpyxl_donors(donors: pd.DataFrame):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["후원아이디", "닉네임", "후원하트"])
+    format_header_row(ws)
+    append_columns(ws, donors, DONOR_SPEC, {3: "#,##0"})
+    auto_width(ws)
+    apply_border(ws)
+    return wb
+
+
+def openpyxl_detail(part: DetailLogPart):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(DETAIL_HEADER)
+    format_header_row(ws)
+    spec = [(column, "heart" if kind == "number" else "raw") for column, kind in DETAIL_COLUMNS]
+    append_columns(ws, part.frame, spec, DETAIL_FORMATS)
+    auto_width(ws)
+    apply_border(ws)
+    return wb
+
+
+def plain_donors(donors: pd.DataFrame):
+    wb = PlainWorkbook()
+    ws = wb.create_sheet("정산표")
+    ws.append(["후원아이디", "닉네임", "후원하트"], "header")
+    ws.append_columns(donors, DONOR_SPEC)
+    ws.auto_width()
+    return wb
+
+
+def plain_detail(part: DetailLogPart):
+    wb = PlainWorkbook(part.strings())
+    ws = wb.create_sheet("상세내역")
+    ws.append(DETAIL_HEADER, "header")
+    ws.append_part(part)
+    ws.auto_width()
+    return wb
+
+
+def timed(fn):
+    start = time.perf_counter()
+    data = fn()
+    return time.perf_counter() - start, data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="시트당 행 수")
+    parser.add_argument("--check", action="store_true", help="두 결과를 다시 읽어 셀 값 비교 (느림)")
+    args = parser.parse_args()
+
+    # 후원자 표: 아이디가 모두 다른 rows 명 / 상세 로그: 같은 아이디가 반복되는 rows 행
+    donors = pd.DataFrame({
+        "아이디": [f"user{i}@ka" for i in range(args.rows)],
+        "닉네임": [f"닉네임{i % 997}" for i in range(args.rows)],
+        "후원하트": (pd.RangeIndex(args.rows) * 7919 % 100_000).to_numpy(),
+    })
+    views = process_prepared(clean_and_prepare(make_export(args.rows, bjs=1, donors=args.rows // 5)))
+    part = DetailLogPart(next(iter(views.values()))["전체로그"])
+    print(f"후원자 표 {len(donors):,}행 / 상세 로그 {len(part):,}행")
+
+    def save(wb) -> BytesIO:
+        bio = BytesIO()
+        wb.save(bio)
+        bio.seek(0)
+        return bio
+
+    cases = (
+        # 상세 로그는 매번 새 조각으로 (렌더링 비용 포함 — 실제로는 정산용/BJ용 두 파일이 조각 1개를 같이 씀)
+        ("후원자 표", lambda: save(openpyxl_donors(donors)), lambda: plain_donors(donors).save()),
+        ("상세 로그", lambda: save(openpyxl_detail(part)), lambda: plain_detail(DetailLogPart(part.frame)).save()),
+    )
+    for label, baseline, direct in cases:
+        slow, old = timed(baseline)
+        fast, new = timed(direct)
+        print(
+            f"{label}: openpyxl {slow:7.2f}s ({len(old.getvalue()) / 1e6:5.1f}MB)  "
+            f"plainxlsx {fast:7.2f}s ({len(new.getvalue()) / 1e6:5.1f}MB)  ×{slow / fast:.1f}"
+        )
+
+        if args.check:
+            a = [list(r) for r in load_workbook(old, read_only=True).active.iter_rows(values_only=True)]
+            b = [list(r) for r in load_workbook(new, read_only=True).active.iter_rows(values_only=True)]
+            assert a == b, label
+            print("  셀 값 일치")
+
+
+if __name__ == "__main__":
+    main()
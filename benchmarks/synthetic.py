@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+
+def make_export(rows: int, bjs: int = 50, donors: int = 20000, day: str = "2026-10-01",
+                extra_columns: int = 0, seed: int = 0) -> pd.DataFrame:
+    # 플랫폼 내보내기와 같은 모양의 가짜 후원 로그 (하루치, 15시 시작)
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(day) + pd.Timedelta(hours=15)
+    times = start + pd.to_timedelta(rng.integers(0, 86400, rows), unit="s")
+
+    donor_no = rng.integers(0, donors, rows)
+    domain = np.where(donor_no % 7 == 0, "@sk", np.where(donor_no % 3 == 0, "@ka", ""))
+    idnick = (
+        pd.Series(donor_no).map("user{}".format)
+        + domain
+        + "(닉네임" + pd.Series(donor_no % 997).astype(str) + ")"
+    )
+
+    df = pd.DataFrame({
+        "후원시간": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "후원아이디(닉네임)": idnick,
+        "후원하트": rng.integers(1, 1000, rows),
+        "참여BJ": pd.Series(rng.integers(0, bjs, rows)).map("BJ{:03d}".format),
+    })
+    for i in range(extra_columns):
+        df[f"기타항목{i}"] = rng.integers(0, 1_000_000, rows)
+    return df
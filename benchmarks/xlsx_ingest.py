@@ -0,0 +1,62 @@
+# XLSX 읽기 비교: 기존 pd.read_excel vs ingest.read_xlsx_export (+ 같은 내용 CSV)
+#   python -m benchmarks.xlsx_ingest --rows 200000
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import make_export
+from ingest import XLSX_ENGINE, read_csv_export, read_xlsx_export
+from processor import is_schema_column
+
+
+def measured(fn):
+    # (걸린 시간, 파이썬 할당 최대치 MB)
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--extra-columns", type=int, default=12)
+    args = parser.parse_args()
+
+    df = make_export(args.rows, extra_columns=args.extra_columns)
+    df["후원시간"] = pd.to_datetime(df["후원시간"])
+    print(f"rows={args.rows:,} columns={len(df.columns)} engine={XLSX_ENGINE}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_path = Path(tmp) / "export.xlsx"
+        csv_path = Path(tmp) / "export.csv"
+        df.to_excel(xlsx_path, index=False)
+        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+
+        def baseline():
+            with open(xlsx_path, "rb") as f:
+                return pd.read_excel(f, usecols=is_schema_column)
+
+        def streamed():
+            with open(xlsx_path, "rb") as f:
+                return read_xlsx_export(f)
+
+        def csv():
+            with open(csv_path, "rb") as f:
+                return read_csv_export(f)
+
+        pd.testing.assert_frame_equal(streamed(), baseline())
+        for label, fn in (("read_excel", baseline), ("read_xlsx_export", streamed), ("CSV", csv)):
+            elapsed, peak = measured(fn)
+            print(f"{label:18s} {elapsed:7.2f}s  최대 할당 {peak:8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+# 집계 큐브 축: 달력 날짜(일자별집계) / 정산일자(15시 기준) / 업로드 회차 / 참여BJ / 일반·제휴
+CUBE_KEYS = ["날짜", "정산일자", "회차", "참여BJ", "구분"]
+HEART_TYPES = ["일반", "제휴"]
+
+
+def _factorize(values: pd.Series):
+    # 빈 값(NaN/None)도 하나의 값으로 취급 → BJ 합계 등에서 빠지지 않음
+    codes, levels = pd.factorize(values, sort=True, use_na_sentinel=False)
+    return codes.astype("int64"), levels
+
+
+# ==========================================
+# 🔹 (날짜 × 정산일자 × 회차 × BJ × 구분) 하트 집계 큐브
+# ==========================================
+class HeartCube:
+    # 표준 로그(clean_and_prepare 결과)를 한 번만 훑어 만든 셀별 하트 합계 / 건수
+    # 요약표, 총합산 일자별집계/총합/BJ 시트 상단 합계, 표준정산시트 회차별 수량/캐시값,
+    # 정산용·BJ용 상단 합계가 모두 여기서 잘라 씀 (원본 행 재집계 없음)
+    # 셀은 실제로 값이 있는 조합만 보관 (빈 조합까지 만드는 밀집 배열은 BJ×일자가 많으면 너무 큼)
+
+    def __init__(self, df: pd.DataFrame):
+        self.bj_order = list(pd.unique(df["참여BJ"].dropna()))
+
+        if df.empty:
+            self.cells = pd.DataFrame(columns=CUBE_KEYS + ["후원하트", "후원건수"])
+            self._by_bj = {}
+            return
+
+        # 축별 코드 → 셀 번호 하나로 합친 뒤 bincount 로 합산
+        codes, levels = zip(*(_factorize(df[key]) for key in CUBE_KEYS))
+        shape = tuple(max(len(level), 1) for level in levels)
+        flat = np.ravel_multi_index(codes, shape)
+        cell_ids, inverse = np.unique(flat, return_inverse=True)
+
+        hearts = np.asarray(df["후원하트"], dtype="float64")
+        sums = np.bincount(inverse, weights=hearts, minlength=len(cell_ids))
+        counts = np.bincount(inverse, minlength=len(cell_ids))
+
+        cell_codes = np.unravel_index(cell_ids, shape)
+        cells = {
+            key: level.take(code).to_numpy(dtype=object)
+            for key, level, code in zip(CUBE_KEYS, levels, cell_codes)
+        }
+        cells["후원하트"] = sums
+        cells["후원건수"] = counts.astype("int64")
+        self.cells = pd.DataFrame(cells)
+        self._by_bj = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def in_memory(self) -> int:
+        # 공용 캐시 크기 계산용 (shared_cache.estimate_size) — 셀 표 + BJ별로 나눈 사본
+        size = int(self.cells.memory_usage(deep=True).sum())
+        return size * 2 if self._by_bj else size
+
+    def for_bj(self, bj) -> pd.DataFrame:
+        # BJ 1명의 셀 (처음 부를 때 BJ별로 한 번에 나눠 둠)
+        if self._by_bj is None:
+            self._by_bj = dict(tuple(self.cells.groupby("참여BJ", sort=False)))
+        return self._by_bj.get(bj, self.cells.iloc[0:0])
+
+    # ---------- 자르기 ----------
+    @staticmethod
+    def _pivot(cells: pd.DataFrame, keys: list) -> pd.DataFrame:
+        # keys 별 일반 / 제휴 / 총합 (빈 키 행은 groupby 에서 빠짐 — 기존 집계와 같음)
+        pivot = (
+            cells.groupby(keys + ["구분"])["후원하트"]
+            .sum()
+            .unstack(fill_value=0)
+        )
+        for heart_type in HEART_TYPES:
+            if heart_type not in pivot.columns:
+                pivot[heart_type] = 0
+        pivot["총합"] = pivot["일반"] + pivot["제휴"]
+        pivot.columns.name = None
+        return pivot[HEART_TYPES + ["총합"]].astype("int64").reset_index()
+
+    def pivot(self, keys: list, bj=None) -> pd.DataFrame:
+        cells = self.cells if bj is None else self.for_bj(bj)
+        return self._pivot(cells, keys)
+
+    def sum_by(self, key: str, bj=None) -> dict:
+        # {key 값: 하트 합계} (빈 값 제외)
+        cells = self.cells if bj is None else self.for_bj(bj)
+        return cells.groupby(key)["후원하트"].sum().to_dict()
+
+    def type_totals(self, bj=None) -> tuple[int, int]:
+        # (일반, 제휴) 하트 합계
+        by_type = self.sum_by("구분", bj)
+        return int(by_type.get("일반", 0)), int(by_type.get("제휴", 0))
+
+    def total(self, bj=None) -> int:
+        cells = self.cells if bj is None else self.for_bj(bj)
+        return int(cells["후원하트"].sum())
+
+    def row_counts(self) -> dict:
+        # {BJ: 로그 행 수}
+        return self.cells.groupby("참여BJ", sort=False)["후원건수"].sum().to_dict()
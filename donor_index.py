@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+
+# 검색 결과 기본 개수
+DONOR_SEARCH_LIMIT = 50
+
+# 후원자별 집계 단위 (업로드 회차가 없으면 정산일자로 구분)
+DONOR_INDEX_KEYS = ["참여BJ", "회차", "정산일자"]
+
+_PREFIX_END = "\U0010ffff"
+
+
+def _search_key(values) -> np.ndarray:
+    return np.asarray(pd.Series(values, dtype=object).fillna("").astype(str).str.lower(), dtype=str)
+
+
+# ==========================================
+# 🔹 후원자 검색 색인 (업로드 시 1회 생성)
+# ==========================================
+class DonorIndex:
+    # 아이디 / 닉네임 → BJ·회차별 합계 + 표준 로그 행 위치
+    # - 검색: 정렬된 아이디/닉네임 배열에서 앞부분 일치(searchsorted) → DataFrame 다시 훑지 않음
+    # - 조회: 후원자별 구간이 연속되게 정렬해 둔 합계표 / 행 위치에서 잘라 반환
+
+    def __init__(self, df: pd.DataFrame):
+        # df: clean_and_prepare 결과(표준 로그)
+        codes, donors = pd.factorize(df["아이디"].fillna("").astype(str), sort=True)
+        self.donors = np.asarray(donors, dtype=object)
+
+        # 후원자별 로그 행 위치 (후원자 순 → 원래 행 순)
+        order = np.argsort(codes, kind="stable")
+        self.row_offsets = order
+        self.row_starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(donors)))])
+
+        # 후원자 × BJ × 회차 × 정산일자 합계 (후원자 코드 순)
+        keyed = df[DONOR_INDEX_KEYS + ["닉네임", "후원하트"]].assign(_donor=codes)
+        totals = (
+            keyed.groupby(["_donor"] + DONOR_INDEX_KEYS, dropna=False)["후원하트"]
+            .agg(후원하트="sum", 후원건수="count")
+            .reset_index()
+        )
+        self.totals = totals
+        self.total_starts = np.searchsorted(totals["_donor"].to_numpy(), np.arange(len(donors) + 1))
+
+        # 대표 닉네임 (하트 가장 많은 닉네임) + 후원자 합계
+        nick_sum = keyed.groupby(["_donor", "닉네임"], dropna=False)["후원하트"].sum().reset_index()
+        best = nick_sum.loc[nick_sum.groupby("_donor")["후원하트"].idxmax()]
+        self.nicknames = best.set_index("_donor")["닉네임"].reindex(range(len(donors))).fillna("").to_numpy(dtype=object)
+        self.donor_hearts = np.bincount(codes, weights=df["후원하트"].to_numpy(dtype="float64"), minlength=len(donors))
+
+        # 앞부분 검색용: (소문자 키, 후원자 코드) 를 키 순으로
+        nick_pairs = nick_sum[["닉네임", "_donor"]].drop_duplicates()
+        keys = np.concatenate([_search_key(donors), _search_key(nick_pairs["닉네임"])])
+        owners = np.concatenate([np.arange(len(donors)), nick_pairs["_donor"].to_numpy()])
+        key_order = np.argsort(keys, kind="stable")
+        self.search_keys = keys[key_order]
+        self.search_owners = owners[key_order]
+
+        # 공용 캐시 크기 계산용 (shared_cache.estimate_size)
+        arrays = (self.row_offsets, self.row_starts, self.total_starts, self.donor_hearts,
+                  self.search_keys, self.search_owners)
+        self.in_memory = int(
+            sum(a.nbytes for a in arrays)
+            + totals.memory_usage(deep=True).sum()
+            + nick_sum.memory_usage(deep=True).sum()
+        )
+
+    def __len__(self):
+        return len(self.donors)
+
+    def _code(self, donor_id) -> int | None:
+        pos = np.searchsorted(self.donors, str(donor_id))
+        if pos < len(self.donors) and self.donors[pos] == str(donor_id):
+            return int(pos)
+        return None
+
+    # ---------- 검색 ----------
+    def search(self, prefix: str, limit: int = DONOR_SEARCH_LIMIT) -> pd.DataFrame:
+        # 아이디 또는 닉네임 앞부분 일치 (대소문자 무시), 하트 많은 순
+        prefix = str(prefix).strip().lower()
+        columns = ["아이디", "닉네임", "후원하트", "참여BJ수"]
+        if not prefix:
+            return pd.DataFrame(columns=columns)
+
+        lo = np.searchsorted(self.search_keys, prefix, side="left")
+        hi = np.searchsorted(self.search_keys, prefix + _PREFIX_END, side="right")
+        matched = np.unique(self.search_owners[lo:hi])
+        if len(matched) > limit:
+            top = np.argpartition(-self.donor_hearts[matched], limit - 1)[:limit]
+            matched = matched[top]
+
+        bj_counts = [
+            self.totals["참여BJ"].iloc[self.total_starts[c]:self.total_starts[c + 1]].nunique()
+            for c in matched
+        ]
+        found = pd.DataFrame({
+            "아이디": self.donors[matched],
+            "닉네임": self.nicknames[matched],
+            "후원하트": self.donor_hearts[matched].astype("int64"),
+            "참여BJ수": bj_counts,
+        }, columns=columns)
+        return found.sort_values("후원하트", ascending=False, kind="stable").reset_index(drop=True)
+
+    # ---------- 조회 ----------
+    def breakdown(self, donor_id) -> pd.DataFrame:
+        # BJ × 회차 × 정산일자 별 하트 / 건수
+        code = self._code(donor_id)
+        if code is None:
+            return pd.DataFrame(columns=DONOR_INDEX_KEYS + ["후원하트", "후원건수"])
+        rows = self.totals.iloc[self.total_starts[code]:self.total_starts[code + 1]]
+        return rows.drop(columns="_donor").reset_index(drop=True)
+
+    def by_bj(self, donor_id) -> pd.DataFrame:
+        # BJ 별 합계 (하트 많은 순)
+        detail = self.breakdown(donor_id)
+        return (
+            detail.groupby("참여BJ")[["후원하트", "후원건수"]]
+            .sum()
+            .sort_values("후원하트", ascending=False)
+            .reset_index()
+        )
+
+    def row_positions(self, donor_id) -> np.ndarray:
+        # 표준 로그에서 이 후원자 행 위치 (canonical.iloc[...] 로 원본 로그)
+        code = self._code(donor_id)
+        if code is None:
+            return np.empty(0, dtype="int64")
+        return self.row_offsets[self.row_starts[code]:self.row_starts[code + 1]]
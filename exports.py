@@ -0,0 +1,121 @@
+import codecs
+import importlib.util
+import re
+import tempfile
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+
+# ==========================================
+# 🔹 회계 시스템용 평면 파일 내보내기 (CSV / Parquet)
+# ==========================================
+EXPORT_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+EXPORT_LAYOUTS = ("per_bj", "dataset")
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+DONOR_COLUMNS = ["참여BJ", "아이디", "닉네임", "후원하트", "구분"]
+LOG_COLUMNS = ["참여BJ", "회차", "정산일자", "날짜", "시간", "아이디", "닉네임", "후원하트", "구분"]
+
+
+def safe_filename(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|]+', "_", str(name)).strip() or "download"
+
+
+def donor_table(result: dict) -> pd.DataFrame:
+    # BJ별 정산용 후원자표를 한 장으로 (참여BJ 컬럼 추가)
+    frames = [views["정산용"].assign(참여BJ=bj) for bj, views in result.items()]
+    if not frames:
+        return pd.DataFrame(columns=DONOR_COLUMNS)
+    table = pd.concat(frames, ignore_index=True)[DONOR_COLUMNS]
+    table["후원하트"] = table["후원하트"].astype("int64")
+    return table
+
+
+def log_table(canonical: pd.DataFrame) -> pd.DataFrame:
+    # 표준 로그: 날짜류는 datetime64 / 문자열로 맞춰 CSV·Parquet 모두 그대로 쓰이게
+    # CoW: 컬럼을 바꿀 때만 그 컬럼이 복사됨 (전체 복사 없음)
+    table = canonical[LOG_COLUMNS]
+    table["정산일자"] = pd.to_datetime(table["정산일자"], errors="coerce")
+    table["날짜"] = pd.to_datetime(table["날짜"], errors="coerce")
+    table["시간"] = table["시간"].astype("string")
+    table["회차"] = table["회차"].astype("string")
+    table["후원하트"] = table["후원하트"].astype("int64")
+    return table.sort_values(["참여BJ", "날짜", "시간"], kind="stable").reset_index(drop=True)
+
+
+def _write_csv(df: pd.DataFrame, path: Path):
+    # 한글 엑셀에서 바로 열리도록 UTF-8 BOM
+    if not PARQUET_AVAILABLE:
+        df.to_csv(path, index=False, encoding="utf-8-sig", date_format="%Y-%m-%d")
+        return
+
+    # pyarrow 가 있으면 멀티스레드 CSV 작성기 사용 (날짜 컬럼은 date 로)
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(idx, field.name, table.column(idx).cast(pa.date32()))
+    with open(path, "wb") as fp:
+        fp.write(codecs.BOM_UTF8)
+        pa_csv.write_csv(table, fp)
+
+
+def _write(df: pd.DataFrame, path: Path, fmt: str):
+    if fmt == "csv":
+        _write_csv(df, path)
+    elif fmt == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet 내보내기에는 pyarrow 가 필요합니다.")
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+
+
+def write_bulk(result: dict, canonical: pd.DataFrame, out_dir, fmt: str = "csv", layout: str = "per_bj") -> list[Path]:
+    # per_bj : 후원자/<BJ>.csv, 후원내역/<BJ>.csv (BJ당 파일 1개씩)
+    # dataset: 후원자.csv + 후원내역.csv 단일 파일 (parquet 은 참여BJ 파티션 폴더)
+    if layout not in EXPORT_LAYOUTS:
+        raise ValueError(f"지원하지 않는 구성: {layout}")
+    ext = EXPORT_FORMATS[fmt]
+    out_dir = Path(out_dir)
+    tables = {"후원자": donor_table(result), "후원내역": log_table(canonical)}
+
+    written = []
+    for table_name, table in tables.items():
+        if layout == "per_bj":
+            table_dir = out_dir / table_name
+            table_dir.mkdir(parents=True, exist_ok=True)
+            for bj, rows in table.groupby("참여BJ", sort=False):
+                path = table_dir / f"{safe_filename(bj)}{ext}"
+                _write(rows, path, fmt)
+                written.append(path)
+        elif fmt == "parquet":
+            path = out_dir / table_name
+            if not PARQUET_AVAILABLE:
+                raise RuntimeError("Parquet 내보내기에는 pyarrow 가 필요합니다.")
+            table.to_parquet(path, index=False, partition_cols=["참여BJ"])
+            written.append(path)
+        else:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            path = out_dir / f"{table_name}{ext}"
+            _write(table, path, fmt)
+            written.append(path)
+    return written
+
+
+def bulk_export_zip(result: dict, canonical: pd.DataFrame, fmt: str = "csv", layout: str = "per_bj") -> bytes:
+    # 웹 다운로드용: 임시폴더에 쓰고 ZIP 으로 묶음
+    with tempfile.TemporaryDirectory(prefix="bj-export-") as tmp:
+        root = Path(tmp)
+        write_bulk(result, canonical, root, fmt, layout)
+        bio = BytesIO()
+        with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(root.rglob("*")):
+                if path.is_file():
+                    zf.write(path, path.relative_to(root).as_posix())
+        return bio.getvalue()
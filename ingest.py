@@ -0,0 +1,267 @@
+import codecs
+import csv
+import re
+from io import StringIO
+from operator import itemgetter
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from processor import business_dates, column_role, is_schema_column, parse_donation_times, resolve_columns
+
+# pyarrow 가 있으면 멀티스레드 컬럼 파서 사용, 없으면 pandas C 엔진
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# python-calamine(러스트 XLSX 리더)가 있으면 사용, 없으면 openpyxl 읽기 전용 스트리밍
+try:
+    import python_calamine  # noqa: F401
+    XLSX_ENGINE = "calamine"
+except ImportError:
+    XLSX_ENGINE = "openpyxl"
+
+# 인코딩/구분자 판별에 쓰는 앞부분 크기
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = ",\t;|"
+
+MAX_STANDARD_ROUNDS = 15
+
+
+# ==========================================
+# 🔹 정산일자 (파일명 / 데이터)
+# ==========================================
+def donation_business_date(dt):
+    if pd.isna(dt):
+        return None
+    return (
+        dt - pd.Timedelta(days=1)
+        if (dt.hour * 3600 + dt.minute * 60 + dt.second) / 86400 < 0.625
+        else dt
+    ).date()
+
+
+def business_date_from_filename(filename):
+    stem = Path(filename).stem
+
+    md = re.search(r"(?<!\d)(\d{1,2})[.\-_월 ]+(\d{1,2})(?:일)?(?!\d)", stem)
+    if md:
+        month, day = map(int, md.groups())
+        return pd.Timestamp(year=pd.Timestamp.today().year, month=month, day=day).date()
+
+    ymd = re.search(r"(20\d{2})(\d{2})(\d{2})(\d{2})?", stem)
+    if ymd:
+        year, month, day, hour = ymd.groups()
+        dt = pd.Timestamp(year=int(year), month=int(month), day=int(day), hour=int(hour or 0))
+        return donation_business_date(dt)
+
+    return None
+
+
+def file_business_date(df, filename):
+    col_time = resolve_columns(df.columns).get("후원시간")
+    if not col_time:
+        return business_date_from_filename(filename)
+
+    times = parse_donation_times(df[col_time]).dropna()
+    if times.empty:
+        return business_date_from_filename(filename)
+
+    return business_dates(times).min()
+
+
+# ==========================================
+# 🔹 CSV 인코딩 / 구분자 판별
+# ==========================================
+def sniff_encoding(prefix: bytes) -> str:
+    # 플랫폼 내보내기: UTF-8(BOM 포함) 또는 cp949(EUC-KR)
+    if prefix.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in ("utf-8", "cp949"):
+        try:
+            # 앞부분만 자르면 마지막 글자가 잘릴 수 있으므로 final=False
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def sniff_delimiter(text: str) -> str:
+    lines = text.splitlines()
+    if not lines:
+        return ","
+    # 헤더를 정산 컬럼으로 가장 많이 나누는 구분자 우선 (닉네임 안의 ; | 때문에 Sniffer 가 헷갈리는 경우)
+    # 같으면 CSV_DELIMITERS 순서 (쉼표 우선)
+    matches = {
+        sep: sum(is_schema_column(name) for name in next(csv.reader([lines[0]], delimiter=sep), []))
+        for sep in CSV_DELIMITERS
+    }
+    best = max(CSV_DELIMITERS, key=matches.get)
+    if matches[best]:
+        return best
+    try:
+        return csv.Sniffer().sniff("\n".join(lines[:20]), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def sniff_csv(prefix: bytes) -> tuple[str, str, str]:
+    # (인코딩, 구분자, 앞부분 디코딩 텍스트)
+    encoding = sniff_encoding(prefix)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(prefix, final=False)
+    return encoding, sniff_delimiter(text), text
+
+
+def read_csv_export(f) -> pd.DataFrame:
+    prefix = f.read(CSV_SNIFF_BYTES)
+    f.seek(0)
+    encoding, sep, text = sniff_csv(prefix)
+
+    # 헤더만 먼저 읽어 필요한 컬럼 / 타입 결정 (pyarrow 는 callable usecols 미지원)
+    header = pd.read_csv(StringIO(text), sep=sep, nrows=0).columns
+    usecols = [c for c in header if is_schema_column(c)]
+    # 하트는 숫자 추론에 맡기고(뒤에서 to_numeric), 나머지는 문자열 고정
+    dtype = {c: str for c in usecols if column_role(c) != "후원하트"}
+
+    options = dict(encoding=encoding, sep=sep, usecols=usecols or None, dtype=dtype)
+    try:
+        return _read_csv(f, options)
+    except UnicodeDecodeError:
+        if encoding != "utf-8":
+            raise
+        # 앞부분은 UTF-8 로 읽혔지만 뒤쪽에 cp949 글자가 있는 파일 → cp949 로 다시 읽음
+        f.seek(0)
+        return _read_csv(f, {**options, "encoding": "cp949"})
+
+
+def _read_csv(f, options: dict) -> pd.DataFrame:
+    if CSV_ENGINE == "pyarrow":
+        try:
+            return pd.read_csv(f, engine="pyarrow", **options)
+        except Exception:
+            # 행 길이가 들쭉날쭉한 파일 등은 C 엔진으로 다시 시도
+            f.seek(0)
+    return pd.read_csv(f, engine="c", **options)
+
+
+# ==========================================
+# 🔹 XLSX 스트리밍 읽기 (필요한 컬럼만, 셀 객체 안 만듦)
+# ==========================================
+def _header_names(header) -> list:
+    # pd.read_excel 과 같은 컬럼명: 빈 칸은 "Unnamed: n", 중복은 ".1", ".2" …
+    names, seen = [], {}
+    for idx, value in enumerate(header):
+        name = f"Unnamed: {idx}" if value is None else value
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(name if count == 0 else f"{name}.{count}")
+    return names
+
+
+def stream_xlsx_export(f) -> pd.DataFrame:
+    # 첫 시트를 read_only / values_only 로 한 줄씩 읽어 정산 컬럼만 모음
+    # (pd.read_excel 은 시트 전체를 셀 객체로 만든 뒤 DataFrame 생성)
+    wb = load_workbook(f, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        names = _header_names(header)
+        keep = [idx for idx, name in enumerate(names) if is_schema_column(name)]
+        if not keep:
+            return pd.DataFrame()
+
+        pick = itemgetter(*keep) if len(keep) > 1 else (lambda row: (row[keep[0]],))
+        width = max(keep) + 1
+        records = []
+        for row in rows:
+            # 읽기 전용 모드는 줄 끝 빈 칸을 잘라서 줄마다 길이가 다를 수 있음
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            values = pick(row)
+            # 완전히 빈 줄은 read_excel 처럼 건너뜀
+            if all(v is None for v in values) and all(v is None for v in row):
+                continue
+            records.append(values)
+    finally:
+        wb.close()
+
+    return pd.DataFrame.from_records(records, columns=[names[idx] for idx in keep])
+
+
+def read_xlsx_export(f) -> pd.DataFrame:
+    if XLSX_ENGINE == "calamine":
+        try:
+            return pd.read_excel(f, engine="calamine", usecols=is_schema_column)
+        except Exception:
+            f.seek(0)
+    try:
+        return stream_xlsx_export(f)
+    except Exception:
+        # 스트리밍으로 못 읽는 파일은 기존 방식으로 다시 시도
+        f.seek(0)
+        return pd.read_excel(f, usecols=is_schema_column)
+
+
+# ==========================================
+# 🔹 업로드 파일 읽기 (정산에 쓰는 컬럼만)
+# ==========================================
+def read_export(f, filename: str) -> pd.DataFrame:
+    # 컬럼명만 보고 후원아이디/후원하트/참여BJ/후원시간 컬럼만 파싱 (넓은 플랫폼 내보내기 대응)
+    if filename.lower().endswith(".csv"):
+        return read_csv_export(f)
+    return read_xlsx_export(f)
+
+
+def read_upload(f, filename: str | None = None):
+    filename = filename or f.name
+    df = read_export(f, filename)
+    return df, file_business_date(df, filename)
+
+
+# ==========================================
+# 🔹 업로드 회차 배정 (정산일자 순, 15회차 초과 시 두 줄로)
+# ==========================================
+def build_date_to_round(business_dates):
+    dates = sorted({d for d in business_dates if d is not None})
+    if len(dates) <= MAX_STANDARD_ROUNDS:
+        return {
+            d: idx
+            for idx, d in enumerate(dates, start=1)
+        }
+
+    date_to_round = {}
+    for track in (dates[0::2], dates[1::2]):
+        for idx, d in enumerate(track[:MAX_STANDARD_ROUNDS], start=1):
+            date_to_round[d] = idx
+    return date_to_round
+
+
+def assign_rounds(file_entries, upload_count: int):
+    # file_entries: [(업로드 순번, df, 정산일자), ...]
+    # → (업로드회차 컬럼을 붙인 df 목록, 표준정산시트 회차 라벨)
+    dfs = []
+    assigned_rounds = []
+    if len(file_entries) > 1:
+        date_to_round = build_date_to_round([d for _, _, d in file_entries])
+
+        for idx, df, business_date in file_entries:
+            if business_date in date_to_round:
+                round_no = date_to_round[business_date]
+            else:
+                round_no = min(((idx - 1) // 2) + 1, MAX_STANDARD_ROUNDS)
+            # 캐시에 든 원본은 건드리지 않고 새 프레임으로
+            df = df.assign(업로드회차=f"{round_no}회차")
+            assigned_rounds.append(round_no)
+            dfs.append(df)
+    else:
+        dfs = [df for _, df, _ in file_entries]
+
+    standard_round_count = min(max(assigned_rounds) if len(file_entries) > 1 and assigned_rounds else upload_count, MAX_STANDARD_ROUNDS)
+    round_labels = [f"{idx}회차" for idx in range(1, standard_round_count + 1)]
+    return dfs, round_labels
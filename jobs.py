@@ -0,0 +1,149 @@
+import itertools
+import logging
+import queue
+import threading
+import weakref
+
+log = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class GenerationJob:
+    # 백그라운드 스레드에서 도는 생성 작업 1개
+    # target(job, *args) 는 job.report(...) 로 진행 상황을 알리고, 취소되면 JobCancelled 로 빠져나옴
+
+    def __init__(self, key, target, *args):
+        self.key = key
+        self.stage = "대기"
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        # 이 작업을 잡고 있는 세션들 — 모두 놓으면 retired (다시 잡을 수 없고 정리 대상)
+        self._holders = set()
+        self._holders_lock = threading.Lock()
+        self.retired = False
+        self._thread = threading.Thread(target=self._run, args=(target, args), daemon=True)
+
+    def _run(self, target, args):
+        try:
+            self.result = target(self, *args)
+            self.stage = "완료"
+        except JobCancelled:
+            self.cancelled = True
+            self.stage = "취소됨"
+        except Exception as e:
+            self.error = e
+            self.stage = "실패"
+        finally:
+            self._finished.set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def report(self, stage: str | None = None, done: int | None = None, total: int | None = None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if stage is not None:
+            self.stage = stage
+        if total is not None:
+            self.total = total
+        if done is not None:
+            self.done = done
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._finished.wait(timeout)
+
+    @property
+    def running(self) -> bool:
+        return not self._finished.is_set()
+
+    @property
+    def progress(self) -> float:
+        if not self.total:
+            return 0.0
+        return min(self.done / self.total, 1.0)
+
+    # ---------- 세션 간 공유 (참조 수) ----------
+    def attach(self, holder) -> bool:
+        # 이미 정리 대상이 된 작업이면 False → 호출한 쪽에서 새로 만들어야 함
+        with self._holders_lock:
+            if self.retired:
+                return False
+            self._holders.add(holder)
+            return True
+
+    def detach(self, holder) -> bool:
+        # 마지막 세션이 놓았으면 True (정리는 호출한 쪽에서)
+        with self._holders_lock:
+            self._holders.discard(holder)
+            if self._holders or self.retired:
+                return False
+            self.retired = True
+            return True
+
+    def retire_if_idle(self) -> bool:
+        # 잡고 있는 세션이 없을 때만 정리 대상으로 표시 (공용 캐시에서 밀려난 경우)
+        with self._holders_lock:
+            if self._holders or self.retired:
+                return False
+            self.retired = True
+            return True
+
+
+# ==========================================
+# 🔹 세션별 작업 점유 / 정리
+# ==========================================
+# 정리(취소 대기, 임시파일 삭제)는 전용 스레드에서 — SimpleQueue.put 은 잠금을 잡지 않으므로
+# 세션 상태가 GC 되면서 finalizer 로 불려도 교착이 생기지 않음
+_cleanups = queue.SimpleQueue()
+_holder_ids = itertools.count()
+
+
+def _cleanup_worker():
+    while True:
+        fn, args = _cleanups.get()
+        try:
+            fn(*args)
+        except Exception:
+            log.exception("생성 작업 정리 실패")
+
+
+threading.Thread(target=_cleanup_worker, name="job-cleanup", daemon=True).start()
+
+
+def defer_cleanup(fn, *args):
+    _cleanups.put((fn, args))
+
+
+def _drop_holder(job: GenerationJob, holder, on_last):
+    if job.detach(holder):
+        on_last(job)
+
+
+class JobLease:
+    # 세션 1개가 공유 작업을 잡고 있다는 표시 (세션 상태에 보관)
+    # release() 하거나 세션이 사라지면 놓고, 마지막으로 놓은 세션 몫으로 on_last(job) 실행
+    # attached 가 False 면 이미 정리 중인 작업 → 새 작업을 만들어 다시 잡아야 함
+
+    def __init__(self, job: GenerationJob, on_last):
+        self.job = job
+        holder = next(_holder_ids)
+        self.attached = job.attach(holder)
+        self._finalizer = None
+        if self.attached:
+            self._finalizer = weakref.finalize(self, defer_cleanup, _drop_holder, job, holder, on_last)
+
+    def release(self):
+        if self._finalizer is not None:
+            self._finalizer()
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# scipy 가 있으면 희소행렬 곱(Bᵀ·B)으로, 없으면 후원자별 BJ 쌍 펼치기(numpy)로 같은 결과 계산
+try:
+    from scipy import sparse
+    SPARSE_AVAILABLE = True
+except ImportError:
+    sparse = None
+    SPARSE_AVAILABLE = False
+
+
+PAIR_COLUMNS = [
+    "BJ_A", "BJ_B", "A후원자수", "B후원자수", "공통후원자수", "겹침비율",
+    "A공통하트", "B공통하트", "공통하트",
+]
+MULTI_DONOR_COLUMNS = ["아이디", "닉네임", "참여BJ수", "후원하트", "참여BJ"]
+
+
+# ==========================================
+# 🔹 후원자 × BJ 하트 행렬 (교차 후원 / BJ 간 겹침)
+# ==========================================
+class DonorBJMatrix:
+    # 표준 로그를 한 번만 훑어 (후원자, BJ) 칸별 하트 합계를 희소 형태로 보관
+    # - 칸: 실제로 후원한 (후원자, BJ) 조합만 (후원자 순 → BJ 순 정렬)
+    # - BJ 쌍별 공통 후원자 수 / 공통 하트는 처음 필요할 때 한 번 계산 (BJ × BJ 밀집 배열, BJ 수백 명 기준)
+
+    def __init__(self, df: pd.DataFrame):
+        # df: clean_and_prepare 결과(표준 로그)
+        keyed = df[df["참여BJ"].notna()]
+        donor_codes, donors = pd.factorize(keyed["아이디"].fillna("").astype(str), sort=True)
+        bj_codes, bjs = pd.factorize(keyed["참여BJ"], sort=True)
+        self.donors = np.asarray(donors, dtype=object)
+        self.bjs = np.asarray(bjs, dtype=object)
+        n_bjs = max(len(self.bjs), 1)
+
+        # (후원자, BJ) 칸 번호 하나로 합친 뒤 bincount 로 합산
+        flat = donor_codes.astype("int64") * n_bjs + bj_codes
+        cell_ids, inverse = np.unique(flat, return_inverse=True)
+        hearts = keyed["후원하트"].to_numpy(dtype="float64")
+        self.donor = cell_ids // n_bjs
+        self.bj = cell_ids % n_bjs
+        self.hearts = np.bincount(inverse, weights=hearts, minlength=len(cell_ids)).astype("int64")
+
+        # 후원자별 칸 구간 / 참여 BJ 수
+        self.donor_starts = np.searchsorted(self.donor, np.arange(len(self.donors) + 1))
+        self.bj_counts = np.diff(self.donor_starts)
+
+        # 대표 닉네임 (하트 가장 많은 닉네임)
+        nick_sum = (
+            keyed[["닉네임", "후원하트"]].assign(_donor=donor_codes)
+            .groupby(["_donor", "닉네임"], dropna=False)["후원하트"].sum()
+            .reset_index()
+        )
+        best = nick_sum.loc[nick_sum.groupby("_donor")["후원하트"].idxmax()]
+        self.nicknames = best.set_index("_donor")["닉네임"].reindex(range(len(self.donors))).fillna("").to_numpy(dtype=object)
+
+        self._pairwise = None
+
+        # 공용 캐시 크기 계산용 (shared_cache.estimate_size)
+        self.in_memory = int(
+            sum(a.nbytes for a in (self.donor, self.bj, self.hearts, self.donor_starts, self.bj_counts))
+            + nick_sum.memory_usage(deep=True).sum()
+        )
+
+    def __len__(self):
+        return len(self.hearts)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.donors), len(self.bjs)
+
+    def matrix(self):
+        # scipy.sparse CSR (후원자 × BJ, 값 = 하트) — scipy 가 없으면 None
+        if not SPARSE_AVAILABLE:
+            return None
+        return sparse.csr_matrix((self.hearts, (self.donor, self.bj)), shape=self.shape)
+
+    # ---------- BJ × BJ 겹침 ----------
+    def pairwise(self) -> tuple[np.ndarray, np.ndarray]:
+        # (공통 후원자 수, 공통 하트) BJ × BJ 배열
+        # 공통 하트 [i, j]: BJ j 에도 후원한 후원자들이 BJ i 에 준 하트 (대각선 = BJ 후원자 수 / 총하트)
+        if self._pairwise is None:
+            self._pairwise = self._pairwise_sparse() if SPARSE_AVAILABLE else self._pairwise_pairs()
+        return self._pairwise
+
+    def _pairwise_sparse(self):
+        hearts = self.matrix()
+        supports = hearts.copy()
+        supports.data = np.ones_like(supports.data)
+        shared = (supports.T @ supports).toarray()
+        shared_hearts = (hearts.T @ supports).toarray()
+        return shared.astype("int64"), shared_hearts.astype("int64")
+
+    def _pairwise_pairs(self):
+        # 후원자마다 자기 칸끼리 모든 (a, b) 순서쌍을 만들어 BJ 쌍별로 합산 — 희소 Bᵀ·B 와 같은 계산
+        n_bjs = len(self.bjs)
+        group = np.repeat(self.bj_counts, self.bj_counts)
+        starts = np.repeat(self.donor_starts[:-1], self.bj_counts)
+        a = np.repeat(np.arange(len(self.hearts)), group)
+        offsets = np.arange(len(a)) - np.repeat(np.cumsum(group) - group, group)
+        b = np.repeat(starts, group) + offsets
+        pair = self.bj[a] * n_bjs + self.bj[b]
+        size = n_bjs * n_bjs
+        shared = np.bincount(pair, minlength=size).reshape(n_bjs, n_bjs)
+        shared_hearts = np.bincount(pair, weights=self.hearts[a], minlength=size).reshape(n_bjs, n_bjs)
+        return shared.astype("int64"), np.rint(shared_hearts).astype("int64")
+
+    def overlap_matrix(self) -> pd.DataFrame:
+        # BJ × BJ 공통 후원자 수 (대각선 = 그 BJ 후원자 수)
+        shared, _ = self.pairwise()
+        return pd.DataFrame(shared, index=pd.Index(self.bjs, name="참여BJ"), columns=self.bjs)
+
+    def overlap_pairs(self, min_shared: int = 1) -> pd.DataFrame:
+        # 공통 후원자가 있는 BJ 쌍 (A < B), 공통 후원자 많은 순
+        shared, shared_hearts = self.pairwise()
+        i, j = np.triu_indices(len(self.bjs), k=1)
+        keep = shared[i, j] >= max(min_shared, 1)
+        i, j = i[keep], j[keep]
+        donors = np.diag(shared)
+        union = donors[i] + donors[j] - shared[i, j]
+        pairs = pd.DataFrame({
+            "BJ_A": self.bjs[i],
+            "BJ_B": self.bjs[j],
+            "A후원자수": donors[i],
+            "B후원자수": donors[j],
+            "공통후원자수": shared[i, j],
+            "겹침비율": shared[i, j] / np.maximum(union, 1),
+            "A공통하트": shared_hearts[i, j],
+            "B공통하트": shared_hearts[j, i],
+        })
+        pairs["공통하트"] = pairs["A공통하트"] + pairs["B공통하트"]
+        return (
+            pairs.sort_values(["공통후원자수", "공통하트"], ascending=False, kind="stable")
+            .reset_index(drop=True)[PAIR_COLUMNS]
+        )
+
+    # ---------- 여러 BJ 후원자 ----------
+    def multi_bj_donors(self, min_bjs: int = 2) -> pd.DataFrame:
+        # min_bjs 명 이상 BJ 에 후원한 후원자 (참여 BJ 수 → 하트 많은 순)
+        codes = np.flatnonzero(self.bj_counts >= max(min_bjs, 1))
+        if len(codes) == 0:
+            return pd.DataFrame(columns=MULTI_DONOR_COLUMNS)
+        # 후원자마다 칸이 1개 이상이므로 구간 합 그대로
+        donor_hearts = np.add.reduceat(self.hearts, self.donor_starts[:-1])
+        bj_lists = [
+            ", ".join(map(str, self.bjs[self.bj[self.donor_starts[c]:self.donor_starts[c + 1]]]))
+            for c in codes
+        ]
+        found = pd.DataFrame({
+            "아이디": self.donors[codes],
+            "닉네임": self.nicknames[codes],
+            "참여BJ수": self.bj_counts[codes],
+            "후원하트": donor_hearts[codes],
+            "참여BJ": bj_lists,
+        })
+        return (
+            found.sort_values(["참여BJ수", "후원하트"], ascending=False, kind="stable")
+            .reset_index(drop=True)[MULTI_DONOR_COLUMNS]
+        )
+
+    def donor_bjs(self, donor_id) -> pd.DataFrame:
+        # 후원자 1명의 BJ별 하트 (행렬 한 줄)
+        pos = np.searchsorted(self.donors, str(donor_id))
+        if pos >= len(self.donors) or self.donors[pos] != str(donor_id):
+            return pd.DataFrame(columns=["참여BJ", "후원하트"])
+        cells = slice(self.donor_starts[pos], self.donor_starts[pos + 1])
+        return pd.DataFrame({"참여BJ": self.bjs[self.bj[cells]], "후원하트": self.hearts[cells]})
@@ -0,0 +1,286 @@
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape as xml_escape
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from openpyxl.writer.theme import theme_xml
+
+from sheetparts import DetailLogPart, clean_text, display_len, render_cells, shared_string_cells
+
+
+# ==========================================
+# 🔹 단순 표 시트 직접 작성 (openpyxl 객체 모델 없이 XML 바로 쓰기)
+# 헤더 + 문자/숫자/날짜/시간 셀 + #,##0 + 테두리만 있는 시트용 (정산용/BJ용 파일)
+# ==========================================
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# 고정 스타일 표 (cellXfs 번호) — openpyxl 로 같은 시트를 만들 때 나오는 순서/서식과 동일
+STYLE_IDS = {
+    "text": 1,      # 일반 + 테두리
+    "number": 2,    # #,##0 + 테두리
+    "heart": 2,
+    "int": 2,
+    "header": 3,    # 가운데 정렬 + 테두리
+    "date": 4,      # yyyy-mm-dd + 테두리
+    "time": 5,      # h:mm:ss + 테두리
+}
+
+STYLES_XML = (
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/>'
+    '<scheme val="minor"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="6">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" applyBorder="1" xfId="0"/>'
+    '<xf numFmtId="3" fontId="0" fillId="0" borderId="1" applyNumberFormat="1" applyBorder="1" xfId="0"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" applyBorder="1" applyAlignment="1" xfId="0">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="1" applyNumberFormat="1" applyBorder="1" xfId="0"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="1" applyNumberFormat="1" applyBorder="1" xfId="0"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_HEAD = (
+    f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+    '<sheetPr><outlinePr summaryBelow="1" summaryRight="1"/><pageSetUpPr/></sheetPr>'
+    '<dimension ref="{dimension}"/>'
+    '<sheetViews><sheetView workbookViewId="0"><selection activeCell="A1" sqref="A1"/></sheetView></sheetViews>'
+    '<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>'
+)
+SHEET_TAIL = '</sheetData><pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/></worksheet>'
+
+# 행 조각을 이 정도 크기로 모아서 압축 스트림에 씀
+WRITE_CHUNK_ROWS = 20000
+
+
+def _attr(value: str) -> str:
+    return xml_escape(value, {'"': "&quot;"})
+
+
+class SharedStrings:
+    # 통합문서 공유 문자열 (같은 아이디/닉네임은 번호 하나로)
+
+    def __init__(self, initial: list[str] | None = None):
+        self.items = list(initial or [])
+        self.index = {text: idx for idx, text in enumerate(self.items)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, text: str) -> int:
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.items)
+            self.items.append(text)
+        return idx
+
+    def codes(self, text: pd.Series) -> np.ndarray:
+        # 열 하나를 공유 문자열 번호 배열로 (고유값만 사전 조회)
+        codes, uniques = pd.factorize(text)
+        lookup = np.fromiter((self.add(u) for u in uniques), dtype="int64", count=len(uniques))
+        return lookup[codes]
+
+    def write(self, f):
+        f.write(f'<sst xmlns="{MAIN_NS}" uniqueCount="{len(self.items)}">'.encode("utf-8"))
+        for start in range(0, len(self.items), WRITE_CHUNK_ROWS):
+            texts = pd.Series(self.items[start:start + WRITE_CHUNK_ROWS], dtype=object)
+            escaped = texts.map(xml_escape)
+            # 앞뒤 공백은 xml:space="preserve" 가 있어야 유지됨
+            opening = pd.Series("<si><t>", index=texts.index).where(
+                texts == texts.str.strip(), '<si><t xml:space="preserve">'
+            )
+            cells = opening + escaped + "</t></si>"
+            f.write("".join(cells.tolist()).encode("utf-8"))
+        f.write(b"</sst>")
+
+
+class PlainSheet:
+    # 시트 1장: 행 조각(XML 문자열)을 순서대로 모았다가 저장 시 한 번에 씀
+    # 셀에 r 속성을 안 붙이므로 빈 셀도 <c/> 로 자리 유지
+
+    def __init__(self, title: str, strings: SharedStrings):
+        self.title = title
+        self.strings = strings
+        self.chunks = []
+        self.rows = 0
+        self.lengths = []
+        self.widths = []
+
+    def _widen(self, lengths: list[int]):
+        # auto_width 기준(str(값) 길이) 열별 최댓값
+        self.lengths.extend([0] * (len(lengths) - len(self.lengths)))
+        for col, length in enumerate(lengths):
+            self.lengths[col] = max(self.lengths[col], length)
+
+    def append(self, values: list, kinds: list | str = "text"):
+        # 헤더 / 합계 같은 짧은 행 1줄 (값이 None 이나 "" 이면 빈 셀)
+        if isinstance(kinds, str):
+            kinds = [kinds] * len(values)
+        cells = []
+        lengths = []
+        for value, kind in zip(values, kinds):
+            if value is None or value == "":
+                cells.append("<c/>")
+                lengths.append(0)
+            elif kind in ("text", "header"):
+                text = str(value)
+                cells.append(f'<c s="{STYLE_IDS[kind]}" t="s"><v>{self.strings.add(text)}</v></c>')
+                lengths.append(len(text))
+            else:
+                cells.append(f'<c s="{STYLE_IDS[kind]}" t="n"><v>{value}</v></c>')
+                lengths.append(len(str(value)))
+        self.chunks.append("<row>" + "".join(cells) + "</row>")
+        self.rows += 1
+        self._widen(lengths)
+
+    def append_columns(self, df: pd.DataFrame, spec: list):
+        # spec: [(컬럼, 종류), ...] — text / heart / int / date / time, 열 단위로 한 번에 렌더링
+        if df.empty:
+            return
+        body = pd.Series("", index=df.index, dtype=object)
+        lengths = []
+        for column, kind in spec:
+            values = df[column]
+            style = str(STYLE_IDS[kind])
+            if kind == "text":
+                text = clean_text(values)
+                body = body + shared_string_cells(self.strings.codes(text), text, style)
+                lengths.append(display_len(text, "text"))
+            elif kind == "int":
+                numbers = values.astype("int64").astype(str)
+                body = body + (f'<c s="{style}" t="n"><v>' + numbers + "</v></c>")
+                lengths.append(int(numbers.str.len().max()))
+            else:
+                render_kind = "number" if kind == "heart" else kind
+                body = body + render_cells(values, render_kind, style)
+                lengths.append(display_len(values, render_kind))
+        rows = "<row>" + body + "</row>"
+        for start in range(0, len(rows), WRITE_CHUNK_ROWS):
+            self.chunks.append("".join(rows.iloc[start:start + WRITE_CHUNK_ROWS].tolist()))
+        self.rows += len(df)
+        self._widen(lengths)
+
+    def append_part(self, part: DetailLogPart):
+        # 상세 로그 조각 (통합문서 공유 문자열이 part.strings() 로 시작해야 함 — PlainWorkbook(part.strings()))
+        if part.empty:
+            return
+        self.chunks.append(part.shared_rows_xml(STYLE_IDS))
+        self.rows += len(part)
+        self._widen(part.display_lengths())
+
+    def auto_width(self, min_w=18, max_w=45, pad=4):
+        # workbooks.auto_width 와 같은 규칙 (값 있는 셀 최대 길이 + pad, min_w ~ max_w)
+        self.widths = [min(max(length + pad, min_w), max_w) for length in self.lengths]
+
+    def dimension(self) -> str:
+        if not self.rows or not self.lengths:
+            return "A1"
+        return f"A1:{get_column_letter(len(self.lengths))}{self.rows}"
+
+    def write(self, f):
+        f.write(SHEET_HEAD.replace("{dimension}", self.dimension()).encode("utf-8"))
+        if self.widths:
+            cols = "".join(
+                f'<col width="{width:g}" customWidth="1" min="{idx}" max="{idx}"/>'
+                for idx, width in enumerate(self.widths, start=1)
+            )
+            f.write(f"<cols>{cols}</cols>".encode("utf-8"))
+        f.write(b"<sheetData>")
+        for chunk in self.chunks:
+            f.write(chunk.encode("utf-8"))
+        f.write(SHEET_TAIL.encode("utf-8"))
+
+
+class PlainWorkbook:
+    # 단순 표 시트만 있는 통합문서 — 시트 XML / 공유 문자열 / 고정 스타일 표를 바로 압축 파일로
+    # strings: 공유 문자열 앞부분 (상세 로그 조각을 넣을 때 part.strings())
+
+    def __init__(self, strings: list[str] | None = None):
+        self.strings = SharedStrings(strings)
+        self.sheets = []
+
+    def create_sheet(self, title: str) -> PlainSheet:
+        sheet = PlainSheet(title, self.strings)
+        self.sheets.append(sheet)
+        return sheet
+
+    def _content_types(self) -> str:
+        sheets = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for idx in range(1, len(self.sheets) + 1)
+        )
+        return (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f"{sheets}"
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/theme/theme1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.theme+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            "</Types>"
+        )
+
+    def _workbook(self) -> str:
+        sheets = "".join(
+            f'<sheet name="{_attr(sheet.title)}" sheetId="{idx}" r:id="rId{idx}"/>'
+            for idx, sheet in enumerate(self.sheets, start=1)
+        )
+        return (
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            '<workbookPr/><bookViews><workbookView activeTab="0"/></bookViews>'
+            f"<sheets>{sheets}</sheets>"
+            '<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+            "</workbook>"
+        )
+
+    def _workbook_rels(self) -> str:
+        count = len(self.sheets)
+        rels = [
+            f'<Relationship Id="rId{idx}" Type="{REL_NS}/worksheet" Target="worksheets/sheet{idx}.xml"/>'
+            for idx in range(1, count + 1)
+        ]
+        rels.append(f'<Relationship Id="rId{count + 1}" Type="{REL_NS}/styles" Target="styles.xml"/>')
+        rels.append(f'<Relationship Id="rId{count + 2}" Type="{REL_NS}/theme" Target="theme/theme1.xml"/>')
+        rels.append(f'<Relationship Id="rId{count + 3}" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>')
+        return f'<Relationships xmlns="{PACKAGE_REL_NS}">{"".join(rels)}</Relationships>'
+
+    def save(self) -> BytesIO:
+        bio = BytesIO()
+        with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("[Content_Types].xml", self._content_types())
+            zf.writestr(
+                "_rels/.rels",
+                f'<Relationships xmlns="{PACKAGE_REL_NS}">'
+                f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+                "</Relationships>",
+            )
+            zf.writestr("xl/workbook.xml", self._workbook())
+            zf.writestr("xl/_rels/workbook.xml.rels", self._workbook_rels())
+            zf.writestr("xl/styles.xml", STYLES_XML)
+            zf.writestr("xl/theme/theme1.xml", theme_xml)
+            for idx, sheet in enumerate(self.sheets, start=1):
+                with zf.open(f"xl/worksheets/sheet{idx}.xml", "w") as f:
+                    sheet.write(f)
+            with zf.open("xl/sharedStrings.xml", "w") as f:
+                self.strings.write(f)
+        bio.seek(0)
+        return bio
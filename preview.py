@@ -0,0 +1,55 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+
+# 미리보기 한 페이지 행 수 (선택지)
+PREVIEW_PAGE_SIZES = [50, 100, 500]
+
+# 숫자 그대로 보내고 화면에서만 천 단위 콤마 (문자열 변환 없음)
+NUMBER_COLUMNS = [
+    "후원하트", "후원건수", "일반", "제휴", "총합", "참여BJ수",
+    "하트단가", "일반정산금", "협력지원금", "제휴정산금", "공급가액", "세액", "합계",
+    "A후원자수", "B후원자수", "공통후원자수", "A공통하트", "B공통하트", "공통하트",
+]
+
+# 아이디 / 닉네임 검색 대상
+FILTER_COLUMNS = ["아이디", "닉네임"]
+
+
+def number_column_config(columns=NUMBER_COLUMNS) -> dict:
+    # st.dataframe(column_config=...) 용: 숫자 컬럼은 숫자 그대로 + 콤마 표시
+    # (표에 없는 컬럼 설정은 무시됨)
+    return {c: st.column_config.NumberColumn(c, format="localized") for c in columns}
+
+
+# ==========================================
+# 🔹 필터 / 페이지 자르기 (보이는 페이지만 브라우저로 전송)
+# ==========================================
+def filter_rows(df: pd.DataFrame, query: str = "", heart_type: str | None = None) -> pd.DataFrame:
+    # query: 아이디 / 닉네임 부분 일치 (대소문자 무시), heart_type: 일반 / 제휴
+    mask = pd.Series(True, index=df.index)
+    query = str(query or "").strip().lower()
+    if query:
+        matched = pd.Series(False, index=df.index)
+        for c in FILTER_COLUMNS:
+            if c in df.columns:
+                matched |= df[c].astype(str).str.lower().str.contains(query, regex=False, na=False)
+        mask &= matched
+    if heart_type and "구분" in df.columns:
+        mask &= df["구분"] == heart_type
+    if mask.all():
+        return df
+    return df[mask.to_numpy()]
+
+
+def page_count(rows: int, page_size: int) -> int:
+    return max(math.ceil(rows / page_size), 1)
+
+
+def page_slice(df: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    # page: 1부터
+    page = min(max(int(page), 1), page_count(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
@@ -1,6 +1,26 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing import get_context
+
+import numpy as np
 import pandas as pd
 
 
+# pandas 2.x: Copy-on-Write 켜기 (3.0 부터 항상 켜짐)
+# 컬럼 선택 / reset_index / 슬라이스가 실제로 값을 바꾸기 전까지 원본 메모리를 공유
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# 큰 파일 1개도 행 구간으로 나눠 여러 프로세스에서 정리 (환경변수로 변경 가능)
+# 행 수가 PARSE_PARALLEL_ROWS 미만이면 프로세스 시작/전송 비용이 더 커서 한 번에 처리
+# 기본 프로세스 수는 최대 4개 (코어가 많은 서버에서 업로드 1건이 프로세스를 과하게 띄우지 않도록)
+PARSE_WORKERS = int(os.environ.get("BJ_PARSE_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PARSE_PARALLEL_ROWS = int(os.environ.get("BJ_PARSE_PARALLEL_ROWS", "200000"))
+
+
 def parse_donation_times(series):
     text = series.astype(str).str.strip()
     text = text.str.replace("오전", "AM", regex=False).str.replace("오후", "PM", regex=False)
@@ -8,13 +28,22 @@ def parse_donation_times(series):
 
     missing = parsed.isna()
     if missing.any():
+        # 엑셀 날짜 시리얼(1899-12-30 기준 일수) — 부동소수 오차는 초 단위로 반올림
         numeric = pd.to_numeric(series[missing], errors="coerce")
-        excel_dates = pd.to_datetime(numeric, errors="coerce", unit="D", origin="1899-12-30")
-        parsed.loc[missing] = excel_dates
+        excel_dates = pd.to_datetime(numeric, errors="coerce", unit="D", origin="1899-12-30").dt.round("s")
+        # 단위(s/ns)가 달라도 합쳐지도록 fillna 로 채움 (loc 대입은 단위 불일치 시 실패)
+        parsed = parsed.fillna(excel_dates)
 
     return parsed
 
 
+def business_dates(times: pd.Series) -> pd.Series:
+    # 정산일자: 15시(0.625일) 이전 후원은 전날 방송분으로 집계
+    before_cutoff = (times.dt.hour * 3600 + times.dt.minute * 60 + times.dt.second) / 86400 < 0.625
+    shifted = times.where(~before_cutoff, times - pd.Timedelta(days=1))
+    return shifted.dt.date
+
+
 # ==========================================
 # 🔹 ID / 닉네임 분리
 # ==========================================
@@ -31,6 +60,20 @@ def split_id_nickname(text):
     return id_part.strip(), nick_part.strip()
 
 
+def split_id_nicknames(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    # split_id_nickname 을 컬럼 단위로 (행마다 Series 를 만들지 않음)
+    # 문자열 dtype 그대로 정규식 치환 → 파이썬 문자열 / 분할 리스트를 행마다 만들지 않음
+    text = series.astype(str)
+    missing = series.isna()
+    if missing.any():
+        # 빈 셀도 str() 과 같이 "nan" / "None" 으로
+        text = text.mask(missing, series[missing].astype(object).map(str))
+    has_nick = text.str.contains("(", regex=False) & text.str.contains(")", regex=False)
+    ids = text.str.replace(r"(?s)\(.*", "", regex=True).where(has_nick, text).str.strip()
+    nicks = text.str.replace(r"(?s)^[^(]*\(", "", regex=True).str.rstrip(")").where(has_nick, "").str.strip()
+    return ids, nicks
+
+
 # ==========================================
 # 🔹 하트 구분
 # ==========================================
@@ -44,51 +87,305 @@ def classify_heart(user_id: str) -> str:
     return "일반"
 
 
+def classify_hearts(ids: pd.Series) -> pd.Series:
+    # classify_heart 를 컬럼 단위로: "@ka" → 일반, 그 외 "@" → 제휴, 없으면 일반
+    text = ids.astype(str)
+    partner = text.str.contains("@", regex=False) & ~text.str.contains("@ka", regex=False)
+    return pd.Series(np.where(partner, "제휴", "일반"), index=ids.index, dtype=text.dtype)
+
+
+# ==========================================
+# 🔹 컬럼 자동 탐색 (헤더 시그니처별 캐시)
+# ==========================================
+SCHEMA_RULES = {
+    "후원아이디": ("후원", "아이디"),
+    "후원하트": ("후원", "하트"),
+    "참여BJ": ("참여", "BJ"),
+    "후원시간": ("후원", "시간"),
+}
+
+
+@lru_cache(maxsize=4096)
+def column_role(name) -> str | None:
+    # 원본 컬럼명 1개 → 표준 컬럼명 (해당 없으면 None)
+    if not isinstance(name, str):
+        return None
+    return next(
+        (role for role, words in SCHEMA_RULES.items() if all(w in name for w in words)),
+        None
+    )
+
+
+def is_schema_column(name) -> bool:
+    # read_csv / read_excel 의 usecols 로 넘겨 필요한 컬럼만 읽음
+    return column_role(name) is not None
+
+
+@lru_cache(maxsize=256)
+def _resolve_header(header: tuple) -> dict:
+    mapping = {}
+    for c in header:
+        role = column_role(c)
+        if role and role not in mapping:
+            mapping[role] = c
+    return mapping
+
+
+def resolve_columns(columns) -> dict:
+    # 표준 컬럼명 → 원본 컬럼명 (각 역할별 첫 번째 일치 컬럼)
+    return _resolve_header(tuple(columns))
+
+
 # ==========================================
 # 🔹 전처리 + 표준화
 # ==========================================
-def clean_and_prepare(df: pd.DataFrame):
+CANONICAL_COLUMNS = ["참여BJ", "회차", "날짜", "시간", "아이디", "닉네임", "후원하트", "구분", "정산일자"]
 
-    df = df.copy()
+
+def _prepare_rows(columns: tuple, df: pd.DataFrame) -> pd.DataFrame:
+    # 행 구간 1개 정리 (프로세스 풀에서도 호출되므로 최상위 함수)
+    # columns: (후원아이디, 후원하트, 참여BJ, 후원시간) 원본 컬럼명
+    # 원본 프레임은 복사하지 않고, 새로 계산한 컬럼 + 원본 컬럼(참여BJ/회차, CoW 공유)으로 새 프레임 구성
+    col_idnick, col_heart, col_bj, col_time = columns
+
+    # 아이디 / 닉네임 분리
+    ids, nicks = split_id_nicknames(df[col_idnick])
+
+    # 하트 숫자 정리 (음수는 0)
+    hearts = pd.to_numeric(df[col_heart], errors="coerce").fillna(0)
+    hearts = hearts.mask(hearts < 0, 0)
+
+    # 날짜/시간 처리
+    if col_time:
+        times = parse_donation_times(df[col_time])
+        dates, clock, settle = times.dt.date, times.dt.time, business_dates(times)
+    else:
+        dates = clock = settle = None
+
+    return pd.DataFrame(
+        {
+            "참여BJ": df[col_bj],
+            "회차": df["업로드회차"] if "업로드회차" in df.columns else None,
+            "날짜": dates,
+            "시간": clock,
+            "아이디": ids,
+            "닉네임": nicks,
+            "후원하트": hearts,
+            # 하트 타입
+            "구분": classify_hearts(ids),
+            "정산일자": settle,
+        },
+        index=df.index,
+        columns=CANONICAL_COLUMNS,
+        copy=False,
+    )
+
+
+# 프로세스 수별 정리 풀 (업로드마다 새로 띄우지 않고 재사용)
+_parse_pools: dict = {}
+_parse_pools_lock = threading.Lock()
+
+
+def _parse_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: 스레드 많은 서버 프로세스에서도 안전
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _parse_pools[workers] = pool
+        return pool
+
+
+def _discard_parse_pool(workers: int, pool: ProcessPoolExecutor):
+    # 깨진 풀은 남은 작업을 취소하고 기다리지 않고 내림 → 다음 호출 때 새로 띄움
+    with _parse_pools_lock:
+        if _parse_pools.get(workers) is pool:
+            del _parse_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_parse_pools():
+    with _parse_pools_lock:
+        pools = list(_parse_pools.values())
+        _parse_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_shutdown_parse_pools)
+
+
+def _prepare_parallel(df: pd.DataFrame, columns: tuple, workers: int):
+    # 행 구간별로 나눠 프로세스 풀에서 정리 → 원래 행 순서대로 이어 붙임
+    # 풀을 쓸 수 없으면(프로세스 생성 제한 등) None → 한 번에 처리
+    bounds = np.linspace(0, len(df), workers + 1).astype(int)
+    parts = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+    pool = None
+    try:
+        pool = _parse_pool(workers)
+        prepared = list(pool.map(partial(_prepare_rows, columns), parts))
+    except Exception:
+        if pool is not None:
+            _discard_parse_pool(workers, pool)
+        return None
+    return pd.concat(prepared)
+
+
+def clean_and_prepare(df: pd.DataFrame, workers: int | None = None):
+    # workers: 행 구간 병렬 정리 프로세스 수 (None 이면 PARSE_WORKERS, 작은 파일은 항상 한 번에)
 
     # 컬럼 자동 탐색
-    col_idnick = next((c for c in df.columns if "후원" in c and "아이디" in c), None)
-    col_heart = next((c for c in df.columns if "후원" in c and "하트" in c), None)
-    col_bj = next((c for c in df.columns if "참여" in c and "BJ" in c), None)
-    col_time = next((c for c in df.columns if "후원" in c and "시간" in c), None)
+    schema = resolve_columns(df.columns)
+    col_idnick = schema.get("후원아이디")
+    col_heart = schema.get("후원하트")
+    col_bj = schema.get("참여BJ")
+    col_time = schema.get("후원시간")
 
     if not all([col_idnick, col_heart, col_bj]):
         return None
 
-    # 아이디 / 닉네임 분리
-    df[["아이디", "닉네임"]] = df[col_idnick].apply(
-        lambda x: pd.Series(split_id_nickname(x))
+    columns = (col_idnick, col_heart, col_bj, col_time)
+    workers = PARSE_WORKERS if workers is None else workers
+    if workers > 1 and len(df) >= PARSE_PARALLEL_ROWS:
+        # 정리에 쓰는 컬럼만 프로세스로 전송
+        needed = list(dict.fromkeys(c for c in columns + ("업로드회차",) if c and c in df.columns))
+        prepared = _prepare_parallel(df[needed], columns, workers)
+        if prepared is not None:
+            return prepared
+
+    return _prepare_rows(columns, df)
+
+
+# ==========================================
+# 🔹 BJ별 후원자 집계 (원본 로그 / 일자별 롤업 공용)
+# ==========================================
+def aggregate_donors(df: pd.DataFrame) -> pd.DataFrame:
+    # df: 참여BJ / 아이디 / 닉네임 / 후원하트 컬럼만 있으면 됨
+    # (원본 행이든 일자별 부분합이든 합산 결과는 동일)
+    # 결과: (참여BJ, 아이디) 단위 합계 + 대표 닉네임, 정렬하지 않음
+
+    # 1️⃣ 아이디 + 닉네임별 합산
+    nick_sum = (
+        df.groupby(["참여BJ", "아이디", "닉네임"])["후원하트"]
+        .sum()
+        .reset_index()
     )
 
-    # 하트 숫자 정리
-    df["후원하트"] = pd.to_numeric(df[col_heart], errors="coerce").fillna(0)
-    df.loc[df["후원하트"] < 0, "후원하트"] = 0
+    # 각 아이디에서 가장 하트 많이 받은 닉네임 선택
+    idx = nick_sum.groupby(["참여BJ", "아이디"])["후원하트"].idxmax()
+    representative = nick_sum.loc[idx, ["참여BJ", "아이디", "닉네임"]]
 
-    # 하트 타입
-    df["구분"] = df["아이디"].apply(classify_heart)
+    # 아이디 기준 총합
+    total_sum = (
+        nick_sum.groupby(["참여BJ", "아이디"])["후원하트"]
+        .sum()
+        .reset_index()
+    )
 
-    # 날짜/시간 처리
-    if col_time:
-        df["후원시간"] = parse_donation_times(df[col_time])
-        df["날짜"] = df["후원시간"].dt.date
-        df["시간"] = df["후원시간"].dt.time
-    else:
-        df["날짜"] = None
-        df["시간"] = None
+    merged = pd.merge(
+        total_sum,
+        representative,
+        on=["참여BJ", "아이디"],
+        how="left"
+    )
 
-    if "업로드회차" in df.columns:
-        df["회차"] = df["업로드회차"]
-    else:
-        df["회차"] = None
+    merged["구분"] = classify_hearts(merged["아이디"])
+    return merged
+
+
+def sort_donor_views(merged: pd.DataFrame):
+    merged = merged[["아이디", "후원하트", "닉네임", "구분"]]
+
+    # =====================================
+    # 2️⃣ 정산용 정렬
+    # 일반 위 / 제휴 아래 / 각 그룹 내 내림차순
+    # =====================================
+    normal = merged[merged["구분"] == "일반"].sort_values("후원하트", ascending=False)
+    partner = merged[merged["구분"] == "제휴"].sort_values("후원하트", ascending=False)
+
+    settlement_view = pd.concat([normal, partner]).reset_index(drop=True)
+
+    # =====================================
+    # 3️⃣ BJ용 정렬 (전체 통합 내림차순)
+    # =====================================
+    bj_view = merged.sort_values("후원하트", ascending=False).reset_index(drop=True)
+
+    return settlement_view, bj_view
+
+
+class DonorViews(dict):
+    # BJ 1명의 집계 결과
+    # "정산용" / "BJ용" 전체 정렬은 처음 꺼낼 때(엑셀 생성 시) 한 번만 수행
+    # "전체로그" 는 표준 로그 + 이 BJ 행 위치만 들고 있다가 꺼낼 때마다 잘라 줌
+    # (BJ별 로그 복사본을 캐시에 상주시키지 않음 — 표준 로그 1벌만 유지)
+    log_source = None
 
-    df["참여BJ"] = df[col_bj]
+    def __missing__(self, key):
+        if key == "전체로그" and self.log_source is not None:
+            log, rows = self.log_source
+            return log.take(rows).reset_index(drop=True)
+        if key not in ("정산용", "BJ용"):
+            raise KeyError(key)
+        self["정산용"], self["BJ용"] = sort_donor_views(self["후원자"])
+        return self[key]
 
-    return df[["참여BJ", "회차", "날짜", "시간", "아이디", "닉네임", "후원하트", "구분"]]
+    def get(self, key, default=None):
+        # dict.get 은 __missing__ 을 거치지 않으므로 직접 연결
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# ==========================================
+# 🔹 상위 N 순위 (미리보기 / 리더보드, 전체 정렬 없음)
+# ==========================================
+def top_donors_by_bj(donors: pd.DataFrame, n: int = 10) -> dict:
+    # donors: aggregate_donors 결과 → BJ별 상위 N 후원자
+    top = donors.groupby("참여BJ", sort=False)["후원하트"].nlargest(n)
+    rows = donors.loc[top.index.get_level_values(-1)]
+    return {
+        bj: bj_rows[["아이디", "닉네임", "후원하트", "구분"]].reset_index(drop=True)
+        for bj, bj_rows in rows.groupby("참여BJ", sort=False)
+    }
+
+
+def top_donors_overall(donors: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    # 여러 BJ 에 후원한 아이디는 합산, 닉네임은 가장 많이 후원한 BJ 기준
+    by_id = donors.groupby("아이디", sort=False).agg(
+        후원하트=("후원하트", "sum"),
+        참여BJ수=("참여BJ", "nunique"),
+    )
+    top = by_id.nlargest(n, "후원하트")
+    best = donors.loc[donors.groupby("아이디", sort=False)["후원하트"].idxmax(), ["아이디", "닉네임", "구분"]]
+    return (
+        top.reset_index()
+        .merge(best, on="아이디", how="left")
+        [["아이디", "닉네임", "후원하트", "참여BJ수", "구분"]]
+    )
+
+
+def top_bjs(donors: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    by_bj = (
+        donors.groupby(["참여BJ", "구분"], sort=False)["후원하트"]
+        .sum()
+        .unstack(fill_value=0)
+    )
+    for col in ("일반", "제휴"):
+        if col not in by_bj.columns:
+            by_bj[col] = 0
+    by_bj["총합"] = by_bj["일반"] + by_bj["제휴"]
+    by_bj.columns.name = None
+    return by_bj.nlargest(n, "총합")[["일반", "제휴", "총합"]].reset_index()
+
+
+def donor_leaderboard(donors: pd.DataFrame, n: int = 10) -> dict:
+    # donors: aggregate_donors 결과 (process_prepared 에 넘긴 것과 같은 표 — 다시 합산하지 않음)
+    return {
+        "BJ": top_bjs(donors, n),
+        "후원자": top_donors_overall(donors, n),
+        "BJ별": top_donors_by_bj(donors, n),
+    }
 
 
 # ==========================================
@@ -100,57 +397,27 @@ def process_dataframe(df: pd.DataFrame):
     if df is None or df.empty:
         return None
 
-    result = {}
-
-    for bj, bj_df in df.groupby("참여BJ"):
-
-        # =====================================
-        # 1️⃣ 아이디 + 닉네임별 합산
-        # =====================================
-        nick_sum = (
-            bj_df.groupby(["아이디", "닉네임"])["후원하트"]
-            .sum()
-            .reset_index()
-        )
-
-        # 각 아이디에서 가장 하트 많이 받은 닉네임 선택
-        idx = nick_sum.groupby("아이디")["후원하트"].idxmax()
-        representative = nick_sum.loc[idx]
+    return process_prepared(df)
 
-        # 아이디 기준 총합
-        total_sum = (
-            bj_df.groupby("아이디")["후원하트"]
-            .sum()
-            .reset_index()
-        )
-
-        merged = pd.merge(
-            total_sum,
-            representative[["아이디", "닉네임"]],
-            on="아이디",
-            how="left"
-        )
 
-        merged["구분"] = merged["아이디"].apply(classify_heart)
+def process_prepared(df: pd.DataFrame, donors: pd.DataFrame | None = None):
+    # clean_and_prepare 결과(표준 로그)를 받아 BJ별 집계
+    # donors: 이미 만든 aggregate_donors(df) 결과가 있으면 재사용 (순위 미리보기와 같은 표 공유)
 
-        # =====================================
-        # 2️⃣ 정산용 정렬
-        # 일반 위 / 제휴 아래 / 각 그룹 내 내림차순
-        # =====================================
-        normal = merged[merged["구분"] == "일반"].sort_values("후원하트", ascending=False)
-        partner = merged[merged["구분"] == "제휴"].sort_values("후원하트", ascending=False)
+    # 후원자 합산은 전체 BJ 한 번에, 정렬은 DonorViews 가 필요할 때 수행
+    if donors is None:
+        donors = aggregate_donors(df)
+    donor_rows = donors.groupby("참여BJ").indices
 
-        settlement_view = pd.concat([normal, partner]).reset_index(drop=True)
+    result = {}
 
-        # =====================================
-        # 3️⃣ BJ용 정렬 (전체 통합 내림차순)
-        # =====================================
-        bj_view = merged.sort_values("후원하트", ascending=False).reset_index(drop=True)
+    # BJ별 로그는 행 위치만 (groupby 로 BJ마다 복사본을 만들지 않음)
+    for bj, rows in sorted(df.groupby("참여BJ").indices.items()):
 
-        result[bj] = {
-            "정산용": settlement_view,
-            "BJ용": bj_view,
-            "전체로그": bj_df.reset_index(drop=True)
-        }
+        views = DonorViews(
+            후원자=donors.take(donor_rows[bj]).reset_index(drop=True)
+        )
+        views.log_source = (df, rows)
+        result[bj] = views
 
     return result
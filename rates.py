@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from cube import HeartCube
+
+
+# 표준정산시트 요율 (J3 정산비율 / J5 협력지원율 — J4 하트단가는 정산비율 × 100)
+DEFAULT_RATES = {"정산비율": 0.45, "협력지원율": 0.05}
+TAX_RATE = 0.1
+
+SETTLEMENT_COLUMNS = [
+    "참여BJ", "정산비율", "협력지원율", "하트단가", "일반", "제휴",
+    "일반정산금", "협력지원금", "제휴정산금", "공급가액", "세액", "합계",
+]
+
+
+def normalize_rates(rates: dict | None) -> dict:
+    # 빠진 항목은 기본값, 부동소수 오차 정리 (캐시 키 / 변경 여부 비교용)
+    rates = {**DEFAULT_RATES, **(rates or {})}
+    return {key: round(float(rates[key]), 6) for key in DEFAULT_RATES}
+
+
+def is_default(rates: dict | None) -> bool:
+    return normalize_rates(rates) == normalize_rates(DEFAULT_RATES)
+
+
+def heart_unit(rates: dict) -> float:
+    # 하트단가: =$J$3*100
+    return round(rates["정산비율"] * 100, 6)
+
+
+def support_unit(rates: dict) -> float:
+    # 협력지원 하트당 금액: =IF($J$5>1,$J$5/100,$J$5)*100 (5 로 넣어도 5% 로 처리)
+    rate = rates["협력지원율"]
+    return round((rate / 100 if rate > 1 else rate) * 100, 6)
+
+
+# ==========================================
+# 🔹 원 단위 처리 (캐시값 / 요율 패널 / 시트 수식 공통 규칙)
+# ==========================================
+# 줄마다(회차 정산금, 일반/협력지원/제휴 공급가액, 각 세액) 원 미만 버림 → 합계는 버린 값의 합
+# 부동소수 오차로 1원 모자라지 않게 소수 MONEY_DECIMALS 자리에서 먼저 반올림
+MONEY_DECIMALS = 6
+
+
+def won(value):
+    # 스칼라는 int, 배열은 int64 배열
+    truncated = np.trunc(np.round(value, MONEY_DECIMALS))
+    if np.ndim(truncated):
+        return truncated.astype("int64")
+    return int(truncated)
+
+
+def won_formula(expr: str) -> str:
+    # won() 과 같은 규칙의 엑셀 식 (= 없이)
+    return f"ROUNDDOWN(ROUND({expr},{MONEY_DECIMALS}),0)"
+
+
+def tax_formula(expr: str) -> str:
+    return won_formula(f"{expr}*{TAX_RATE:g}")
+
+
+def amount(hearts, unit: float) -> int:
+    # 하트 × 단가
+    return won(hearts * unit)
+
+
+# ==========================================
+# 🔹 정산 금액 (표준정산시트 수식 / 캐시값과 같은 계산)
+# ==========================================
+def settlement_amounts(normal_total: int, partner_total: int, rates: dict | None = None) -> dict:
+    rates = normalize_rates(rates)
+    unit = heart_unit(rates)
+    normal_amount = amount(normal_total, unit)
+    support_amount = amount(normal_total, support_unit(rates))
+    partner_amount = amount(partner_total, unit)
+    # 시트와 같이 줄마다 세액을 버린 뒤 합산
+    supply = normal_amount + support_amount + partner_amount
+    tax = won(normal_amount * TAX_RATE) + won(support_amount * TAX_RATE) + won(partner_amount * TAX_RATE)
+    return {
+        "하트단가": unit,
+        "일반정산금": normal_amount,
+        "협력지원금": support_amount,
+        "제휴정산금": partner_amount,
+        "공급가액": supply,
+        "세액": tax,
+        "합계": supply + tax,
+    }
+
+
+def settlement_table(cube: HeartCube, rates_by_bj: dict | None = None) -> pd.DataFrame:
+    # BJ별 요율로 정산 금액 일괄 계산 (큐브의 BJ × 일반/제휴 합계만 사용 — 로그 재처리 없음)
+    totals = cube.pivot(["참여BJ"])
+    rates_by_bj = rates_by_bj or {}
+    rates = [normalize_rates(rates_by_bj.get(bj)) for bj in totals["참여BJ"]]
+    settle_rate = np.array([r["정산비율"] for r in rates], dtype="float64")
+    support_rate = np.array([r["협력지원율"] for r in rates], dtype="float64")
+
+    normal = totals["일반"].to_numpy(dtype="float64")
+    partner = totals["제휴"].to_numpy(dtype="float64")
+    unit = np.round(settle_rate * 100, 6)
+    support = np.round(np.where(support_rate > 1, support_rate / 100, support_rate) * 100, 6)
+
+    normal_amount = won(normal * unit)
+    support_amount = won(normal * support)
+    partner_amount = won(partner * unit)
+    supply = normal_amount + support_amount + partner_amount
+    tax = won(normal_amount * TAX_RATE) + won(support_amount * TAX_RATE) + won(partner_amount * TAX_RATE)
+    table = pd.DataFrame({
+        "참여BJ": totals["참여BJ"],
+        "정산비율": settle_rate,
+        "협력지원율": support_rate,
+        "하트단가": unit,
+        "일반": totals["일반"],
+        "제휴": totals["제휴"],
+        "일반정산금": normal_amount,
+        "협력지원금": support_amount,
+        "제휴정산금": partner_amount,
+        "공급가액": supply,
+        "세액": tax,
+        "합계": supply + tax,
+    })
+    return table[SETTLEMENT_COLUMNS]
@@ -0,0 +1,171 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processor import DonorViews, aggregate_donors
+
+
+# 정산일자별 부분합 저장 위치 — 소스 폴더가 아니라 사용자 데이터 폴더
+# BJ_DATA_DIR(데이터 폴더) 또는 BJ_ROLLUP_DIR(롤업 폴더 직접 지정) 환경변수로 변경 가능
+DATA_DIR = Path(os.environ.get("BJ_DATA_DIR", Path.home() / ".bj-settlement"))
+ROLLUP_DIR = Path(os.environ.get("BJ_ROLLUP_DIR", DATA_DIR / "rollups"))
+
+ROLLUP_KEYS = ["정산일자", "참여BJ", "아이디", "닉네임", "구분"]
+
+# 롤업 파일 이름에 붙이는 원본 digest 길이
+ROLLUP_DIGEST_CHARS = 16
+
+
+# ==========================================
+# 🔹 일자별 롤업 생성 / 저장
+# ==========================================
+def build_daily_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    # df: clean_and_prepare 결과(표준 로그)
+    # (정산일자, BJ, 아이디, 닉네임, 구분) 단위 하트 합계 + 후원 건수
+    rows = df[df["정산일자"].notna()]
+    if rows.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ["후원하트", "후원건수"])
+
+    return (
+        rows.groupby(ROLLUP_KEYS, sort=False)["후원하트"]
+        .agg(후원하트="sum", 후원건수="count")
+        .reset_index()
+    )
+
+
+def _rollup_path(business_date, root: Path, digest: str) -> Path:
+    return root / f"{pd.Timestamp(business_date):%Y-%m-%d}_{digest[:ROLLUP_DIGEST_CHARS]}.pkl"
+
+
+def _rollup_date(path: Path):
+    # 파일 이름 앞부분이 정산일자 (이전 형식 "YYYY-MM-DD.pkl" 도 그대로 읽음)
+    return pd.Timestamp(path.stem.split("_")[0]).date()
+
+
+def source_rollups(df: pd.DataFrame, sources: list) -> list:
+    # df: 여러 파일을 합친(concat, ignore_index) 뒤 clean_and_prepare 한 표준 로그 (원래 행 번호 유지)
+    # sources: [(원본 파일 내용 digest, 행 수), ...] — 합친 순서대로
+    # → [(digest, 그 파일만의 일자별 롤업), ...]
+    ends = np.cumsum([rows for _, rows in sources])
+    owner = np.searchsorted(ends, df.index.to_numpy(), side="right")
+    return [(digest, build_daily_rollup(df[owner == idx])) for idx, (digest, _) in enumerate(sources)]
+
+
+def _write_rollup(day: pd.DataFrame, path: Path):
+    tmp_path = path.with_suffix(".tmp")
+    day.reset_index(drop=True).to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_rollups(sources: list, root: Path = ROLLUP_DIR) -> list:
+    # sources: source_rollups 결과 [(digest, 그 파일의 일자별 롤업), ...] — 한 번에 올린(처리한) 파일 묶음
+    # 묶음에 들어 있는 정산일자마다 그 날짜의 출처 집합을 이 묶음의 파일들로 교체
+    # - 정정한 내보내기를 다시 올리면 이전 파일 몫은 지워짐 → 같은 날짜가 두 번 합산되지 않음
+    # - 같은 날짜의 부분 / 중간 내보내기는 한 묶음으로 함께 올려야 모두 남음 (읽을 때 합침)
+    # - 묶음에 없는 정산일자의 롤업은 그대로 둠
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    by_date = {}
+    for digest, rollup in sources:
+        for business_date, day in rollup.groupby("정산일자"):
+            by_date.setdefault(pd.Timestamp(business_date), []).append((digest, day))
+
+    for business_date, days in sorted(by_date.items()):
+        keep = set()
+        for digest, day in days:
+            path = _rollup_path(business_date, root, digest)
+            _write_rollup(day, path)
+            keep.add(path.name)
+        # 새 파일을 다 쓴 뒤 이전 출처(이전 형식 "YYYY-MM-DD.pkl" 포함) 삭제
+        for path in _date_files(business_date, root):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+    return [business_date.date() for business_date in sorted(by_date)]
+
+
+def _date_files(business_date, root: Path) -> list:
+    day = f"{pd.Timestamp(business_date):%Y-%m-%d}"
+    return [root / f"{day}.pkl", *root.glob(f"{day}_*.pkl")]
+
+
+def discard_rollups(digest: str, root: Path = ROLLUP_DIR) -> int:
+    # 원본 파일 1개 몫의 롤업 전부 삭제 (스풀에서 파일이 빠지거나 내용이 바뀐 경우)
+    removed = 0
+    for path in Path(root).glob(f"*_{digest[:ROLLUP_DIGEST_CHARS]}.pkl"):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def available_dates(root: Path = ROLLUP_DIR) -> list:
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted({_rollup_date(p) for p in root.glob("*.pkl")})
+
+
+def _period_files(start, end, root: Path) -> list:
+    if not root.exists():
+        return []
+    return sorted(p for p in root.glob("*.pkl") if start <= _rollup_date(p) <= end)
+
+
+def rollup_signature(start, end, root: Path = ROLLUP_DIR) -> tuple:
+    # start ~ end 롤업 파일 (이름, 수정 시각, 크기) — 파일이 바뀌면 달라지는 캐시 키 (없으면 빈 튜플)
+    signature = []
+    for path in _period_files(start, end, Path(root)):
+        stat = path.stat()
+        signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def load_rollups(start, end, root: Path = ROLLUP_DIR) -> pd.DataFrame:
+    # start ~ end (양끝 포함) 정산일자 롤업 병합
+    frames = [pd.read_pickle(path) for path in _period_files(start, end, Path(root))]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ["후원하트", "후원건수"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# ==========================================
+# 🔹 롤업 기반 기간 집계
+# ==========================================
+def _type_pivot(rollup: pd.DataFrame, keys: list) -> pd.DataFrame:
+    pivot = (
+        rollup.groupby(keys + ["구분"])["후원하트"]
+        .sum()
+        .unstack(fill_value=0)
+        .reset_index()
+    )
+    if "일반" not in pivot.columns:
+        pivot["일반"] = 0
+    if "제휴" not in pivot.columns:
+        pivot["제휴"] = 0
+    pivot["총합"] = pivot["일반"] + pivot["제휴"]
+    pivot.columns.name = None
+    return pivot[keys + ["일반", "제휴", "총합"]]
+
+
+def daily_totals(rollup: pd.DataFrame) -> pd.DataFrame:
+    # 일자별집계: 정산일자 × BJ
+    return _type_pivot(rollup, ["정산일자", "참여BJ"])
+
+
+def bj_totals(rollup: pd.DataFrame) -> pd.DataFrame:
+    # 총합: BJ별 일반/제휴/총합
+    return _type_pivot(rollup, ["참여BJ"]).sort_values("총합", ascending=False)
+
+
+def process_rollup(rollup: pd.DataFrame):
+    # process_dataframe 과 같은 구조(정산용 / BJ용), 전체로그는 원본이 필요하므로 없음
+    if rollup.empty:
+        return None
+
+    donors = aggregate_donors(rollup)
+    return {
+        bj: DonorViews(후원자=bj_donors.reset_index(drop=True))
+        for bj, bj_donors in donors.groupby("참여BJ")
+    }
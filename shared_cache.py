@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# 프로세스 전체(모든 세션) 공용 캐시 용량 상한 (MB, 환경변수로 변경 가능)
+SHARED_CACHE_MB = float(os.environ.get("BJ_SHARED_CACHE_MB", "1024"))
+
+
+def content_digest(data) -> str:
+    # 업로드 파일 내용 기준 키 — 같은 파일을 올린 세션끼리만 같은 항목을 찾을 수 있음
+    return hashlib.sha256(data).hexdigest()
+
+
+def estimate_size(value) -> int:
+    # 캐시 항목 대략 크기 (DataFrame / dict / list / tuple 재귀, 그 외 0)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    # 생성 스레드가 DonorViews 를 채우는 중일 수 있으므로 먼저 스냅샷
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in list(value.values()))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in list(value))
+    if hasattr(value, "in_memory"):
+        return int(value.in_memory)
+    return 0
+
+
+class _Entry:
+    # 크기는 넣을 때 한 번만 잼 (큰 DataFrame 은 memory_usage(deep=True) 가 느림)
+    def __init__(self, value, sizeof, on_evict):
+        self.value = value
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.size = sizeof(value)
+
+
+class SharedCache:
+    # 내용 주소 기반 LRU 캐시 (스레드 안전)
+    # - 같은 키를 동시에 요청하면 한 세션만 계산하고 나머지는 기다렸다가 결과 공유
+    # - 비밀번호 게이트를 통과한 세션(authorized=True)만 읽기/쓰기 가능
+    # - 전체 크기가 상한을 넘으면 오래 안 쓴 항목부터 제거
+
+    def __init__(self, max_mb: float = SHARED_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+
+    @staticmethod
+    def _check(authorized: bool):
+        if not authorized:
+            raise PermissionError("인증되지 않은 세션은 공용 캐시를 사용할 수 없습니다.")
+
+    def get(self, key, authorized: bool):
+        self._check(authorized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def get_or_create(self, key, factory, authorized: bool, sizeof=estimate_size, on_evict=None):
+        self._check(authorized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 기다리는 동안 다른 세션이 계산을 끝냈을 수 있음
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry.value
+
+            try:
+                value = factory()
+                # 크기 계산은 전역 잠금 밖에서
+                entry = _Entry(value, sizeof, on_evict)
+
+                with self._lock:
+                    self._entries[key] = entry
+                    evicted = self._evict_locked()
+            finally:
+                # factory 가 실패해도 키 잠금은 남기지 않음
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+        for entry in evicted:
+            if entry.on_evict is not None:
+                entry.on_evict(entry.value)
+        return value
+
+    def discard(self, key, authorized: bool, expected=None):
+        # expected: 그 값이 들어 있을 때만 제거 (그 사이 같은 키로 새로 만든 항목은 건드리지 않음)
+        self._check(authorized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (expected is not None and entry.value is not expected):
+                return
+            del self._entries[key]
+        if entry.on_evict is not None:
+            entry.on_evict(entry.value)
+
+    def resize(self, key, authorized: bool):
+        # 넣은 뒤 크기가 바뀌는 항목(생성 작업 완료 등)만 다시 재고 상한 확인
+        self._check(authorized)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = entry.sizeof(entry.value)
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return
+            entry.size = size
+            evicted = self._evict_locked()
+        for other in evicted:
+            if other.on_evict is not None:
+                other.on_evict(other.value)
+
+    def _evict_locked(self) -> list:
+        total = sum(entry.size for entry in self._entries.values())
+
+        evicted = []
+        # 방금 넣은 항목(맨 뒤)은 남김
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.size
+            evicted.append(entry)
+        return evicted
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache:
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedCache()
+        return _shared_cache
@@ -0,0 +1,279 @@
+import datetime
+import re
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape as xml_escape
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+
+# ==========================================
+# 🔹 BJ 상세 로그 시트 조각 (한 번 렌더링 → 여러 통합문서에 이어붙임)
+# ==========================================
+# 상세 로그 컬럼: (로그 컬럼, 셀 종류)
+DETAIL_COLUMNS = [
+    ("날짜", "date"),
+    ("시간", "time"),
+    ("아이디", "text"),
+    ("닉네임", "text"),
+    ("후원하트", "number"),
+    ("구분", "text"),
+]
+
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+# 원형 행 값 — openpyxl 이 각 종류별 서식(날짜/시간/#,##0 + 테두리)을 만들게 하는 용도, 길이는 열너비에 영향 없게 짧게
+PROTOTYPE_VALUES = {
+    "date": datetime.date(1900, 1, 1),
+    "time": datetime.time(0, 0, 0),
+    "text": "-",
+    "number": 0,
+}
+
+
+def _style_token(idx: int) -> str:
+    # 통합문서마다 다른 스타일 번호 자리 (XML 에 나올 수 없는 문자로 감쌈)
+    return f"\x01{idx}\x01"
+
+
+def clean_text(values: pd.Series) -> pd.Series:
+    # 셀 문자열: 빈값 → "", XML 에 못 넣는 제어문자 제거
+    return values.fillna("").astype(str).str.replace(ILLEGAL_CHARACTERS_RE, "", regex=True)
+
+
+def _text_cells(values: pd.Series, token: str) -> pd.Series:
+    text = clean_text(values)
+    escaped = text.map(xml_escape)
+    # 앞뒤 공백은 xml:space="preserve" 가 있어야 유지됨
+    opening = pd.Series(f'<c s="{token}" t="inlineStr"><is><t>', index=text.index).where(
+        text == text.str.strip(), f'<c s="{token}" t="inlineStr"><is><t xml:space="preserve">'
+    )
+    cells = opening + escaped + "</t></is></c>"
+    return cells.where(text != "", "<c/>")
+
+
+def _number_cells(numbers: pd.Series, token: str) -> pd.Series:
+    text = pd.Series(np.asarray(numbers, dtype="float64").astype(str), index=numbers.index)
+    text = text.str.removesuffix(".0")
+    cells = f'<c s="{token}" t="n"><v>' + text + "</v></c>"
+    return cells.where(numbers.notna(), "<c/>")
+
+
+def shared_string_cells(codes: np.ndarray, text: pd.Series, token: str) -> pd.Series:
+    # 공유 문자열 번호 셀 (빈 문자열은 빈 셀)
+    numbers = pd.Series(np.asarray(codes).astype(str), index=text.index)
+    cells = f'<c s="{token}" t="s"><v>' + numbers + "</v></c>"
+    return cells.where(text.to_numpy() != "", "<c/>")
+
+
+def render_cells(values: pd.Series, kind: str, token: str) -> pd.Series:
+    # 열 하나를 <c> 조각 문자열 Series 로 (행 위치 r 속성 없이 → 어느 행에서 시작해도 재사용 가능)
+    if kind == "text":
+        return _text_cells(values, token)
+    if kind == "number":
+        hearts = pd.to_numeric(values, errors="coerce").fillna(0).clip(lower=0).astype("int64")
+        return _number_cells(hearts, token)
+    if kind == "date":
+        serial = (pd.to_datetime(values, errors="coerce") - EXCEL_EPOCH).dt.days
+        return _number_cells(serial, token)
+    if kind == "time":
+        seconds = values.map(
+            lambda t: t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
+            if isinstance(t, datetime.time) else np.nan
+        )
+        return _number_cells(seconds / 86400, token)
+    raise ValueError(kind)
+
+
+def display_len(values: pd.Series, kind: str) -> int:
+    # auto_width 와 같은 기준(str(cell.value) 길이)
+    present = values.dropna()
+    if kind == "text":
+        present = present.astype(str)
+        present = present[present != ""]
+    if present.empty:
+        return 0
+    if kind == "date":
+        return 10
+    if kind == "number":
+        return int(pd.to_numeric(present, errors="coerce").fillna(0).clip(lower=0).astype("int64").astype(str).str.len().max())
+    return int(present.astype(str).str.len().max())
+
+
+class DetailLogPart:
+    # BJ 1명의 상세 로그(날짜/시간 정렬)를 <row> 조각으로 한 번만 렌더링
+    # 정산용/BJ용 상세내역, 표준정산시트 후원내역(앞에 회차 열), 총합산 BJ 시트가 같이 씀
+
+    def __init__(self, detail_df: pd.DataFrame):
+        if detail_df is None:
+            detail_df = pd.DataFrame(columns=[c for c, _ in DETAIL_COLUMNS])
+        if not detail_df.empty:
+            detail_df = detail_df.sort_values(by=["날짜", "시간"], ascending=True)
+        self.frame = detail_df
+        self._cells = {}
+        self._body = None
+        self._strings = None
+        self._string_codes = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def cells(self, column: str, kind: str, token: str) -> pd.Series:
+        key = (column, kind, token)
+        if key not in self._cells:
+            self._cells[key] = render_cells(self.frame[column], kind, token)
+        return self._cells[key]
+
+    def body(self) -> pd.Series:
+        # 상세 로그 6열을 행별로 이어붙인 조각 (스타일 토큰 1~6, 0번은 회차 열 자리)
+        if self._body is None:
+            body = pd.Series("", index=self.frame.index, dtype=object)
+            for offset, (column, kind) in enumerate(DETAIL_COLUMNS, start=1):
+                body = body + self.cells(column, kind, _style_token(offset))
+            self._body = body
+        return self._body
+
+    def rows_xml(self, round_values: pd.Series | None = None) -> str:
+        # round_values 가 있으면 맨 앞에 회차 열 (splice_rows 의 first_token=0 으로 이어붙임)
+        if self.empty:
+            return ""
+        if round_values is None:
+            rows = "<row>" + self.body() + "</row>"
+        else:
+            round_cells = render_cells(round_values.reindex(self.frame.index), "text", _style_token(0))
+            rows = "<row>" + round_cells + self.body() + "</row>"
+        return "".join(rows.tolist())
+
+    def strings(self) -> list[str]:
+        # 문자열 열(아이디/닉네임/구분) 고유값 — 직접 작성 통합문서(plainxlsx)의 공유 문자열 앞부분
+        if self._strings is None:
+            texts = [clean_text(self.frame[column]) for column, kind in DETAIL_COLUMNS if kind == "text"]
+            codes, uniques = pd.factorize(pd.concat(texts, ignore_index=True))
+            n = len(self.frame)
+            self._string_codes = [(codes[i * n:(i + 1) * n], text) for i, text in enumerate(texts)]
+            self._strings = uniques.tolist()
+        return self._strings
+
+    def shared_rows_xml(self, styles: dict) -> str:
+        # styles: {셀 종류: 스타일 번호} 고정 번호로, 문자열 셀은 strings() 순서 번호(t="s")로 렌더링
+        key = ("shared", tuple(sorted(styles.items())))
+        if key not in self._cells:
+            self.strings()
+            shared = iter(self._string_codes)
+            body = pd.Series("", index=self.frame.index, dtype=object)
+            for column, kind in DETAIL_COLUMNS:
+                if kind == "text":
+                    codes, text = next(shared)
+                    body = body + shared_string_cells(codes, text, str(styles[kind]))
+                else:
+                    body = body + self.cells(column, kind, str(styles[kind]))
+            self._cells[key] = "".join(("<row>" + body + "</row>").tolist())
+        return self._cells[key]
+
+    def display_lengths(self) -> list[int]:
+        return [display_len(self.frame[column], kind) for column, kind in DETAIL_COLUMNS]
+
+
+# ==========================================
+# 🔹 열 단위 행 묶음 쓰기 (iterrows 대신)
+# ==========================================
+def typed_column(values: pd.Series, kind: str) -> list:
+    # 열 하나를 셀 값 리스트로 한 번에 변환
+    # text: str(), heart: 숫자 변환 + 음수/빈값 0, int: 정수, raw: 그대로
+    if kind == "text":
+        return values.astype(str).tolist()
+    if kind == "heart":
+        return pd.to_numeric(values, errors="coerce").fillna(0).clip(lower=0).astype("int64").tolist()
+    if kind == "int":
+        return values.astype("int64").tolist()
+    if kind == "raw":
+        return values.tolist()
+    raise ValueError(kind)
+
+
+def append_columns(ws, df: pd.DataFrame, spec: list, number_formats: dict | None = None):
+    # spec: [(컬럼, 종류), ...] 순서대로 ws 다음 행부터 추가
+    # number_formats: {열 번호(1부터): 서식} — 추가한 행에만 적용
+    columns = [typed_column(df[column], kind) for column, kind in spec]
+    first_row = ws.max_row + 1
+    for values in zip(*columns):
+        ws.append(values)
+
+    if number_formats and len(df):
+        for col, fmt in number_formats.items():
+            for (cell,) in ws.iter_rows(min_row=first_row, max_row=ws.max_row, min_col=col, max_col=col):
+                cell.number_format = fmt
+
+
+def write_prototype_row(ws, row: int, with_round: bool = False):
+    # 실제 데이터 대신 원형 행 1줄만 openpyxl 로 작성 → 저장 후 splice_rows 가 실제 행으로 교체
+    kinds = (["text"] if with_round else []) + [kind for _, kind in DETAIL_COLUMNS]
+    for col, kind in enumerate(kinds, start=1):
+        cell = ws.cell(row=row, column=col, value=PROTOTYPE_VALUES[kind])
+        if kind == "number":
+            cell.number_format = "#,##0"
+
+
+def widen_for_part(ws, part: DetailLogPart, first_col: int = 1, min_w=18, max_w=45, pad=4):
+    # auto_width 는 원형 행만 보므로, 실제 로그 길이로 열너비 보정
+    for offset, length in enumerate(part.display_lengths()):
+        col_letter = ws.cell(row=1, column=first_col + offset).column_letter
+        width = min(max(length + pad, min_w), max_w)
+        current = ws.column_dimensions[col_letter].width or 0
+        ws.column_dimensions[col_letter].width = max(current, width)
+
+
+def sheet_part_name(wb, ws) -> str:
+    # openpyxl 저장 시 시트 파일 이름 (순서대로 sheet1.xml, sheet2.xml ...)
+    return f"xl/worksheets/sheet{wb.worksheets.index(ws) + 1}.xml"
+
+
+def splice_rows(sheet_xml: str, prototype_row: int, rows_xml: str, row_count: int, first_token: int = 1) -> str:
+    # 원형 행을 찾아 셀 스타일 번호를 읽고, 미리 렌더링한 행들로 교체
+    # first_token: 원형 행 첫 셀이 받을 토큰 번호 (회차 열 있으면 0, 없으면 1)
+    match = re.search(rf'<row r="{prototype_row}"[^>]*>(.*?)</row>', sheet_xml, flags=re.DOTALL)
+    if match is None:
+        return sheet_xml
+
+    styles = re.findall(r'<c\b[^>]*?\bs="(\d+)"', match.group(1))
+    for idx, style_id in enumerate(styles, start=first_token):
+        rows_xml = rows_xml.replace(_style_token(idx), style_id)
+
+    sheet_xml = sheet_xml[:match.start()] + rows_xml + sheet_xml[match.end():]
+
+    last_row = prototype_row + row_count - 1
+    last_col = re.findall(r'<c r="([A-Z]+)\d+"', match.group(1))
+    if last_col:
+        sheet_xml = re.sub(
+            r'<dimension ref="[^"]*"\s*/>',
+            f'<dimension ref="A1:{last_col[-1]}{max(last_row, prototype_row)}" />',
+            sheet_xml,
+            count=1
+        )
+    return sheet_xml
+
+
+def save_with_splices(data: BytesIO, splices: dict, patch=None) -> BytesIO:
+    # splices: {시트 파일 이름: (원형 행 번호, 행 조각 XML, 행 수, 첫 토큰 번호)}
+    # patch: 시트 파일 이름, XML → XML (수식 캐시값 등 추가 수정)
+    data.seek(0)
+    out = BytesIO()
+    with zipfile.ZipFile(data, "r") as zin, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            content = zin.read(item.filename)
+            if item.filename in splices or patch is not None and item.filename.startswith("xl/worksheets/"):
+                xml = content.decode("utf-8")
+                if patch is not None:
+                    xml = patch(item.filename, xml)
+                if item.filename in splices:
+                    xml = splice_rows(xml, *splices[item.filename])
+                content = xml.encode("utf-8")
+            zout.writestr(item, content)
+    out.seek(0)
+    return out
@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from cube import HeartCube
+from ingest import assign_rounds, read_upload
+from jobs import GenerationJob
+from processor import clean_and_prepare, process_prepared
+from rollup import (
+    ROLLUP_DIR,
+    bj_totals,
+    daily_totals,
+    discard_rollups,
+    load_rollups,
+    process_rollup,
+    save_rollups,
+    source_rollups,
+)
+from shared_cache import SharedCache, content_digest
+from workbooks import generate_artifacts, make_period_excel
+
+log = logging.getLogger(__name__)
+
+# 감시 주기(초) / 동시 작업 수 (환경변수로 변경 가능)
+SPOOL_POLL_SECONDS = float(os.environ.get("BJ_SPOOL_POLL_SECONDS", "30"))
+SPOOL_WORKERS = int(os.environ.get("BJ_SPOOL_WORKERS", "2"))
+
+# 마지막 수정 후 이 시간(초)이 지나야 처리 — 아직 복사 중인 파일 건너뜀
+SPOOL_SETTLE_SECONDS = 5
+
+SPOOL_SUFFIXES = (".csv", ".xlsx")
+MANIFEST_NAME = "spool_manifest.json"
+UNDATED_PERIOD = "미지정"
+
+
+def file_period(business_date) -> str:
+    # 정산 묶음 단위: 정산일자 기준 월 (기간 정산 화면 기본값과 같음)
+    if business_date is None:
+        return UNDATED_PERIOD
+    return f"{pd.Timestamp(business_date):%Y-%m}"
+
+
+def period_bounds(period: str):
+    start = pd.Timestamp(f"{period}-01").date()
+    end = (pd.Timestamp(start) + pd.offsets.MonthEnd(0)).date()
+    return start, end
+
+
+# ==========================================
+# 🔹 스풀 폴더 감시 서비스
+# ==========================================
+class SpoolService:
+    # 스풀 폴더에 떨어지는 플랫폼 내보내기(CSV/XLSX)를 읽어
+    # 정산월별로 일자별 롤업 + 기간정산 + BJ별 파일/총합산/ZIP 을 out_dir/<정산월>/ 에 미리 만들어 둠
+    # - 파일 내용(sha256) 기준으로 처리 기록(manifest) → 같은 파일을 다시 넣거나 재시작해도 다시 만들지 않음
+    # - 내용이 바뀌거나 파일이 추가/삭제된 정산월만 다시 생성
+    # - 파일 읽기 / 정산월 생성은 workers 개 스레드 풀에서 처리
+
+    def __init__(
+        self,
+        spool_dir,
+        out_dir,
+        workers: int = SPOOL_WORKERS,
+        rollup_root: Path = ROLLUP_DIR,
+        settle_seconds: float = SPOOL_SETTLE_SECONDS,
+    ):
+        self.spool_dir = Path(spool_dir)
+        self.out_dir = Path(out_dir)
+        self.rollup_root = Path(rollup_root)
+        self.settle_seconds = settle_seconds
+        self.pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="spool")
+        # 파싱 결과 재사용 (정산월 재생성 때 안 바뀐 파일은 다시 읽지 않음)
+        self.frames = SharedCache()
+        self.manifest_path = self.out_dir / MANIFEST_NAME
+        self.manifest = self._load_manifest()
+        self._jobs: dict = {}
+        self._stop = threading.Event()
+
+    # ---------- 처리 기록 ----------
+    def _load_manifest(self) -> dict:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        return {"files": {}, "periods": {}}
+
+    def _save_manifest(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    # ---------- 스캔 ----------
+    def pending_files(self) -> list[Path]:
+        # 다 복사된(일정 시간 수정 없는) 내보내기 파일
+        if not self.spool_dir.exists():
+            return []
+        now = time.time()
+        return sorted(
+            p for p in self.spool_dir.iterdir()
+            if p.is_file()
+            and p.suffix.lower() in SPOOL_SUFFIXES
+            and not p.name.startswith((".", "~$"))
+            and now - p.stat().st_mtime >= self.settle_seconds
+        )
+
+    def _read(self, path: Path):
+        data = path.read_bytes()
+        digest = content_digest(data)
+        entry = self.manifest["files"].get(path.name)
+        if entry is not None and entry["digest"] == digest:
+            return path.name, digest, None
+        try:
+            with open(path, "rb") as f:
+                frame = self.frames.get_or_create(
+                    ("파일", digest, path.name),
+                    lambda: read_upload(f, path.name),
+                    authorized=True,
+                )
+        except Exception as e:
+            return path.name, digest, e
+        return path.name, digest, frame
+
+    def scan(self) -> set:
+        # 새로 들어오거나 바뀌거나 사라진 파일을 반영하고, 다시 만들어야 할 정산월 반환
+        files = self.manifest["files"]
+        present = {p.name: p for p in self.pending_files()}
+        dirty = set()
+
+        for name in list(files):
+            if name not in present and not (self.spool_dir / name).exists():
+                removed = files.pop(name)
+                period = removed["period"]
+                # 빠진 파일 몫의 일자별 롤업도 삭제
+                if removed["digest"] is not None and removed.get("duplicate_of") is None:
+                    discard_rollups(removed["digest"], self.rollup_root)
+                if period is not None:
+                    dirty.add(period)
+                # 이 파일의 중복본은 다시 읽어서 대신 반영
+                for other in [n for n, entry in files.items() if entry.get("duplicate_of") == name]:
+                    del files[other]
+
+        # 같은 내용이 이미 다른 이름으로 들어와 있으면 중복 합산하지 않음
+        active = {entry["digest"]: name for name, entry in files.items() if entry["period"] is not None}
+
+        for name, digest, frame in self.pool.map(self._read, present.values()):
+            if frame is None:
+                continue
+            previous = files.get(name)
+            if previous is not None and previous["digest"] not in (None, digest) and previous["period"] is not None:
+                # 내용이 바뀐 파일: 이전 내용 몫의 롤업 삭제
+                discard_rollups(previous["digest"], self.rollup_root)
+            original = active.get(digest)
+            if original is not None and original != name:
+                log.info("%s: %s 와 같은 파일 — 건너뜀", name, original)
+                if previous is not None and previous["period"] is not None:
+                    dirty.add(previous["period"])
+                files[name] = {"digest": digest, "business_date": None, "period": None, "duplicate_of": original}
+                dirty.add(None)
+                continue
+            if isinstance(frame, Exception):
+                # 읽을 수 없는 파일: 내용이 바뀔 때까지 다시 시도하지 않음
+                log.warning("%s 읽기 실패: %s", name, frame)
+                if previous is not None and previous["period"] is not None:
+                    dirty.add(previous["period"])
+                files[name] = {"digest": digest, "business_date": None, "period": None, "error": str(frame)}
+                dirty.add(None)
+                continue
+            business_date = frame[1]
+            period = file_period(business_date)
+            if previous is not None and previous["period"] is not None:
+                dirty.add(previous["period"])
+            files[name] = {
+                "digest": digest,
+                "business_date": None if business_date is None else str(business_date),
+                "period": period,
+            }
+            active[digest] = name
+            dirty.add(period)
+            log.info("%s → 정산일자 %s (%s)", name, business_date, period)
+
+        if dirty:
+            self._save_manifest()
+        dirty.discard(None)
+        return dirty
+
+    # ---------- 정산월 생성 ----------
+    def _period_entries(self, period: str) -> tuple[list, list]:
+        # ([(업로드 순번, df, 정산일자), ...], [파일 내용 digest, ...]) — 정산일자, 파일명 순
+        names = sorted(
+            (name for name, entry in self.manifest["files"].items() if entry["period"] == period),
+            key=lambda name: (self.manifest["files"][name]["business_date"] or "", name),
+        )
+        entries = []
+        digests = []
+        for idx, name in enumerate(names, start=1):
+            path = self.spool_dir / name
+            digest = self.manifest["files"][name]["digest"]
+            with open(path, "rb") as f:
+                df, business_date = self.frames.get_or_create(
+                    ("파일", digest, name),
+                    lambda: read_upload(f, name),
+                    authorized=True,
+                )
+            entries.append((idx, df, business_date))
+            digests.append(digest)
+        return entries, digests
+
+    def build_period(self, period: str) -> dict:
+        target = self.out_dir / period
+        entries, digests = self._period_entries(period)
+        if not entries:
+            shutil.rmtree(target, ignore_errors=True)
+            return {"period": period, "files": 0}
+
+        dfs, round_labels = assign_rounds(entries, len(entries))
+        merged = pd.concat(dfs, ignore_index=True)
+        canonical = clean_and_prepare(merged)
+        if canonical is None or canonical.empty:
+            return {"period": period, "files": len(entries), "bjs": 0}
+        result = process_prepared(canonical)
+
+        building = self.out_dir / f".building-{period}"
+        shutil.rmtree(building, ignore_errors=True)
+        building.mkdir(parents=True)
+
+        # 1) 기간 집계: 일자별 롤업 저장 후 이 달 전체로 기간정산 파일
+        if period != UNDATED_PERIOD:
+            sources = [(digest, len(df)) for digest, df in zip(digests, dfs)]
+            save_rollups(source_rollups(canonical, sources), self.rollup_root)
+            rollup = load_rollups(*period_bounds(period), root=self.rollup_root)
+            if not rollup.empty:
+                period_file = make_period_excel(daily_totals(rollup), bj_totals(rollup), process_rollup(rollup))
+                (building / f"{period}_기간정산.xlsx").write_bytes(period_file.getbuffer())
+
+        # 2) 업로드 화면과 같은 생성 묶음 (BJ별 파일 + 총합산 + ZIP)
+        prefix = None
+        if len(entries) == 1 and entries[0][2] is not None:
+            prefix = f"{pd.Timestamp(entries[0][2]):%m.%d}"
+        job = GenerationJob(
+            ("스풀", period),
+            generate_artifacts,
+            merged,
+            result,
+            len(entries) > 1,
+            round_labels,
+            True,
+            prefix,
+            HeartCube(canonical),
+        )
+        self._jobs[period] = job
+        try:
+            job.start().wait()
+        finally:
+            self._jobs.pop(period, None)
+        if job.error is not None:
+            raise job.error
+        if job.cancelled:
+            shutil.rmtree(building, ignore_errors=True)
+            return {"period": period, "cancelled": True}
+
+        store = job.result["store"]
+        try:
+            for name, artifact in store.artifacts.items():
+                with artifact.open() as src, open(building / name, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        finally:
+            store.cleanup()
+
+        # 완성된 폴더로 통째 교체 (생성 중에는 이전 결과 그대로 제공)
+        previous = self.out_dir / f".previous-{period}"
+        shutil.rmtree(previous, ignore_errors=True)
+        if target.exists():
+            os.replace(target, previous)
+        os.replace(building, target)
+        shutil.rmtree(previous, ignore_errors=True)
+
+        return {
+            "period": period,
+            "files": len(entries),
+            "bjs": len(result),
+            "rows": len(canonical),
+            "warnings": job.result["warnings"],
+        }
+
+    def run_once(self) -> list:
+        dirty = self.scan()
+        summaries = []
+        futures = {period: self.pool.submit(self.build_period, period) for period in sorted(dirty)}
+        for period, future in futures.items():
+            try:
+                summary = future.result()
+            except Exception as e:
+                log.exception("%s 생성 실패", period)
+                # 실패한 내용(digest)을 기록만 하고 그대로 둠 → 이 정산월 파일이 바뀌거나 추가/삭제될 때만 다시 시도
+                for entry in self.manifest["files"].values():
+                    if entry["period"] == period:
+                        entry["error"] = str(e)
+                self.manifest["periods"][period] = {
+                    "failed_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+                    "error": str(e),
+                }
+                self._save_manifest()
+                continue
+            for entry in self.manifest["files"].values():
+                if entry["period"] == period:
+                    entry.pop("error", None)
+            self.manifest["periods"][period] = {
+                "built_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+                **{k: v for k, v in summary.items() if k != "period"},
+            }
+            self._save_manifest()
+            summaries.append(summary)
+            log.info("%s 생성 완료: %s", period, summary)
+        return summaries
+
+    def serve_forever(self, interval: float = SPOOL_POLL_SECONDS):
+        log.info("%s 감시 시작 (→ %s, %g초 간격)", self.spool_dir, self.out_dir, interval)
+        try:
+            while not self._stop.is_set():
+                self.run_once()
+                self._stop.wait(interval)
+        finally:
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+        for job in list(self._jobs.values()):
+            job.cancel()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
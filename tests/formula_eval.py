@@ -0,0 +1,142 @@
+# 테스트용 최소 수식 계산기 — 생성한 통합문서의 캐시값이 수식 결과와 같은지 확인
+# 이 저장소 시트에 나오는 식만 지원: 셀/범위 참조, 사칙연산, &, 비교, SUM / SUMIF / IF / ROUND / ROUNDDOWN / TEXT
+import math
+import re
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+from io import BytesIO
+
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+TOKEN = re.compile(r"""
+    (?P<str>"[^"]*")
+  | (?P<range>(?:'(?P<range_sheet>[^']+)'!)?\$?(?P<c1>[A-Z]+)\$?(?P<r1>\d+)?:\$?(?P<c2>[A-Z]+)\$?(?P<r2>\d+)?)
+  | (?P<cell>(?:'(?P<cell_sheet>[^']+)'!)?\$?(?P<col>[A-Z]+)\$?(?P<row>\d+))
+  | (?P<func>[A-Z]+)\(
+  | (?P<num>\d+(?:\.\d+)?)
+  | (?P<op><>|>=|<=|[-+*/(),&<>=])
+  | (?P<space>\s+)
+""", re.VERBOSE)
+
+OPERATORS = {"&": "+", "=": "==", "<>": "!="}
+
+
+def _excel_round(value, digits, rounding):
+    quantum = Decimal(1).scaleb(-int(digits))
+    return float(Decimal(repr(float(value))).quantize(quantum, rounding=rounding))
+
+
+def _number(value):
+    return 0 if value is None or isinstance(value, str) else value
+
+
+class FormulaBook:
+    def __init__(self, data: bytes | BytesIO):
+        raw = data.getvalue() if isinstance(data, BytesIO) else data
+        self.formulas = load_workbook(BytesIO(raw))
+        self.cached = load_workbook(BytesIO(raw), data_only=True)
+        self._memo = {}
+        self._functions = {
+            "SUM": lambda *ranges: sum(_number(v) for r in ranges for v in (r if isinstance(r, list) else [r])),
+            "SUMIF": self._sumif,
+            "IF": lambda cond, a, b: a if cond else b,
+            "ROUND": lambda v, d: _excel_round(_number(v), d, ROUND_HALF_UP),
+            "ROUNDDOWN": lambda v, d: _excel_round(_number(v), d, ROUND_DOWN),
+            "TEXT": self._text,
+        }
+
+    @staticmethod
+    def _sumif(values, criterion, sums):
+        return sum(_number(s) for v, s in zip(values, sums) if v is not None and v == criterion)
+
+    @staticmethod
+    def _text(value, fmt):
+        assert fmt == "0%", fmt
+        return f"{_excel_round(_number(value) * 100, 0, ROUND_HALF_UP):.0f}%"
+
+    def formula_cells(self):
+        # [(시트 이름, 셀 주소), ...]
+        return [
+            (ws.title, cell.coordinate)
+            for ws in self.formulas.worksheets
+            for row in ws.iter_rows()
+            for cell in row
+            if isinstance(cell.value, str) and cell.value.startswith("=")
+        ]
+
+    def cached_value(self, sheet: str, ref: str):
+        return self.cached[sheet][ref].value
+
+    def value(self, sheet: str, ref: str):
+        key = (sheet, ref)
+        if key not in self._memo:
+            raw = self.formulas[sheet][ref].value
+            if isinstance(raw, str) and raw.startswith("="):
+                self._memo[key] = self.evaluate(sheet, raw[1:])
+            else:
+                self._memo[key] = raw
+        return self._memo[key]
+
+    def _range(self, sheet, c1, r1, c2, r2):
+        ws = self.formulas[sheet]
+        first, last = column_index_from_string(c1), column_index_from_string(c2)
+        top = int(r1) if r1 else 1
+        bottom = int(r2) if r2 else ws.max_row
+        return [
+            self.value(sheet, f"{col}{row}")
+            for row in range(top, bottom + 1)
+            for col in ([c1] if first == last else [c1, c2])
+        ]
+
+    def evaluate(self, sheet: str, formula: str):
+        source, pos = [], 0
+        while pos < len(formula):
+            match = TOKEN.match(formula, pos)
+            assert match is not None, f"지원하지 않는 식: {formula[pos:]!r}"
+            pos = match.end()
+            kind = match.lastgroup
+            if kind == "str":
+                source.append(repr(match.group("str")[1:-1]))
+            elif kind == "range":
+                source.append(
+                    f"_range({match.group('range_sheet') or sheet!r}, {match.group('c1')!r}, {match.group('r1')!r}, "
+                    f"{match.group('c2')!r}, {match.group('r2')!r})"
+                )
+            elif kind == "cell":
+                ref = f"{match.group('col')}{match.group('row')}"
+                source.append(f"_cell({match.group('cell_sheet') or sheet!r}, {ref!r})")
+            elif kind == "func":
+                source.append(f"_f[{match.group('func')!r}](")
+            elif kind == "num":
+                source.append(match.group("num"))
+            elif kind == "op":
+                op = match.group("op")
+                source.append(OPERATORS.get(op, op))
+        namespace = {
+            "_range": self._range,
+            "_cell": lambda s, r: self._scalar(self.value(s, r)),
+            "_f": self._functions,
+        }
+        return eval(" ".join(source), namespace)
+
+    @staticmethod
+    def _scalar(value):
+        # 빈 셀은 계산에서 0
+        return 0 if value is None else value
+
+
+def assert_cached_values_match(data, tolerance: float = 1e-9) -> int:
+    # 모든 수식 셀: 캐시값이 있어야 하고, 수식을 계산한 값과 같아야 함 → 확인한 셀 수 반환
+    book = FormulaBook(data)
+    cells = book.formula_cells()
+    for sheet, ref in cells:
+        expected = book.value(sheet, ref)
+        cached = book.cached_value(sheet, ref)
+        assert cached is not None, f"{sheet}!{ref}: 캐시값 없음"
+        if isinstance(expected, str):
+            assert cached == expected, f"{sheet}!{ref}: 캐시 {cached!r} ≠ 수식 {expected!r}"
+        else:
+            assert math.isclose(cached, expected, rel_tol=0, abs_tol=tolerance), (
+                f"{sheet}!{ref}: 캐시 {cached!r} ≠ 수식 {expected!r} ({book.formulas[sheet][ref].value})"
+            )
+    return len(cells)
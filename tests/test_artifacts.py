@@ -0,0 +1,32 @@
+import os
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from artifacts import ArtifactStore
+
+
+def open_handles() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_memory_artifact_downloads_bytes():
+    store = ArtifactStore(budget_mb=1)
+    artifact = store.add("a.xlsx", BytesIO(b"abc"))
+    assert not artifact.spilled
+    assert artifact.download_data() == b"abc"
+
+
+@pytest.mark.skipif(not Path("/proc/self/fd").exists(), reason="열린 핸들 수는 /proc 필요")
+def test_spilled_artifact_download_closes_file():
+    store = ArtifactStore(budget_mb=0)
+    artifact = store.add("a.xlsx", BytesIO(b"x" * 1000))
+    assert artifact.spilled
+
+    data = artifact.download_data()
+    assert callable(data)
+    before = open_handles()
+    for _ in range(20):
+        assert data() == b"x" * 1000
+    assert open_handles() == before
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from benchmarks.synthetic import make_export
+from processor import aggregate_donors, clean_and_prepare, donor_leaderboard, process_prepared
+
+
+def test_leaderboard_matches_full_sort_of_shared_donor_table():
+    canonical = clean_and_prepare(make_export(3000, bjs=6, donors=400, seed=5))
+    donors = aggregate_donors(canonical)
+    result = process_prepared(canonical, donors)
+    board = donor_leaderboard(donors, 5)
+
+    # 넘겨준 합산 표를 그대로 써도 BJ별 결과는 직접 합산한 것과 같음
+    for bj, views in process_prepared(canonical).items():
+        pd.testing.assert_frame_equal(result[bj]["BJ용"], views["BJ용"])
+
+    for bj, top in board["BJ별"].items():
+        expected = result[bj]["BJ용"]["후원하트"].head(5).tolist()
+        assert top["후원하트"].tolist() == expected
+
+    totals = canonical.groupby("참여BJ")["후원하트"].sum().sort_values(ascending=False)
+    assert board["BJ"]["총합"].tolist() == totals.head(5).tolist()
+
+    by_id = canonical.groupby("아이디")["후원하트"].sum().sort_values(ascending=False)
+    assert board["후원자"]["후원하트"].tolist() == by_id.head(5).tolist()
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 표준화 단계 최대 RSS 증가분 상한 (표준 로그 1벌 크기 배수)
+# 표준 로그 1벌 + 표준화 도중 임시 배열 — 원본 합본 / BJ별 복사본이 더 생기면 넘어감
+MAX_RATIO = 2.25
+
+
+@pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="RSS 측정은 /proc 필요")
+def test_prepare_peak_rss_stays_close_to_one_canonical_copy():
+    # 다른 테스트가 남긴 메모리와 섞이지 않게 새 프로세스에서 측정
+    # 정리 프로세스 풀은 자식 프로세스 RSS 라 빼고, 이 프로세스 안에서 표준화
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memory_check",
+         "--rows", "600000", "--workers", "1", "--max-ratio", str(MAX_RATIO)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
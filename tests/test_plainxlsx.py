@@ -0,0 +1,60 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from benchmarks.plain_writer import openpyxl_detail, openpyxl_donors, plain_detail, plain_donors
+from benchmarks.synthetic import make_export
+from processor import clean_and_prepare, process_prepared
+from sheetparts import DetailLogPart
+
+
+def saved(wb) -> BytesIO:
+    bio = BytesIO()
+    wb.save(bio)
+    bio.seek(0)
+    return bio
+
+
+def sheet_state(data: BytesIO) -> dict:
+    # 셀 값 / 서식 / 테두리 / 정렬 + 열너비 — 두 방식 결과 비교용
+    ws = load_workbook(data).active
+    cells = [
+        [
+            (cell.value, cell.number_format, cell.border.left.style, cell.alignment.horizontal)
+            for cell in row
+        ]
+        for row in ws.iter_rows()
+    ]
+    widths = {letter: dim.width for letter, dim in ws.column_dimensions.items() if dim.customWidth}
+    return {"cells": cells, "widths": widths, "dimension": ws.dimensions}
+
+
+@pytest.fixture(scope="module")
+def detail_log():
+    log = process_prepared(clean_and_prepare(make_export(500, bjs=1, donors=80, seed=7)))
+    frame = next(iter(log.values()))["전체로그"].copy()
+    # 앞뒤 공백 / XML 특수문자 / 빈 닉네임
+    frame.iloc[0, frame.columns.get_loc("닉네임")] = "  공백 닉네임 "
+    frame.iloc[1, frame.columns.get_loc("닉네임")] = "<&\"'>"
+    frame.iloc[2, frame.columns.get_loc("닉네임")] = ""
+    return frame
+
+
+def test_donor_table_matches_openpyxl():
+    donors = pd.DataFrame({
+        "아이디": [f"user{i}@ka" for i in range(200)] + ["partner@sk"],
+        "닉네임": [f"닉네임{i % 17}" for i in range(200)] + [" 제휴 "],
+        "후원하트": [(i * 7919) % 100_000 for i in range(201)],
+    })
+    assert sheet_state(plain_donors(donors).save()) == sheet_state(saved(openpyxl_donors(donors)))
+
+
+def test_detail_log_matches_openpyxl(detail_log):
+    part = DetailLogPart(detail_log)
+    expected = sheet_state(saved(openpyxl_detail(part)))
+    actual = sheet_state(plain_detail(DetailLogPart(detail_log)).save())
+    assert actual["cells"] == expected["cells"]
+    assert actual["widths"] == expected["widths"]
+    assert actual["dimension"] == expected["dimension"]
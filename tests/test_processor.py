@@ -0,0 +1,13 @@
+import pandas as pd
+
+from processor import split_id_nickname, split_id_nicknames
+
+
+def test_split_id_nicknames_matches_row_rule():
+    values = [
+        "a(b)", " a ( b ) ", "a", "a(b", "a)b(", "a(b(c))", "(x)", "",
+        "a(b)\n(c)", "a ( )", "x@sk(제휴)", None, float("nan"), 12,
+    ]
+    for series in (pd.Series(values, dtype=object), pd.Series([v for v in values if isinstance(v, str)], dtype=str)):
+        ids, nicks = split_id_nicknames(series)
+        assert list(zip(ids, nicks)) == [split_id_nickname(v) for v in series]
@@ -0,0 +1,74 @@
+import pytest
+
+from benchmarks.synthetic import make_export
+from cube import HeartCube
+from processor import clean_and_prepare, process_prepared
+from rates import normalize_rates, settlement_amounts, settlement_table, won
+from tests.formula_eval import FormulaBook
+from workbooks import make_standard_settlement_excel
+
+FRACTIONAL_RATES = [
+    {"정산비율": 0.455, "협력지원율": 0.035},
+    {"정산비율": 0.333, "협력지원율": 5},
+    {"정산비율": 0.4175, "협력지원율": 0.0125},
+]
+
+
+@pytest.fixture(scope="module")
+def canonical():
+    return clean_and_prepare(make_export(900, bjs=3, donors=80, seed=11))
+
+
+def sheet_amounts(data) -> dict:
+    # 표준정산시트 요약 표를 수식으로 계산 (캐시값이 아니라 엑셀이 계산할 값)
+    book = FormulaBook(data)
+    ws = book.formulas["정산시트"]
+    rows = {ws[f"B{row}"].value: row for row in range(1, ws.max_row + 1) if ws[f"B{row}"].value}
+    final_row = max(row for row in range(1, ws.max_row + 1) if ws[f"A{row}"].value == "합계")
+
+    def value(ref):
+        return book.value("정산시트", ref)
+
+    return {
+        "하트단가": value("J4"),
+        "일반정산금": value(f"D{rows['일반하트']}"),
+        "협력지원금": value(f"D{rows['협력지원금']}"),
+        "제휴정산금": value(f"D{rows['제휴하트']}"),
+        "공급가액": value(f"D{final_row}"),
+        "세액": value(f"E{final_row}"),
+        "합계": value(f"F{final_row}"),
+    }
+
+
+def test_won_truncates_after_clearing_float_noise():
+    assert won(318.5) == 318
+    assert won(0.1 * 3 * 10) == 3  # 2.9999999999999996
+    assert list(won([4549.9999999, 10.75])) == [4550, 10]
+
+
+@pytest.mark.parametrize("rates", FRACTIONAL_RATES)
+def test_settlement_amounts_match_sheet_formulas(canonical, rates):
+    bj, views = next(iter(process_prepared(canonical).items()))
+    cube = HeartCube(canonical)
+    normal, partner = cube.type_totals(bj)
+
+    expected = sheet_amounts(make_standard_settlement_excel(views["전체로그"], bj, cube=cube, rates=rates))
+    assert settlement_amounts(normal, partner, rates) == pytest.approx(expected, abs=1e-9)
+
+
+def test_settlement_table_matches_sheet_formulas(canonical):
+    result = process_prepared(canonical)
+    cube = HeartCube(canonical)
+    rates_by_bj = dict(zip(result, FRACTIONAL_RATES))
+
+    table = settlement_table(cube, rates_by_bj).set_index("참여BJ")
+    assert set(table.index) == set(result)
+    for bj, views in result.items():
+        rates = normalize_rates(rates_by_bj[bj])
+        expected = sheet_amounts(make_standard_settlement_excel(views["전체로그"], bj, cube=cube, rates=rates))
+        row = table.loc[bj]
+        for column, value in expected.items():
+            assert row[column] == pytest.approx(value, abs=1e-9), (bj, column)
+        # 패널 한 줄 계산(settlement_amounts)과도 같은 값
+        normal, partner = cube.type_totals(bj)
+        assert settlement_amounts(normal, partner, rates)["합계"] == row["합계"]
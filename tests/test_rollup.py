@@ -0,0 +1,113 @@
+import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import make_export
+
+from processor import clean_and_prepare, process_prepared
+from rollup import (
+    available_dates,
+    bj_totals,
+    build_daily_rollup,
+    daily_totals,
+    load_rollups,
+    process_rollup,
+    save_rollups,
+    source_rollups,
+)
+
+FIRST = datetime.date(2026, 10, 1)
+SECOND = datetime.date(2026, 10, 2)
+
+
+def export(rows: list) -> pd.DataFrame:
+    # rows: [(후원시간, 아이디, 하트, BJ), ...]
+    return pd.DataFrame({
+        "후원시간": [r[0] for r in rows],
+        "후원아이디(닉네임)": [f"{r[1]}({r[1].upper()})" for r in rows],
+        "후원하트": [r[2] for r in rows],
+        "참여BJ": [r[3] for r in rows],
+    })
+
+
+def upload(files: dict, root):
+    # files: {digest: 원본 DataFrame} — app / 스풀과 같은 방식으로 합쳐서 저장
+    dfs = list(files.values())
+    canonical = clean_and_prepare(pd.concat(dfs, ignore_index=True))
+    sources = [(digest, len(df)) for digest, df in zip(files, dfs)]
+    return save_rollups(source_rollups(canonical, sources), root)
+
+
+def totals(root) -> dict:
+    table = bj_totals(load_rollups(FIRST, SECOND, root))
+    return dict(zip(table["참여BJ"], table["총합"]))
+
+
+def test_corrected_reupload_replaces_same_date(tmp_path):
+    original = export([("2026-10-01 16:00:00", "a", 100, "BJ1"), ("2026-10-01 17:00:00", "b", 50, "BJ2")])
+    other_day = export([("2026-10-02 16:00:00", "c", 7, "BJ1")])
+    assert upload({"a" * 64: original, "b" * 64: other_day}, tmp_path) == [FIRST, SECOND]
+    assert totals(tmp_path) == {"BJ1": 107, "BJ2": 50}
+
+    # 같은 정산일자의 정정본(내용이 달라 digest 도 다름) → 교체, 이중 합산 없음
+    corrected = export([("2026-10-01 16:00:00", "a", 90, "BJ1"), ("2026-10-01 17:00:00", "b", 50, "BJ2")])
+    assert upload({"c" * 64: corrected}, tmp_path) == [FIRST]
+    assert totals(tmp_path) == {"BJ1": 97, "BJ2": 50}
+    assert len(list(tmp_path.glob("2026-10-01_*.pkl"))) == 1
+    # 묶음에 없던 날짜는 그대로
+    assert available_dates(tmp_path) == [FIRST, SECOND]
+
+
+def test_partial_exports_uploaded_together_are_merged(tmp_path):
+    morning = export([("2026-10-01 16:00:00", "a", 10, "BJ1")])
+    evening = export([("2026-10-01 22:00:00", "b", 20, "BJ1")])
+    upload({"a" * 64: morning, "b" * 64: evening}, tmp_path)
+    assert totals(tmp_path) == {"BJ1": 30}
+
+    # 같은 묶음을 다시 올려도 그대로
+    upload({"a" * 64: morning, "b" * 64: evening}, tmp_path)
+    assert totals(tmp_path) == {"BJ1": 30}
+
+
+def test_legacy_whole_day_file_is_replaced(tmp_path):
+    # 이전 형식(정산일자 통째, 출처 없음) 파일도 새 묶음이 교체
+    legacy = build_daily_rollup(clean_and_prepare(export([("2026-10-01 16:00:00", "a", 5, "BJ1")])))
+    legacy.to_pickle(tmp_path / "2026-10-01.pkl")
+    assert totals(tmp_path) == {"BJ1": 5}
+
+    upload({"a" * 64: export([("2026-10-01 16:00:00", "a", 8, "BJ1")])}, tmp_path)
+    assert totals(tmp_path) == {"BJ1": 8}
+    assert not (tmp_path / "2026-10-01.pkl").exists()
+
+
+def test_rollup_period_matches_raw_reprocessing(tmp_path):
+    # 일자별로 따로 올린 롤업을 합친 결과 = 원본 로그 전체를 다시 처리한 결과
+    days = [make_export(1500, day=f"2026-10-{day:02d}", bjs=4, donors=120, seed=day) for day in (1, 2, 3)]
+    for idx, df in enumerate(days):
+        upload({f"{idx}" * 64: df}, tmp_path)
+    canonical = clean_and_prepare(pd.concat(days, ignore_index=True))
+    dates = sorted(canonical["정산일자"].dropna().unique())
+    rollup = load_rollups(dates[0], dates[-1], tmp_path)
+
+    # 일자별집계 (정산일자 × BJ)
+    raw_daily = (
+        canonical.dropna(subset=["정산일자"])
+        .pivot_table(index=["정산일자", "참여BJ"], columns="구분", values="후원하트", aggfunc="sum", fill_value=0)
+        .reset_index()
+    )
+    daily = daily_totals(rollup).sort_values(["정산일자", "참여BJ"]).reset_index(drop=True)
+    for column in ("일반", "제휴"):
+        assert daily[column].tolist() == raw_daily.sort_values(["정산일자", "참여BJ"])[column].tolist()
+
+    # 총합
+    raw_totals = canonical.dropna(subset=["정산일자"]).groupby("참여BJ")["후원하트"].sum()
+    totals = bj_totals(rollup).set_index("참여BJ")["총합"]
+    assert totals.sort_index().tolist() == raw_totals.sort_index().tolist()
+
+    # BJ별 후원자 표 (정산용 / BJ용)
+    raw = process_prepared(canonical[canonical["정산일자"].notna()])
+    merged = process_rollup(rollup)
+    assert set(merged) == set(raw)
+    for bj, views in raw.items():
+        for key in ("정산용", "BJ용"):
+            pd.testing.assert_frame_equal(merged[bj][key], views[key], check_dtype=False)
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from shared_cache import SharedCache
+
+MB = 1024 * 1024
+
+
+def sized(cache: SharedCache, key, size_mb: float, evicted: list | None = None):
+    # 값 = 키, 크기는 size_mb 로 고정
+    on_evict = evicted.append if evicted is not None else None
+    return cache.get_or_create(
+        key, lambda: key, authorized=True, sizeof=lambda _: int(size_mb * MB), on_evict=on_evict
+    )
+
+
+def test_unauthorized_sessions_cannot_read_or_write():
+    cache = SharedCache(max_mb=1)
+    sized(cache, "a", 0.1)
+    calls = []
+    with pytest.raises(PermissionError):
+        cache.get("a", authorized=False)
+    with pytest.raises(PermissionError):
+        cache.get_or_create("b", lambda: calls.append("b"), authorized=False)
+    with pytest.raises(PermissionError):
+        cache.discard("a", authorized=False)
+    with pytest.raises(PermissionError):
+        cache.resize("a", authorized=False)
+    # 거부된 요청은 아무것도 계산하거나 지우지 않음
+    assert calls == []
+    assert cache.get("a", authorized=True) == "a"
+
+
+def test_least_recently_used_entries_are_evicted_over_budget():
+    cache = SharedCache(max_mb=1)
+    evicted = []
+    sized(cache, "a", 0.4, evicted)
+    sized(cache, "b", 0.4, evicted)
+    cache.get("a", authorized=True)  # a 를 최근 사용으로
+    sized(cache, "c", 0.4, evicted)
+
+    assert evicted == ["b"]
+    assert cache.get("b", authorized=True) is None
+    assert cache.get("a", authorized=True) == "a"
+    assert cache.size == int(0.8 * MB)
+
+
+def test_newest_entry_is_kept_even_if_larger_than_budget():
+    cache = SharedCache(max_mb=1)
+    evicted = []
+    sized(cache, "a", 0.5, evicted)
+    sized(cache, "big", 3, evicted)
+    assert evicted == ["a"]
+    assert cache.get("big", authorized=True) == "big"
+
+
+def test_resize_rechecks_budget():
+    cache = SharedCache(max_mb=1)
+    evicted = []
+    sizes = {"job": 0.1}
+    sized(cache, "a", 0.5, evicted)
+    cache.get_or_create("job", lambda: "job", authorized=True, sizeof=lambda _: int(sizes["job"] * MB))
+    sizes["job"] = 0.8  # 생성이 끝나 커진 경우
+    cache.resize("job", authorized=True)
+    assert evicted == ["a"]
+    assert cache.size == int(0.8 * MB)
+
+
+def test_discard_with_expected_keeps_replaced_entry():
+    cache = SharedCache(max_mb=1)
+    evicted = []
+    old = cache.get_or_create("k", lambda: object(), authorized=True, on_evict=evicted.append)
+    cache.discard("k", authorized=True, expected=old)
+    new = cache.get_or_create("k", lambda: object(), authorized=True, on_evict=evicted.append)
+
+    # 이미 교체된 키를 예전 값으로 지우려 하면 무시
+    cache.discard("k", authorized=True, expected=old)
+    assert cache.get("k", authorized=True) is new
+    assert evicted == [old]
+
+
+def test_concurrent_requests_compute_once():
+    cache = SharedCache(max_mb=1)
+    calls = []
+    started = threading.Barrier(8)
+    results = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def request():
+        started.wait()
+        results.append(cache.get_or_create("k", factory, authorized=True))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+
+
+def test_failed_factory_does_not_leave_key_locked():
+    cache = SharedCache(max_mb=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_create("k", fail, authorized=True)
+    assert cache.get_or_create("k", lambda: "ok", authorized=True) == "ok"
+    assert cache._key_locks == {}
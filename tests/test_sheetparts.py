@@ -0,0 +1,90 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.synthetic import make_export
+from processor import clean_and_prepare, process_prepared
+from sheetparts import (
+    DETAIL_COLUMNS,
+    DetailLogPart,
+    append_columns,
+    save_with_splices,
+    sheet_part_name,
+    splice_rows,
+    write_prototype_row,
+)
+from workbooks import apply_border
+
+HEADER = ["날짜", "시간", "아이디", "닉네임", "하트", "구분"]
+DETAIL_FORMATS = {1: "yyyy-mm-dd", 2: "h:mm:ss", 5: "#,##0"}
+
+
+@pytest.fixture(scope="module")
+def detail_log():
+    result = process_prepared(clean_and_prepare(make_export(300, bjs=1, donors=50, seed=9)))
+    frame = next(iter(result.values()))["전체로그"].copy()
+    frame.iloc[0, frame.columns.get_loc("닉네임")] = " 앞뒤 공백 "
+    frame.iloc[1, frame.columns.get_loc("닉네임")] = "a<b & c>"
+    return frame
+
+
+def rows_state(data: BytesIO) -> tuple:
+    ws = load_workbook(data).active
+    return [
+        [(cell.value, cell.number_format, cell.border.left.style) for cell in row]
+        for row in ws.iter_rows()
+    ], ws.dimensions
+
+
+def saved(wb) -> BytesIO:
+    bio = BytesIO()
+    wb.save(bio)
+    bio.seek(0)
+    return bio
+
+
+def openpyxl_rows(part: DetailLogPart, rounds: pd.Series | None = None) -> BytesIO:
+    # 기준: 같은 행을 openpyxl 로 셀마다 작성
+    wb = Workbook()
+    ws = wb.active
+    frame = part.frame
+    spec = [(column, "heart" if kind == "number" else "raw") for column, kind in DETAIL_COLUMNS]
+    formats = DETAIL_FORMATS
+    if rounds is not None:
+        frame = frame.assign(회차=rounds.reindex(frame.index).astype(str))
+        spec = [("회차", "raw")] + spec
+        formats = {col + 1: fmt for col, fmt in formats.items()}
+    ws.append((["회차"] if rounds is not None else []) + HEADER)
+    append_columns(ws, frame, spec, formats)
+    apply_border(ws)
+    return saved(wb)
+
+
+def spliced_rows(part: DetailLogPart, rounds: pd.Series | None = None) -> BytesIO:
+    # 원형 행 1줄만 openpyxl 로 쓰고 저장 후 미리 렌더링한 행으로 교체
+    wb = Workbook()
+    ws = wb.active
+    ws.append((["회차"] if rounds is not None else []) + HEADER)
+    write_prototype_row(ws, 2, with_round=rounds is not None)
+    apply_border(ws)
+    first_token = 0 if rounds is not None else 1
+    splices = {sheet_part_name(wb, ws): (2, part.rows_xml(rounds), len(part), first_token)}
+    return save_with_splices(saved(wb), splices)
+
+
+def test_spliced_rows_match_openpyxl(detail_log):
+    part = DetailLogPart(detail_log)
+    assert rows_state(spliced_rows(part)) == rows_state(openpyxl_rows(part))
+
+
+def test_spliced_rows_with_round_column_match_openpyxl(detail_log):
+    part = DetailLogPart(detail_log)
+    rounds = pd.Series([f"{idx % 3 + 1}회차" for idx in range(len(detail_log))], index=detail_log.index)
+    assert rows_state(spliced_rows(part, rounds)) == rows_state(openpyxl_rows(part, rounds))
+
+
+def test_splice_rows_without_prototype_is_unchanged():
+    xml = '<worksheet><dimension ref="A1:F1"/><sheetData><row r="1"><c r="A1" s="1"/></row></sheetData></worksheet>'
+    assert splice_rows(xml, 2, "<row/>", 1) == xml
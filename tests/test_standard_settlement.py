@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from benchmarks.synthetic import make_export
+from processor import clean_and_prepare, process_prepared
+from tests.formula_eval import FormulaBook, assert_cached_values_match
+from workbooks import make_standard_settlement_excel
+
+
+@pytest.fixture(scope="module")
+def bj_log():
+    # 하트 수가 홀수 → 기본 단가 45 에서 정산금이 10 의 배수가 아니라 세액에 소수가 생기는 데이터
+    df = make_export(400, bjs=1, donors=60, seed=3)
+    df.loc[0, "후원아이디(닉네임)"] = "partner@sk(제휴)"
+    result = process_prepared(clean_and_prepare(df))
+    bj, views = next(iter(result.items()))
+    return bj, views["전체로그"]
+
+
+@pytest.mark.parametrize("rates", [
+    None,
+    {"정산비율": 0.455, "협력지원율": 0.035},
+    {"정산비율": 0.333, "협력지원율": 5},
+])
+def test_cached_values_match_formulas(bj_log, rates):
+    bj, log = bj_log
+    data = make_standard_settlement_excel(log, bj, rates=rates)
+
+    checked = assert_cached_values_match(data)
+    assert checked > 20
+
+    # 빠른 열기(전체 재계산 없음)가 유지되는지
+    wb = load_workbook(data)
+    assert not wb.calculation.fullCalcOnLoad
+
+
+def test_line_amounts_are_not_multiples_of_ten(bj_log):
+    # 위 비교가 실제로 소수 세액 경우를 다루는지 확인
+    bj, log = bj_log
+    book = FormulaBook(make_standard_settlement_excel(log, bj))
+    sheet = book.formulas["정산시트"]
+    supply_cells = [
+        f"D{row}" for row in range(1, sheet.max_row + 1)
+        if isinstance(sheet[f"D{row}"].value, str) and "ROUNDDOWN" in sheet[f"D{row}"].value
+    ]
+    assert any(book.cached_value("정산시트", ref) % 10 for ref in supply_cells)
+
+
+def test_unbounded_ranges_force_full_recalc(bj_log):
+    bj, log = bj_log
+    wb = load_workbook(make_standard_settlement_excel(log, bj, bounded_ranges=False))
+    assert wb.calculation.fullCalcOnLoad
+
+
+def test_round_totals_sum_rounded_round_amounts():
+    # 회차마다 버린 정산금의 합 = 합계 줄 (분수 단가에서는 전체 하트 × 단가 를 버린 값과 다를 수 있음)
+    raw = pd.DataFrame({
+        "후원시간": ["2026-10-01 16:00:00", "2026-10-01 17:00:00", "2026-10-02 16:00:00"],
+        "후원아이디(닉네임)": ["a(A)", "b(B)", "c(C)"],
+        "후원하트": [3, 5, 7],
+        "참여BJ": ["BJ", "BJ", "BJ"],
+    })
+    log = process_prepared(clean_and_prepare(raw))["BJ"]["전체로그"]
+    data = make_standard_settlement_excel(log, "BJ", rates={"정산비율": 0.455, "협력지원율": 0.05})
+    assert_cached_values_match(data)
+
+    sheet = load_workbook(data, data_only=True)["정산시트"]
+    # 8 × 45.5 = 364, 7 × 45.5 = 318.5 → 318  ⇒ 합계 682 (15 × 45.5 = 682.5 → 682 와 우연히 같지 않게 확인)
+    assert [sheet["C4"].value, sheet["C5"].value, sheet["C6"].value] == [364, 318, 682]
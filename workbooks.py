@@ -0,0 +1,879 @@
+import os
+import re
+from io import BytesIO
+from xml.sax.saxutils import escape as xml_escape
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
+
+from artifacts import ArtifactStore
+from exports import safe_filename
+from cube import HeartCube
+from overlap import MULTI_DONOR_COLUMNS, PAIR_COLUMNS, DonorBJMatrix
+from plainxlsx import PlainWorkbook
+from processor import clean_and_prepare, resolve_columns
+from rates import TAX_RATE, amount, heart_unit, normalize_rates, settlement_amounts, tax_formula, won, won_formula
+from sheetparts import (
+    DetailLogPart,
+    append_columns,
+    save_with_splices,
+    sheet_part_name,
+    widen_for_part,
+    write_prototype_row,
+)
+
+
+# ==================================================
+# 📦 엑셀 공통 유틸 (콤마/테두리/열너비)
+# ==================================================
+thin = Side(style="thin")
+all_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+def apply_border(ws):
+    # "값이 있는 셀" 전부 테두리 (범위는 한 번만 계산 — 행마다 max_column 을 다시 세면 느림)
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value not in (None, ""):
+                cell.border = all_border
+
+def auto_width(ws, min_w=18, max_w=45, pad=4):
+    # 기본 넓이 유지 + 데이터 길이 따라 자동 확장
+    for col in ws.columns:
+        max_len = 0
+        col_letter = col[0].column_letter
+        for cell in col:
+            if cell.value not in (None, ""):
+                max_len = max(max_len, len(str(cell.value)))
+        ws.column_dimensions[col_letter].width = min(max(max_len + pad, min_w), max_w)
+
+def format_header_row(ws, header_row=1):
+    # 헤더 정렬(선택)
+    for c in range(1, ws.max_column + 1):
+        cell = ws.cell(row=header_row, column=c)
+        if cell.value not in (None, ""):
+            cell.alignment = Alignment(horizontal="center")
+
+
+# ==================================================
+# 📁 BJ별 파일 생성 (정산용 / BJ용) - 콤마/테두리/열너비 적용
+# ==================================================
+def make_excel(df: pd.DataFrame, bj_name: str, detail_df=None, detail_part=None, total: int | None = None) -> BytesIO:
+    # 단순 표 2장(정산표 / 상세내역)뿐이라 openpyxl 없이 시트 XML 을 바로 씀 (plainxlsx)
+    if detail_part is None and detail_df is not None:
+        detail_part = DetailLogPart(detail_df)
+    has_detail = detail_part is not None and not detail_part.empty
+
+    # 공유 문자열은 상세 로그 문자열부터 (조각을 BJ 파일 2개에서 그대로 재사용)
+    wb = PlainWorkbook(detail_part.strings() if has_detail else None)
+    ws = wb.create_sheet("정산표")
+
+    # 상단 합계 (집계 큐브에서 받으면 그대로, 없으면 후원자 표에서 합산)
+    if total is None:
+        total = int(pd.to_numeric(df["후원하트"], errors="coerce").fillna(0).sum())
+    ws.append(["", bj_name, total], ["text", "text", "number"])
+
+    # 헤더
+    ws.append(["후원아이디", "닉네임", "후원하트"], "header")
+
+    # 데이터 (열 단위로 한 번에 렌더링)
+    ws.append_columns(df, [("아이디", "text"), ("닉네임", "text"), ("후원하트", "heart")])
+    ws.auto_width(min_w=18, max_w=45, pad=4)
+
+    # ==================================================
+    # 📄 상세내역 시트 추가
+    # ==================================================
+    if has_detail:
+        detail_ws = wb.create_sheet("상세내역")
+        detail_ws.append(["날짜", "시간", "아이디", "닉네임", "하트", "구분"], "header")
+        detail_ws.append_part(detail_part)
+        detail_ws.auto_width(min_w=18, max_w=45, pad=4)
+
+    return wb.save()
+
+
+# ==================================================
+# 📦 집계 시트 (총합산 / 기간정산 공용)
+# ==================================================
+def write_daily_sheet(wb: Workbook, s1: pd.DataFrame, col_date: str, col_bj: str):
+    ws1 = wb.create_sheet("일자별집계")
+    ws1.append(["날짜", "BJ", "일반", "제휴", "총합"])
+    format_header_row(ws1, 1)
+
+    append_columns(
+        ws1,
+        s1,
+        [(col_date, "raw"), (col_bj, "raw"), ("일반", "int"), ("제휴", "int"), ("총합", "int")],
+        {3: "#,##0", 4: "#,##0", 5: "#,##0"}
+    )
+
+    ws1.column_dimensions["A"].width = 20
+    ws1.column_dimensions["B"].width = 28
+    ws1.column_dimensions["C"].width = 16
+    ws1.column_dimensions["D"].width = 16
+    ws1.column_dimensions["E"].width = 16
+    auto_width(ws1, min_w=18, max_w=45, pad=4)
+    apply_border(ws1)
+    return ws1
+
+def write_total_sheet(wb: Workbook, s2: pd.DataFrame, col_bj: str, links: dict | None = None):
+    # links: {BJ: (분할 파일 이름, 시트 이름)} — 있으면 "파일" 열에 해당 BJ 시트로 가는 링크
+    ws2 = wb.create_sheet("총합")
+    ws2.append(["BJ", "일반", "제휴", "총합"] + (["파일"] if links else []))
+    format_header_row(ws2, 1)
+
+    append_columns(
+        ws2,
+        s2,
+        [(col_bj, "raw"), ("일반", "int"), ("제휴", "int"), ("총합", "int")],
+        {2: "#,##0", 3: "#,##0", 4: "#,##0"}
+    )
+
+    if links:
+        for row, bj in enumerate(s2[col_bj], start=2):
+            if bj not in links:
+                continue
+            file_name, sheet_title = links[bj]
+            cell = ws2.cell(row=row, column=5, value=file_name)
+            # 시트 이름 안의 ' 는 '' 로 (엑셀 참조 규칙)
+            cell.hyperlink = f"""{file_name}#'{sheet_title.replace("'", "''")}'!A1"""
+            cell.style = "Hyperlink"
+        ws2.column_dimensions["E"].width = 24
+
+    ws2.column_dimensions["A"].width = 28
+    ws2.column_dimensions["B"].width = 16
+    ws2.column_dimensions["C"].width = 16
+    ws2.column_dimensions["D"].width = 16
+    auto_width(ws2, min_w=18, max_w=45, pad=4)
+    apply_border(ws2)
+    return ws2
+
+
+# ==================================================
+# 📆 기간 정산 파일 (일자별 롤업만 사용, 원본 로그 불필요)
+# 1) 일자별집계  2) 총합  3) BJ별 후원자 순위(각 BJ 1시트)
+# ==================================================
+def make_period_excel(daily: pd.DataFrame, totals: pd.DataFrame, views: dict) -> BytesIO:
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    write_daily_sheet(wb, daily, "정산일자", "참여BJ")
+    write_total_sheet(wb, totals, "참여BJ")
+
+    for bj, bj_views in views.items():
+        ws = wb.create_sheet(safe_filename(bj)[:31])
+        donors = bj_views["정산용"]
+
+        ws["A1"] = "총하트"
+        ws["B1"] = int(donors["후원하트"].sum())
+        ws["B1"].number_format = "#,##0"
+
+        ws.append([])
+        ws.append(["후원아이디", "닉네임", "후원하트", "구분"])
+        format_header_row(ws, header_row=3)
+
+        append_columns(
+            ws,
+            donors,
+            [("아이디", "text"), ("닉네임", "text"), ("후원하트", "int"), ("구분", "raw")],
+            {3: "#,##0"}
+        )
+
+        ws.column_dimensions["A"].width = 26
+        ws.column_dimensions["B"].width = 22
+        ws.column_dimensions["C"].width = 16
+        ws.column_dimensions["D"].width = 12
+        auto_width(ws, min_w=18, max_w=45, pad=4)
+        apply_border(ws)
+
+    bio = BytesIO()
+    wb.save(bio)
+    bio.seek(0)
+    return bio
+
+
+# ==================================================
+# 🔗 BJ 교차 후원 리포트 (후원자 × BJ 희소 행렬에서 바로 작성)
+# 1) BJ쌍별 겹침  2) 겹침행렬(BJ × BJ 공통 후원자 수)  3) 여러 BJ 후원자
+# ==================================================
+def make_overlap_excel(matrix: DonorBJMatrix, min_shared: int = 1, min_bjs: int = 2) -> BytesIO:
+    wb = Workbook()
+    ws1 = wb.active
+    ws1.title = "BJ쌍별겹침"
+    ws1.append(PAIR_COLUMNS)
+    format_header_row(ws1)
+    append_columns(
+        ws1,
+        matrix.overlap_pairs(min_shared),
+        [("BJ_A", "text"), ("BJ_B", "text"), ("A후원자수", "int"), ("B후원자수", "int"), ("공통후원자수", "int"),
+         ("겹침비율", "raw"), ("A공통하트", "int"), ("B공통하트", "int"), ("공통하트", "int")],
+        {3: "#,##0", 4: "#,##0", 5: "#,##0", 6: "0.0%", 7: "#,##0", 8: "#,##0", 9: "#,##0"}
+    )
+    auto_width(ws1, min_w=12, max_w=30, pad=4)
+    apply_border(ws1)
+
+    ws2 = wb.create_sheet("겹침행렬")
+    overlap = matrix.overlap_matrix()
+    ws2.append(["참여BJ"] + [str(bj) for bj in overlap.columns])
+    format_header_row(ws2)
+    for bj, counts in zip(overlap.index, overlap.to_numpy().tolist()):
+        ws2.append([str(bj)] + counts)
+    for row in ws2.iter_rows(min_row=2, min_col=2):
+        for cell in row:
+            cell.number_format = "#,##0"
+    ws2.freeze_panes = "B2"
+    auto_width(ws2, min_w=10, max_w=30, pad=2)
+    apply_border(ws2)
+
+    ws3 = wb.create_sheet("여러BJ후원자")
+    ws3.append(MULTI_DONOR_COLUMNS)
+    format_header_row(ws3)
+    append_columns(
+        ws3,
+        matrix.multi_bj_donors(min_bjs),
+        [("아이디", "text"), ("닉네임", "text"), ("참여BJ수", "int"), ("후원하트", "int"), ("참여BJ", "text")],
+        {3: "#,##0", 4: "#,##0"}
+    )
+    ws3.column_dimensions["A"].width = 26
+    ws3.column_dimensions["B"].width = 22
+    auto_width(ws3, min_w=14, max_w=60, pad=4)
+    apply_border(ws3)
+
+    bio = BytesIO()
+    wb.save(bio)
+    bio.seek(0)
+    return bio
+
+
+# ==================================================
+# 📦 총합산 파일 (여러 파일 업로드 시) - 3시트 구조
+# 1) 일자별집계  2) 총합  3) BJ별 상세(각 BJ 1시트)
+# ==================================================
+# 총합산 분할 기본값 (0 = 나누지 않음, 환경변수로 변경 가능)
+TOTAL_SHARD_BJS = int(os.environ.get("BJ_TOTAL_SHARD_BJS", "0"))
+TOTAL_SHARD_ROWS = int(os.environ.get("BJ_TOTAL_SHARD_ROWS", "0"))
+
+
+def plan_total_shards(bjs: list, row_counts: dict, max_bjs: int = 0, max_rows: int = 0) -> list[list]:
+    # BJ 순서대로 채우다가 BJ 수 / 로그 행 수 상한을 넘으면 다음 파일로 (BJ 1명은 쪼개지 않음)
+    shards = [[]]
+    shard_rows = 0
+    for bj in bjs:
+        rows = row_counts.get(bj, 0)
+        current = shards[-1]
+        full = (max_bjs and len(current) >= max_bjs) or (max_rows and shard_rows + rows > max_rows)
+        if current and full:
+            shards.append([])
+            shard_rows = 0
+        shards[-1].append(bj)
+        shard_rows += rows
+    return [shard for shard in shards if shard]
+
+
+def _total_inputs(df: pd.DataFrame, parts: dict | None, cube: HeartCube | None):
+    # (큐브, BJ → DetailLogPart 함수) — 큐브/조각이 없으면 원본을 한 번만 표준화 + BJ별로 한 번에 분할
+    canonical = None
+    if cube is None:
+        canonical = clean_and_prepare(df)
+        cube = HeartCube(canonical)
+
+    logs = None
+
+    def part_for(bj):
+        nonlocal canonical, logs
+        part = parts.get(bj) if parts is not None else None
+        if part is not None:
+            return part
+        if logs is None:
+            if canonical is None:
+                canonical = clean_and_prepare(df)
+            logs = {bj: canonical.take(idx) for bj, idx in canonical.groupby("참여BJ", sort=False).indices.items()}
+        return DetailLogPart(logs[bj])
+
+    return cube, part_for
+
+
+def _has_total_columns(df: pd.DataFrame) -> bool:
+    schema = resolve_columns(df.columns)
+    return all(schema.get(role) for role in ("후원시간", "후원아이디", "후원하트", "참여BJ"))
+
+
+def write_bj_detail_sheets(wb: Workbook, bjs: list, part_for, cube: HeartCube) -> dict:
+    # BJ별 상세 (각 BJ 1시트) — 상세 로그는 DetailLogPart 조각을 저장 후 이어붙임
+    # 반환: save_with_splices 에 넘길 조각 정보
+    splices = {}
+    for bj in bjs:
+        ws = wb.create_sheet(str(bj))
+        part = part_for(bj)
+
+        normal_sum, partner_sum = cube.type_totals(bj)
+        total_sum = normal_sum + partner_sum
+
+        # 상단 한 줄 표시(일렬)
+        ws["A1"] = "총하트"
+        ws["B1"] = total_sum
+        ws["C1"] = "일반하트"
+        ws["D1"] = normal_sum
+        ws["E1"] = "제휴하트"
+        ws["F1"] = partner_sum
+        ws["B1"].number_format = "#,##0"
+        ws["D1"].number_format = "#,##0"
+        ws["F1"].number_format = "#,##0"
+
+        ws.append([])
+        ws.append(["날짜", "시간", "아이디", "닉네임", "하트", "구분"])
+        format_header_row(ws, header_row=3)
+
+        if not part.empty:
+            write_prototype_row(ws, 4)
+            splices[sheet_part_name(wb, ws)] = (4, part.rows_xml(), len(part), 1)
+
+        ws.column_dimensions["A"].width = 20
+        ws.column_dimensions["B"].width = 18
+        ws.column_dimensions["C"].width = 32
+        ws.column_dimensions["D"].width = 26
+        ws.column_dimensions["E"].width = 14
+        ws.column_dimensions["F"].width = 12
+        auto_width(ws, min_w=18, max_w=45, pad=4)
+        widen_for_part(ws, part, min_w=18, max_w=45, pad=4)
+        apply_border(ws)
+
+    return splices
+
+
+def make_total_excel(
+    df: pd.DataFrame,
+    parts: dict | None = None,
+    cube: HeartCube | None = None
+) -> BytesIO | None:
+    # 1) 일자별집계  2) 총합  3) BJ별 상세(각 BJ 1시트) 를 한 파일로
+    # parts: BJ별 DetailLogPart (BJ 파일 생성 때 만든 것 재사용, 없으면 여기서 만듦)
+    # cube: 업로드 묶음의 HeartCube — 일자별집계 / 총합 / BJ 시트 상단 합계는 모두 여기서 자름
+    if not _has_total_columns(df):
+        return None
+    cube, part_for = _total_inputs(df, parts, cube)
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    write_daily_sheet(wb, cube.pivot(["날짜", "참여BJ"]), "날짜", "참여BJ")
+    write_total_sheet(wb, cube.pivot(["참여BJ"]), "참여BJ")
+    splices = write_bj_detail_sheets(wb, cube.bj_order, part_for, cube)
+
+    bio = BytesIO()
+    wb.save(bio)
+    return save_with_splices(bio, splices)
+
+
+def make_total_excel_shards(
+    df: pd.DataFrame,
+    parts: dict | None = None,
+    cube: HeartCube | None = None,
+    max_bjs: int = TOTAL_SHARD_BJS,
+    max_rows: int = TOTAL_SHARD_ROWS,
+    base_name: str = "총합산"
+) -> list[tuple[str, BytesIO]] | None:
+    # BJ 가 많을 때 총합산을 여러 파일로 분할
+    # [(총합산.xlsx, 요약 파일), (총합산_01.xlsx, BJ 시트 묶음), ...]
+    # 요약 파일(일자별집계 / 총합)의 "파일" 열은 각 BJ 시트가 든 분할 파일로 링크 (같은 폴더에 풀어서 열기)
+    # 상한이 없거나 한 파일에 다 들어가면 기존 한 파일 총합산 그대로
+    if not _has_total_columns(df):
+        return None
+    cube, part_for = _total_inputs(df, parts, cube)
+
+    shards = plan_total_shards(cube.bj_order, cube.row_counts(), max_bjs, max_rows)
+    if len(shards) <= 1:
+        return [(f"{base_name}.xlsx", make_total_excel(df, parts, cube))]
+
+    files = []
+    links = {}
+    for shard_no, bjs in enumerate(shards, start=1):
+        name = f"{base_name}_{shard_no:02d}.xlsx"
+        wb = Workbook()
+        wb.remove(wb.active)
+        splices = write_bj_detail_sheets(wb, bjs, part_for, cube)
+        bio = BytesIO()
+        wb.save(bio)
+        files.append((name, save_with_splices(bio, splices)))
+        # 링크는 실제로 만들어진 시트 이름으로 (openpyxl 이 중복/금지 문자 이름을 바꿀 수 있음)
+        links.update({bj: (name, ws.title) for bj, ws in zip(bjs, wb.worksheets)})
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    write_daily_sheet(wb, cube.pivot(["날짜", "참여BJ"]), "날짜", "참여BJ")
+    write_total_sheet(wb, cube.pivot(["참여BJ"]), "참여BJ", links=links)
+    bio = BytesIO()
+    wb.save(bio)
+    bio.seek(0)
+    return [(f"{base_name}.xlsx", bio)] + files
+
+
+def _as_time_fraction(value) -> float:
+    if pd.isna(value):
+        return 1
+    if hasattr(value, "hour"):
+        return (value.hour * 3600 + value.minute * 60 + value.second) / 86400
+    try:
+        parsed = pd.to_datetime(str(value), errors="coerce")
+    except Exception:
+        return 1
+    if pd.isna(parsed):
+        return 1
+    return (parsed.hour * 3600 + parsed.minute * 60 + parsed.second) / 86400
+
+
+def _business_date(date_value, time_value):
+    parsed = pd.to_datetime(date_value, errors="coerce")
+    if pd.isna(parsed):
+        return None
+    business_dt = parsed
+    if _as_time_fraction(time_value) < 0.625:
+        business_dt = business_dt - pd.Timedelta(days=1)
+    return business_dt.date()
+
+
+def _patch_cached_values(xml: str, cached_values: dict[str, int | float | str]) -> str:
+    for cell_ref, value in cached_values.items():
+        if value is None:
+            continue
+        is_text = isinstance(value, str)
+        if is_text:
+            value_text = xml_escape(value)
+        else:
+            value_text = str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+        pattern = rf'(<c\b[^>]*\br="{re.escape(cell_ref)}"[^>]*>)(.*?)(</c>)'
+
+        def repl(match):
+            inner = match.group(2)
+            if "<f" not in inner:
+                return match.group(0)
+            open_tag = match.group(1)
+            if is_text and ' t="' not in open_tag:
+                # 문자열 결과 수식은 t="str" 이 있어야 캐시값이 표시됨
+                open_tag = open_tag[:-1] + ' t="str">'
+            inner = re.sub(r"<v\b[^>]*/>", "", inner, flags=re.DOTALL)
+            inner = re.sub(r"<v\b[^>]*>.*?</v>", "", inner, flags=re.DOTALL)
+            inner = re.sub(r"(</f>)", lambda m: m.group(1) + f"<v>{value_text}</v>", inner, count=1)
+            return open_tag + inner + match.group(3)
+
+        xml = re.sub(pattern, repl, xml, count=1, flags=re.DOTALL)
+    return xml
+
+
+def _save_workbook_with_cached_values(
+    wb: Workbook,
+    cached_values: dict[str, int | float | str],
+    splices: dict | None = None
+) -> BytesIO:
+    base = BytesIO()
+    wb.save(base)
+
+    def patch(part_name, xml):
+        if part_name == "xl/worksheets/sheet1.xml":
+            return _patch_cached_values(xml, cached_values)
+        return xml
+
+    return save_with_splices(base, splices or {}, patch=patch)
+
+
+# 엑셀 2019/365 계산엔진 ID — 이보다 낮으면 엑셀이 열 때마다 전체 재계산함
+EXCEL_CALC_ID = 191029
+
+
+def make_standard_settlement_excel(
+    detail_df: pd.DataFrame,
+    bj_name: str,
+    all_round_labels: list[str] | None = None,
+    bounded_ranges: bool = True,
+    detail_part: DetailLogPart | None = None,
+    cube: HeartCube | None = None,
+    rates: dict | None = None
+) -> BytesIO:
+    # rates: 이 BJ 의 정산비율 / 협력지원율 (없으면 DEFAULT_RATES) — 입력칸 값과 캐시값이 같이 바뀜
+    # bounded_ranges=True: SUMIF 를 A:A 전체열 대신 후원내역 실제 데이터 범위로 한정하고,
+    # 캐시값이 전부 채워지므로 열 때 강제 전체 재계산을 하지 않음 (대용량 BJ 빠른 열기/편집)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "정산시트"
+    log_ws = wb.create_sheet("후원내역")
+
+    try:
+        if bounded_ranges:
+            wb.calculation.fullCalcOnLoad = False
+            wb.calculation.forceFullCalc = False
+            wb.calculation.calcId = EXCEL_CALC_ID
+        else:
+            wb.calculation.fullCalcOnLoad = True
+            wb.calculation.forceFullCalc = True
+    except Exception:
+        pass
+
+    header_fill = PatternFill("solid", fgColor="666666")
+    yellow_fill = PatternFill("solid", fgColor="FFF2CC")
+    input_fill = PatternFill("solid", fgColor="D9EAD3")
+    title_fill = PatternFill("solid", fgColor="D9EAF7")
+    header_font = Font(name="맑은 고딕", bold=True, color="FFFFFF")
+    bold_font = Font(name="맑은 고딕", bold=True)
+    normal_font = Font(name="맑은 고딕", size=11)
+
+    def style_header(cell):
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    def style_input(cell):
+        cell.fill = input_fill
+        cell.font = bold_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    ws.merge_cells("A1:G2")
+    ws["A1"] = f"{bj_name} 정산표"
+    ws["A1"].font = Font(name="맑은 고딕", size=14, bold=True)
+    ws["A1"].fill = title_fill
+    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+
+    rates = normalize_rates(rates)
+    unit = heart_unit(rates)
+    ws["I3"] = "정산비율"
+    ws["J3"] = rates["정산비율"]
+    ws["I4"] = "하트단가"
+    ws["J4"] = "=$J$3*100"
+    ws["I5"] = "협력지원율"
+    ws["J5"] = rates["협력지원율"]
+    for cell in ("I3", "I4", "I5"):
+        style_input(ws[cell])
+    for cell in ("J3", "J4", "J5"):
+        style_input(ws[cell])
+    ws["J3"].number_format = "0%"
+    ws["J4"].number_format = "#,##0"
+    ws["J5"].number_format = "0%"
+
+    if detail_part is None:
+        detail_part = DetailLogPart(detail_df)
+    # 날짜/시간 정렬은 DetailLogPart 에서 이미 됨
+    sorted_detail = detail_part.frame
+    if cube is None:
+        # 단독 호출: 이 BJ 로그만으로 큐브 생성
+        if "정산일자" not in sorted_detail.columns:
+            sorted_detail = sorted_detail.assign(정산일자=[
+                _business_date(d, t) for d, t in zip(sorted_detail["날짜"], sorted_detail["시간"])
+            ])
+        if "회차" not in sorted_detail.columns:
+            sorted_detail = sorted_detail.assign(회차=None)
+        cube = HeartCube(sorted_detail.assign(참여BJ=bj_name))
+
+    # 회차별 수량 / 일반·제휴 합계는 큐브에서, 후원내역 회차 열만 행 단위로 만듦
+    heart_by_round = cube.sum_by("회차", bj_name)
+    if heart_by_round:
+        log_rounds = sorted_detail["회차"].fillna("").astype(str)
+        round_names = all_round_labels or sorted(
+            [x for x in heart_by_round if x],
+            key=lambda x: int(re.search(r"\d+", str(x)).group()) if re.search(r"\d+", str(x)) else 9999
+        )
+    else:
+        by_date = cube.sum_by("정산일자", bj_name)
+        round_dates = sorted(by_date)
+        round_map = {d: f"{idx}회차" for idx, d in enumerate(round_dates, start=1)}
+        log_rounds = sorted_detail["정산일자"].map(round_map).fillna("") if not sorted_detail.empty else None
+        round_names = [round_map[d] for d in round_dates]
+        heart_by_round = {round_map[d]: hearts for d, hearts in by_date.items()}
+
+    normal_total, partner_total = cube.type_totals(bj_name)
+
+    # 후원내역 시트 참조 범위 (헤더 1행 + 데이터)
+    if bounded_ranges:
+        last_log_row = max(len(sorted_detail) + 1, 2)
+        log_round_range = f"'후원내역'!$A$2:$A${last_log_row}"
+        log_heart_range = f"'후원내역'!$F$2:$F${last_log_row}"
+        log_type_range = f"'후원내역'!$G$2:$G${last_log_row}"
+    else:
+        log_round_range = "'후원내역'!A:A"
+        log_heart_range = "'후원내역'!F:F"
+        log_type_range = "'후원내역'!G:G"
+
+    cached_values = {"J4": unit, "C3": f"{rates['정산비율']:.0%} 정산금"}
+
+    headers = [" ", "수량", "정산금", "상/벌금", "헤메", "총 정산금", "비고"]
+    for col, value in enumerate(headers, start=1):
+        cell = ws.cell(row=3, column=col, value=value)
+        style_header(cell)
+    ws["C3"] = '=TEXT($J$3,"0%")&" 정산금"'
+
+    first_round_row = 4
+    round_count = max(len(round_names), 1)
+    for offset in range(round_count):
+        row = first_round_row + offset
+        round_name = round_names[offset] if round_names else "1회차"
+        round_heart = int(heart_by_round.get(round_name, 0))
+        round_amount = amount(round_heart, unit)
+        ws.cell(row=row, column=1, value=round_name)
+        ws.cell(row=row, column=2, value=f"=SUMIF({log_round_range},'정산시트'!A{row},{log_heart_range})")
+        ws.cell(row=row, column=3, value="=" + won_formula(f"B{row}*$J$3*100"))
+        ws.cell(row=row, column=6, value=f"=C{row}+D{row}+E{row}")
+        cached_values[f"B{row}"] = round_heart
+        cached_values[f"C{row}"] = round_amount
+        cached_values[f"F{row}"] = round_amount
+        ws.cell(row=row, column=7, value="")
+        for col in range(1, 8):
+            cell = ws.cell(row=row, column=col)
+            cell.font = normal_font
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+        for col in (2, 3, 4, 5, 6):
+            ws.cell(row=row, column=col).number_format = "#,##0"
+
+    total_row = first_round_row + round_count
+    ws.cell(row=total_row, column=1, value="합계")
+    ws.cell(row=total_row, column=2, value=f"=SUM(B{first_round_row}:B{total_row - 1})")
+    ws.cell(row=total_row, column=3, value=f"=SUM(C{first_round_row}:C{total_row - 1})")
+    ws.cell(row=total_row, column=4, value=f"=SUM(D{first_round_row}:D{total_row - 1})")
+    ws.cell(row=total_row, column=5, value=f"=SUM(E{first_round_row}:E{total_row - 1})")
+    ws.cell(row=total_row, column=6, value=f"=SUM(F{first_round_row}:F{total_row - 1})")
+    total_heart = int(sum(heart_by_round.get(round_name, 0) for round_name in round_names))
+    # 합계 줄은 회차별로 버린 정산금의 합 (=SUM 과 같은 값)
+    total_amount = sum(amount(int(heart_by_round.get(round_name, 0)), unit) for round_name in round_names)
+    cached_values[f"B{total_row}"] = total_heart
+    cached_values[f"C{total_row}"] = total_amount
+    cached_values[f"D{total_row}"] = 0
+    cached_values[f"E{total_row}"] = 0
+    cached_values[f"F{total_row}"] = total_amount
+    for col in range(1, 8):
+        cell = ws.cell(row=total_row, column=col)
+        cell.font = bold_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    for col in (2, 3, 4, 5, 6):
+        ws.cell(row=total_row, column=col).number_format = "#,##0"
+
+    summary_header_row = total_row + 3
+    summary_headers = ["일자", "구분", "하트 개수", "공급가액", "세액", "합계", "비고"]
+    for col, value in enumerate(summary_headers, start=1):
+        cell = ws.cell(row=summary_header_row, column=col, value=value)
+        style_header(cell)
+
+    rows = [
+        ("일반하트", f'=SUMIF({log_type_range},"일반",{log_heart_range})', "=" + won_formula("C{row}*$J$3*100"), "", ""),
+        ("협력지원금", "=C{normal_row}", "=" + won_formula("C{row}*IF($J$5>1,$J$5/100,$J$5)*100"), "", "J5 협력지원율 기준"),
+        ("제휴하트", f'=SUMIF({log_type_range},"제휴",{log_heart_range})', "=" + won_formula("C{row}*$J$3*100"), "", ""),
+        ("헤메", "", "", "=" + tax_formula("D{row}"), ""),
+        ("상/벌금", "", "", "=" + tax_formula("D{row}"), "상벌금 합계"),
+    ]
+    normal_heart_row = summary_header_row + 1
+    # 일반 / 협력지원 / 제휴 줄 캐시값 (rates.settlement_amounts — 화면 요율 패널과 같은 계산)
+    amounts = settlement_amounts(normal_total, partner_total, rates)
+    line_amounts = {
+        "일반하트": (normal_total, amounts["일반정산금"]),
+        "협력지원금": (normal_total, amounts["협력지원금"]),
+        "제휴하트": (partner_total, amounts["제휴정산금"]),
+    }
+
+    for idx, (label, heart_formula, supply_formula, line_tax_formula, note) in enumerate(rows, start=1):
+        row = summary_header_row + idx
+        ws.cell(row=row, column=2, value=label)
+        ws.cell(row=row, column=2).fill = yellow_fill
+        ws.cell(row=row, column=2).alignment = Alignment(horizontal="center", vertical="center")
+        if heart_formula:
+            ws.cell(row=row, column=3, value=heart_formula.format(normal_row=normal_heart_row, row=row))
+        if supply_formula:
+            ws.cell(row=row, column=4, value=supply_formula.format(normal_row=normal_heart_row, row=row))
+        if line_tax_formula:
+            ws.cell(row=row, column=5, value=line_tax_formula.format(row=row))
+        else:
+            ws.cell(row=row, column=5, value="=" + tax_formula(f"D{row}"))
+        ws.cell(row=row, column=6, value=f"=D{row}+E{row}")
+        ws.cell(row=row, column=7, value=note)
+        for col in range(3, 7):
+            ws.cell(row=row, column=col).number_format = "#,##0"
+        if label == "협력지원금":
+            ws.cell(row=row, column=3).number_format = "#,##0"
+        if label in line_amounts:
+            hearts, line_amount = line_amounts[label]
+            tax = won(line_amount * TAX_RATE)
+            cached_values[f"C{row}"] = hearts
+            cached_values[f"D{row}"] = line_amount
+            cached_values[f"E{row}"] = tax
+            cached_values[f"F{row}"] = line_amount + tax
+        else:
+            cached_values[f"E{row}"] = 0
+            cached_values[f"F{row}"] = 0
+
+    final_row = summary_header_row + len(rows) + 1
+    ws.cell(row=final_row, column=1, value="합계")
+    ws.cell(row=final_row, column=3, value=f"=C{summary_header_row + 1}+C{summary_header_row + 3}")
+    ws.cell(row=final_row, column=4, value=f"=SUM(D{summary_header_row + 1}:D{final_row - 1})")
+    ws.cell(row=final_row, column=5, value=f"=SUM(E{summary_header_row + 1}:E{final_row - 1})")
+    ws.cell(row=final_row, column=6, value=f"=SUM(F{summary_header_row + 1}:F{final_row - 1})")
+    cached_values[f"C{final_row}"] = normal_total + partner_total
+    cached_values[f"D{final_row}"] = amounts["공급가액"]
+    cached_values[f"E{final_row}"] = amounts["세액"]
+    cached_values[f"F{final_row}"] = amounts["합계"]
+    for col in range(1, 8):
+        cell = ws.cell(row=final_row, column=col)
+        cell.font = bold_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    for col in range(3, 7):
+        ws.cell(row=final_row, column=col).number_format = "#,##0"
+
+    for col, width in {
+        "A": 15, "B": 14, "C": 16, "D": 16, "E": 14, "F": 16, "G": 30,
+        "I": 14, "J": 12,
+    }.items():
+        ws.column_dimensions[col].width = width
+    for row in range(1, final_row + 1):
+        ws.row_dimensions[row].height = 22
+    apply_border(ws)
+
+    log_ws.append(["회차", "날짜", "시간", "아이디", "닉네임", "하트", "구분"])
+    for col in range(1, 8):
+        style_header(log_ws.cell(row=1, column=col))
+
+    # 후원내역 행은 BJ 파일들과 같은 렌더링 조각 재사용 (앞에 회차 열만 붙임)
+    splices = {}
+    if not sorted_detail.empty:
+        write_prototype_row(log_ws, 2, with_round=True)
+        splices[sheet_part_name(wb, log_ws)] = (
+            2,
+            detail_part.rows_xml(log_rounds),
+            len(detail_part),
+            0
+        )
+
+    log_ws["B1"] = "날짜"
+    log_ws.freeze_panes = "A2"
+    for col, width in {
+        "A": 12, "B": 14, "C": 12, "D": 28, "E": 24, "F": 14, "G": 12,
+    }.items():
+        log_ws.column_dimensions[col].width = width
+    apply_border(log_ws)
+
+    return _save_workbook_with_cached_values(wb, cached_values, splices)
+
+
+# ==================================================
+# 📥 생성 묶음 (BJ별 파일 + 총합산 + ZIP) — 화면/스풀 서비스 공용
+# ==================================================
+def bj_filenames(bj, prefix: str | None = None) -> tuple[str, str, str]:
+    safe_bj = safe_filename(bj)
+
+    filename1 = (
+        f"{prefix}_{safe_bj}_정산용.xlsx"
+        if prefix else
+        f"{safe_bj}_정산용.xlsx"
+    )
+
+    filename2 = (
+        f"{prefix}_{safe_bj}_BJ용.xlsx"
+        if prefix else
+        f"{safe_bj}_BJ용.xlsx"
+    )
+
+    filename3 = (
+        f"{prefix}_{safe_bj}_표준정산시트.xlsx"
+        if prefix else
+        f"{safe_bj}_표준정산시트.xlsx"
+    )
+
+    return filename1, filename2, filename3
+
+
+def generate_artifacts(
+    job,
+    merged,
+    result,
+    multi_upload,
+    all_round_labels,
+    bounded_ranges,
+    prefix=None,
+    cube=None,
+    shard_bjs=TOTAL_SHARD_BJS,
+    shard_rows=TOTAL_SHARD_ROWS
+):
+    # 백그라운드 스레드에서 실행 — st.* 호출 금지, 경고는 결과에 담아 돌려줌
+    # job: report(...) 를 가진 진행 상황 객체 (jobs.GenerationJob)
+    # merged: 원본 합본 — 모든 BJ 의 결과(result)와 cube 를 넘기므로 총합산 필수 컬럼 확인에만 씀 (헤더만 있어도 됨)
+    # cube: 업로드 묶음의 HeartCube — 상단 합계 / 회차별 수량 / 총합산 집계 시트에 공용
+    # shard_bjs / shard_rows: 총합산 파일당 BJ 수 / 로그 행 수 상한 (0 = 한 파일)
+    store = ArtifactStore()
+    try:
+        generated = {
+            "store": store,
+            "총합산": None,
+            "총합산_분할": [],
+            "정산용": [],
+            "BJ용": [],
+            "표준정산시트": [],
+            "warnings": [],
+        }
+        job.report("집계 준비", done=0, total=len(result))
+
+        # BJ 상세 로그는 BJ당 한 번만 렌더링 → 정산용/BJ용/표준정산시트/총합산이 같이 씀
+        parts = {}
+        for done, (bj, views) in enumerate(result.items()):
+            job.report(f"BJ별 파일 생성: {bj}", done=done)
+            filename1, filename2, filename3 = bj_filenames(bj, prefix)
+            # 전체로그는 꺼낼 때마다 표준 로그에서 잘라 오므로 BJ당 한 번만
+            detail_log = views.get("전체로그")
+            part = DetailLogPart(detail_log)
+            bj_total = cube.total(bj) if cube is not None else None
+
+            generated["정산용"].append(store.add(
+                filename1,
+                make_excel(
+                    views["정산용"],
+                    bj,
+                    detail_part=part,
+                    total=bj_total
+                )
+            ))
+
+            generated["표준정산시트"].append(store.add(
+                filename3,
+                make_standard_settlement_excel(
+                    detail_log,
+                    bj,
+                    all_round_labels if multi_upload else None,
+                    bounded_ranges=bounded_ranges,
+                    detail_part=part,
+                    cube=cube
+                )
+            ))
+
+            generated["BJ용"].append(store.add(
+                filename2,
+                make_excel(
+                    views["BJ용"],
+                    bj,
+                    detail_part=part,
+                    total=bj_total
+                )
+            ))
+
+            # 총합산이 필요할 때만 보관 (아니면 BJ 하나 끝날 때마다 버림)
+            if multi_upload:
+                parts[bj] = part
+
+        # 여러 파일 업로드일 때만 총합산 제공(요구사항)
+        if multi_upload:
+            job.report("총합산 생성", done=len(result))
+            total_files = make_total_excel_shards(merged, parts, cube, shard_bjs, shard_rows)
+            parts.clear()
+            if total_files is None:
+                generated["warnings"].append("총합산 생성 실패: 필수 컬럼(후원시간/후원아이디/후원하트/참여BJ)을 찾지 못했습니다.")
+            else:
+                (total_name, total_file), *shard_files = total_files
+                generated["총합산"] = store.add(total_name, total_file)
+                generated["총합산_분할"] = [store.add(name, data) for name, data in shard_files]
+                if shard_files:
+                    # 요약 파일의 링크가 살아 있도록 같은 폴더에 풀리는 ZIP 으로도 제공
+                    generated["총합산_zip"] = store.add_zip(
+                        "총합산_전체다운로드.zip",
+                        [generated["총합산"]] + generated["총합산_분할"]
+                    )
+
+        for kind in ("정산용", "BJ용", "표준정산시트"):
+            job.report(f"{kind} ZIP 묶는 중", done=len(result))
+            if generated[kind]:
+                zip_name = f"{prefix}_{kind}_전체다운로드.zip" if prefix else f"{kind}_전체다운로드.zip"
+                generated[f"{kind}_zip"] = store.add_zip(zip_name, generated[kind])
+
+        return generated
+    except BaseException:
+        store.cleanup()
+        raise